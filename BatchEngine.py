@@ -0,0 +1,330 @@
+# Author: Ethan David Lee
+# GitHub username: ethandavidlee
+# Date: 2024/03/11
+# Description: Batch of Falcon-Hunter Chess games stepped in lockstep with NumPy, for self-play and reinforcement
+#           learning. Each game is a row of piece codes for the 64 squares (viewed as 8x8, EMPTY_CODE for an empty
+#           square) with vectors of off board and taken piece counts, a turn counter and a game state. Legal moves of
+#           every game are generated together as a mask over a fixed action space, and a batch of chosen moves is
+#           applied together, with the same rules as ChessVar.make_move and ChessVar.enter_fairy_piece: moves made
+#           after a king is taken, by the wrong side, or that ChessVar would refuse are not applied.
+#           Actions:   current square index * 64 + new square index for a board move, 0 to 4095
+#                      4096 + fairy kind * 64 + entry square index for entering a fairy piece, with the kinds in
+#                      FAIRY_NAMES order ('F', 'H', 'f', 'h'), 4096 to 4351
+#           Requires NumPy.
+
+import numpy
+
+from ChessVar import (ChessVar, GameSnapshot, BETWEEN_SQUARES, EMPTY_CODE, FAIRY_CODES, FAIRY_NAMES, KING_CODES,
+                      LOST_PIECE_CODES, PIECE_CODES, PIECES, SQUARE_INDICES, SQUARE_NAMES, START_SQUARES,
+                      START_OFF_BOARD, ZOBRIST_BLACK_TO_MOVE, ZOBRIST_LOST_PIECES, ZOBRIST_OFF_BOARD, ZOBRIST_PIECES)
+
+BOARD_ACTIONS = 64 * 64
+ACTIONS = BOARD_ACTIONS + len(FAIRY_NAMES) * 64
+GAME_STATES = ('UNFINISHED', 'WHITE_WON', 'BLACK_WON')  # in game state code order
+COLORS = ('white', 'black')  # in side code order, the side to move being the turn counter modulo 2
+
+
+def _mask_bits(mask):
+    """
+    Returns a boolean array of the 64 bits of a square bitmask, in square index order.
+    """
+    return numpy.unpackbits(numpy.frombuffer(mask.to_bytes(8, 'little'), numpy.uint8), bitorder='little').astype(bool)
+
+
+# for each piece code, and EMPTY_CODE which never moves, whether the piece moves or captures from each square index to
+# each square index on an empty board
+MOVE_TABLE = numpy.zeros((EMPTY_CODE + 1, 64, 64), bool)
+ATTACK_TABLE = numpy.zeros((EMPTY_CODE + 1, 64, 64), bool)
+for _code, _piece in enumerate(PIECES):
+    for _index in range(64):
+        MOVE_TABLE[_code, _index] = _mask_bits(_piece.get_move_mask(_index))
+        ATTACK_TABLE[_code, _index] = _mask_bits(_piece.get_attack_mask(_index))
+
+# for each board action, the squares strictly between its current and new square, as 0 or 1, so that multiplying by
+# the occupied squares counts the pieces in the way
+BETWEEN_TABLE = numpy.zeros((BOARD_ACTIONS, 64), numpy.float32)
+for _current in range(64):
+    for _new in range(64):
+        BETWEEN_TABLE[_current * 64 + _new, list(BETWEEN_SQUARES[_current][_new])] = 1.0
+
+# the side code of each piece code, with 2 for EMPTY_CODE, and the home rows each side's fairy pieces enter on
+SIDES = numpy.array([COLORS.index(piece.get_color()) for piece in PIECES] + [2], numpy.int8)
+HOME_ROWS = numpy.zeros((2, 64), bool)
+HOME_ROWS[0, :16] = True
+HOME_ROWS[1, 48:] = True
+
+# the piece code and side code of each fairy kind, and the piece codes of each side's fairy and lost pieces
+FAIRY_KIND_CODES = numpy.array([PIECE_CODES[name] for name in FAIRY_NAMES])
+FAIRY_KIND_SIDES = numpy.array([COLORS.index(PIECES[code].get_color()) for code in FAIRY_KIND_CODES])
+SIDE_FAIRY_CODES = numpy.array([FAIRY_CODES[color] for color in COLORS])
+SIDE_LOST_PIECE_CODES = numpy.array([LOST_PIECE_CODES[color] for color in COLORS])
+
+# the piece codes on each square index and the off board counts at the start of the game
+START_CODES = numpy.array([PIECE_CODES[piece.get_name()] if piece else EMPTY_CODE for piece in START_SQUARES],
+                          numpy.uint8)
+START_OFF_BOARD_COUNTS = numpy.zeros(len(PIECES), numpy.uint8)
+for _color in COLORS:
+    for _piece in START_OFF_BOARD[_color]:
+        START_OFF_BOARD_COUNTS[PIECE_CODES[_piece.get_name()]] += 1
+
+# the Zobrist keys of ChessVar.get_hash as arrays, with a zero key for empty squares
+ZOBRIST_PIECE_TABLE = numpy.array(ZOBRIST_PIECES + [[0] * 64], numpy.uint64)
+ZOBRIST_OFF_BOARD_TABLE = numpy.array(ZOBRIST_OFF_BOARD, numpy.uint64)
+ZOBRIST_LOST_PIECE_TABLE = numpy.array([ZOBRIST_LOST_PIECES[color] for color in COLORS], numpy.uint64)
+
+SQUARE_RANGE = numpy.arange(64)
+
+
+def move_to_action(move):
+    """
+    Returns the action of a move in the form generated by ChessVar.legal_moves, such as ('e2', 'e4') or ('F', 'e2').
+    """
+    if move[0] in FAIRY_NAMES:
+        return BOARD_ACTIONS + FAIRY_NAMES.index(move[0]) * 64 + SQUARE_INDICES[move[1]]
+    return SQUARE_INDICES[move[0]] * 64 + SQUARE_INDICES[move[1]]
+
+
+def action_to_move(action):
+    """
+    Returns the move of an action in the form taken by ChessVar.play_move.
+    """
+    action = int(action)
+    if not 0 <= action < ACTIONS:
+        raise ValueError(f'action {action} is outside the action space of {ACTIONS} actions')
+    if action >= BOARD_ACTIONS:
+        return FAIRY_NAMES[(action - BOARD_ACTIONS) // 64], SQUARE_NAMES[action % 64]
+    return SQUARE_NAMES[action // 64], SQUARE_NAMES[action % 64]
+
+
+def packed_move_to_action(packed_moves):
+    """
+    Returns the actions of an array of moves packed by ChessVar.pack_move, such as ChessVar.legal_packed_moves. A
+    packed board move is already its action, and a packed entry has its fairy kind plus one in bits 12-14.
+    """
+    packed_moves = numpy.asarray(packed_moves, numpy.int64)
+    kinds = packed_moves >> 12
+    return numpy.where(kinds > 0, BOARD_ACTIONS + (kinds - 1) * 64 + (packed_moves & 63), packed_moves)
+
+
+class BatchEngine:
+    """
+    Represents a fixed number of games held in NumPy arrays and stepped together. Communicates with ChessVar through
+    GameSnapshot to load games into the batch and to get them back, and uses the move tables of the shared pieces so
+    that its moves are those of ChessVar. Each array has one row per game.
+    """
+    def __init__(self, size):
+        if size < 1:
+            raise ValueError('a batch needs at least one game')
+        self._size = size
+        self._rows = numpy.arange(size)
+        self._squares = numpy.empty((size, 64), numpy.uint8)  # piece code on each square index
+        self._off_board_counts = numpy.empty((size, len(PIECES)), numpy.uint8)  # fairy pieces waiting to enter
+        self._taken_counts = numpy.empty((size, len(PIECES)), numpy.uint8)  # captured pieces
+        self._turns = numpy.empty(size, numpy.int64)
+        self._game_states = numpy.empty(size, numpy.uint8)  # index into GAME_STATES
+        self.reset()
+
+    def get_size(self):
+        """
+        Returns the number of games in the batch.
+        """
+        return self._size
+
+    def get_squares(self):
+        """
+        Returns the array of shape (size, 64) holding the piece code on each square index of each game.
+        """
+        return self._squares
+
+    def get_boards(self):
+        """
+        Returns the piece codes of each game as an array of shape (size, 8, 8), indexed by row then column from a1.
+        """
+        return self._squares.reshape(self._size, 8, 8)
+
+    def get_off_board_counts(self):
+        """
+        Returns the array of shape (size, 16) counting the fairy pieces off the board by piece code.
+        """
+        return self._off_board_counts
+
+    def get_taken_counts(self):
+        """
+        Returns the array of shape (size, 16) counting the taken pieces by piece code.
+        """
+        return self._taken_counts
+
+    def get_turns(self):
+        """
+        Returns the array of turn counters, even when it is white's turn and odd when it is black's.
+        """
+        return self._turns
+
+    def get_sides(self):
+        """
+        Returns an array of the side to move in each game, 0 for white and 1 for black.
+        """
+        return (self._turns % 2).astype(numpy.int8)
+
+    def get_game_state_codes(self):
+        """
+        Returns the array of game state codes, indices into GAME_STATES.
+        """
+        return self._game_states
+
+    def get_game_state(self, game_index):
+        """
+        Returns the game state of one game, 'UNFINISHED', 'WHITE_WON' or 'BLACK_WON'.
+        """
+        return GAME_STATES[self._game_states[game_index]]
+
+    def get_lost_piece_counts(self):
+        """
+        Returns an array of shape (size, 2) of the queens, rooks, bishops and knights white and black have lost.
+        """
+        return self._taken_counts[:, SIDE_LOST_PIECE_CODES].sum(axis=2, dtype=numpy.int64)
+
+    def get_hashes(self, game_indices=None):
+        """
+        Returns an array of the Zobrist hash of the given games, or of every game if None, the same as
+        ChessVar.get_hash.
+        """
+        if game_indices is None:
+            game_indices = slice(None)
+        squares = self._squares[game_indices].reshape(-1, 64)
+        hashes = numpy.bitwise_xor.reduce(ZOBRIST_PIECE_TABLE[squares, SQUARE_RANGE], axis=1)
+        black_to_move = self._turns[game_indices].reshape(-1) % 2 == 1
+        hashes ^= numpy.where(black_to_move, numpy.uint64(ZOBRIST_BLACK_TO_MOVE), numpy.uint64(0))
+        odd_off_board = (self._off_board_counts[game_indices].reshape(-1, len(PIECES)) % 2).astype(bool)
+        hashes ^= numpy.bitwise_xor.reduce(numpy.where(odd_off_board, ZOBRIST_OFF_BOARD_TABLE, numpy.uint64(0)), axis=1)
+        lost_codes = self._taken_counts[game_indices].reshape(-1, len(PIECES))[:, SIDE_LOST_PIECE_CODES]
+        lost = numpy.minimum(lost_codes.sum(axis=2, dtype=numpy.int64), 2)
+        hashes ^= ZOBRIST_LOST_PIECE_TABLE[0, lost[:, 0]] ^ ZOBRIST_LOST_PIECE_TABLE[1, lost[:, 1]]
+        return hashes
+
+    def reset(self, game_indices=None):
+        """
+        Puts the given games, or every game if None, back to the start of the game. The indices may be an array of
+        game indices or a boolean array with one entry per game.
+        """
+        if game_indices is None:
+            game_indices = slice(None)
+        self._squares[game_indices] = START_CODES
+        self._off_board_counts[game_indices] = START_OFF_BOARD_COUNTS
+        self._taken_counts[game_indices] = 0
+        self._turns[game_indices] = 0
+        self._game_states[game_indices] = 0
+
+    def set_game(self, game_index, game):
+        """
+        Loads the position of a ChessVar into one game of the batch.
+        """
+        snapshot = game.snapshot()
+        self._squares[game_index] = numpy.frombuffer(snapshot.get_square_codes(), numpy.uint8)
+        self._off_board_counts[game_index] = numpy.bincount(
+            numpy.frombuffer(snapshot.get_off_board_codes(), numpy.uint8), minlength=len(PIECES))
+        self._taken_counts[game_index] = numpy.bincount(
+            numpy.frombuffer(snapshot.get_taken_codes(), numpy.uint8), minlength=len(PIECES))
+        self._turns[game_index] = snapshot.get_turn_count()
+        self._game_states[game_index] = GAME_STATES.index(snapshot.get_game_state())
+
+    def get_snapshot(self, game_index):
+        """
+        Returns a GameSnapshot of one game, with the off board and taken pieces in piece code order.
+        """
+        codes = numpy.arange(len(PIECES), dtype=numpy.uint8)
+        return GameSnapshot(self._squares[game_index].tobytes(),
+                            numpy.repeat(codes, self._off_board_counts[game_index]).tobytes(),
+                            numpy.repeat(codes, self._taken_counts[game_index]).tobytes(),
+                            int(self._turns[game_index]), self.get_game_state(game_index),
+                            int(self.get_hashes(game_index)[0]))
+
+    def get_game(self, game_index, backend='dict'):
+        """
+        Returns a new ChessVar in the position of one game, on the given chessboard backend.
+        """
+        return ChessVar.from_snapshot(self.get_snapshot(game_index), backend)
+
+    def _may_enter(self, sides):
+        """
+        Returns a boolean array of whether the side to move in each game has lost enough queens, rooks, bishops and
+        knights for its next fairy piece to enter, as in ChessVar.valid_fairy_enter.
+        """
+        fairy_counts = self._off_board_counts[self._rows[:, None], SIDE_FAIRY_CODES[sides]].sum(axis=1)
+        lost_counts = self._taken_counts[self._rows[:, None], SIDE_LOST_PIECE_CODES[sides]].sum(axis=1)
+        return ((fairy_counts == 2) & (lost_counts >= 1)) | ((fairy_counts == 1) & (lost_counts >= 2))
+
+    def legal_mask(self):
+        """
+        Returns a boolean array of shape (size, ACTIONS) marking the legal actions of each game, the moves generated by
+        ChessVar.legal_moves. A game that has been won has no legal actions.
+        """
+        sides = self.get_sides()
+        unfinished = self._game_states == 0
+        squares = self._squares
+        square_sides = SIDES[squares]
+        own = square_sides == sides[:, None]
+        enemy = square_sides == 1 - sides[:, None]
+        empty = squares == EMPTY_CODE
+
+        reach = numpy.where(enemy[:, None, :], ATTACK_TABLE[squares, SQUARE_RANGE], MOVE_TABLE[squares, SQUARE_RANGE])
+        clear = (~empty).astype(numpy.float32) @ BETWEEN_TABLE.T == 0
+        moves = reach & own[:, :, None] & ~own[:, None, :] & (unfinished[:, None, None])
+
+        mask = numpy.empty((self._size, ACTIONS), bool)
+        mask[:, :BOARD_ACTIONS] = moves.reshape(self._size, BOARD_ACTIONS) & clear
+        fairy_kinds = ((FAIRY_KIND_SIDES == sides[:, None]) & (self._off_board_counts[:, FAIRY_KIND_CODES] > 0)
+                       & (self._may_enter(sides) & unfinished)[:, None])
+        entries = HOME_ROWS[sides] & empty
+        mask[:, BOARD_ACTIONS:] = (fairy_kinds[:, :, None] & entries[:, None, :]).reshape(self._size, -1)
+        return mask
+
+    def apply(self, actions):
+        """
+        Makes one action in each game, given an array of one action per game, and returns a boolean array of which
+        were made. An action that is illegal, out of the action space or in a game that has been won is not made,
+        leaving that game unchanged, as ChessVar.make_move and ChessVar.enter_fairy_piece return False.
+        """
+        actions = numpy.asarray(actions, numpy.int64)
+        if actions.shape != (self._size,):
+            raise ValueError(f'expected {self._size} actions, got an array of shape {actions.shape}')
+        rows = self._rows
+        squares = self._squares
+        sides = self.get_sides()
+        unfinished = self._game_states == 0
+
+        is_board_move = (actions >= 0) & (actions < BOARD_ACTIONS) & unfinished
+        current = numpy.where(is_board_move, actions // 64, 0)
+        new = numpy.where(is_board_move, actions % 64, 0)
+        moving_codes = squares[rows, current]
+        taken_codes = squares[rows, new]
+        is_capture = SIDES[taken_codes] == 1 - sides
+        reach = numpy.where(is_capture, ATTACK_TABLE[moving_codes, current, new],
+                            MOVE_TABLE[moving_codes, current, new])
+        in_the_way = (BETWEEN_TABLE[current * 64 + new] != 0) & (squares != EMPTY_CODE)
+        board_moves = (is_board_move & (SIDES[moving_codes] == sides) & (SIDES[taken_codes] != sides) & reach
+                       & ~in_the_way.any(axis=1))
+
+        is_entry = (actions >= BOARD_ACTIONS) & (actions < ACTIONS) & unfinished
+        kinds = numpy.where(is_entry, (actions - BOARD_ACTIONS) // 64, 0)
+        entry_squares = numpy.where(is_entry, actions % 64, 0)
+        fairy_codes = FAIRY_KIND_CODES[kinds]
+        entries = (is_entry & (FAIRY_KIND_SIDES[kinds] == sides) & (self._off_board_counts[rows, fairy_codes] > 0)
+                   & HOME_ROWS[sides, entry_squares] & (squares[rows, entry_squares] == EMPTY_CODE)
+                   & self._may_enter(sides))
+
+        moved = rows[board_moves]
+        squares[moved, new[board_moves]] = moving_codes[board_moves]
+        squares[moved, current[board_moves]] = EMPTY_CODE
+        captures = board_moves & is_capture
+        self._taken_counts[rows[captures], taken_codes[captures]] += 1
+        self._game_states[captures & (taken_codes == KING_CODES['black'])] = GAME_STATES.index('WHITE_WON')
+        self._game_states[captures & (taken_codes == KING_CODES['white'])] = GAME_STATES.index('BLACK_WON')
+
+        entered = rows[entries]
+        squares[entered, entry_squares[entries]] = fairy_codes[entries]
+        self._off_board_counts[entered, fairy_codes[entries]] -= 1
+
+        made = board_moves | entries
+        self._turns[made] += 1
+        return made
@@ -0,0 +1,77 @@
+from ChessVar import ChessVar, pack_move
+import random
+import unittest
+
+try:
+    from BatchEngine import *
+except ImportError:  # NumPy is not installed
+    BatchEngine = None
+
+
+@unittest.skipIf(BatchEngine is None, 'NumPy is not installed')
+class TestBatchEngine(unittest.TestCase):
+    def test_start(self):
+        """Tests a new batch holds the start of the game, with the legal moves, hash and action encoding of
+        ChessVar."""
+        batch = BatchEngine(3)
+        game = ChessVar()
+        self.assertEqual(batch.get_boards().shape, (3, 8, 8))
+        self.assertEqual(batch.get_snapshot(2), game.snapshot())
+        mask = batch.legal_mask()
+        self.assertEqual(mask.shape, (3, ACTIONS))
+        self.assertEqual(sorted(numpy.flatnonzero(mask[1])), sorted(move_to_action(move)
+                                                                   for move in game.get_legal_moves()))
+        for move in [('e2', 'e4'), ('F', 'a1'), ('h', 'h8')]:
+            self.assertEqual(action_to_move(move_to_action(move)), move)
+            self.assertEqual(packed_move_to_action([pack_move(move)]).tolist(), [move_to_action(move)])
+        with self.assertRaises(ValueError):
+            action_to_move(ACTIONS)
+
+    def test_cross_validation(self):
+        """Tests random games stepped in the batch match the same games played on ChessVar move by move, including
+        illegal moves, fairy entries and moves after the game is won."""
+        generator = random.Random(11)
+        size = 12
+        batch = BatchEngine(size)
+        games = [ChessVar(backend='bitboard') for __ in range(size)]
+        entries = wins = refused = 0
+        for __ in range(300):
+            mask = batch.legal_mask()
+            actions = []
+            for game_index, game in enumerate(games):
+                legal = {move_to_action(move) for move in game.get_legal_moves()}
+                self.assertEqual(set(numpy.flatnonzero(mask[game_index])), legal)
+                if legal and generator.random() < 0.9:
+                    actions.append(generator.choice(sorted(legal)))
+                else:
+                    actions.append(generator.randrange(ACTIONS))
+            made = batch.apply(actions)
+            entries += int((made & (numpy.array(actions) >= BOARD_ACTIONS)).sum())
+            refused += int((~made).sum())
+            for game_index, game in enumerate(games):
+                self.assertEqual(made[game_index], game.play_move(action_to_move(actions[game_index])))
+                self.assertEqual(batch.get_snapshot(game_index), game.snapshot())
+            finished = batch.get_game_state_codes() != 0
+            if finished.any() and generator.random() < 0.2:
+                wins += int(finished.sum())
+                batch.reset(finished)
+                for game_index in numpy.flatnonzero(finished):
+                    games[game_index].reset()
+        self.assertGreater(entries, 0)
+        self.assertGreater(wins, 0)
+        self.assertGreater(refused, 0)
+
+    def test_load_game(self):
+        """Tests a ChessVar loaded into the batch comes back the same."""
+        game = ChessVar.from_fen('r1bqkbnr/p1p1pppp/p2p4/8/8/4P3/PPPPFPPP/RNBQK1NR w Hfh Bn 6')
+        batch = BatchEngine(2)
+        batch.set_game(1, game)
+        self.assertEqual(batch.get_game(1).to_fen(), game.to_fen())
+        self.assertEqual(int(batch.get_hashes()[1]), game.get_hash())
+        self.assertEqual(batch.get_lost_piece_counts()[1].tolist(), [1, 1])
+        self.assertEqual(list(batch.apply([move_to_action(('e2', 'e4')), move_to_action(('H', 'f1'))])),
+                         [True, False])  # one lost piece lets only the first fairy piece enter
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,572 @@
+# Author: Ethan David Lee
+# GitHub username: ethandavidlee
+# Date: 2024/03/11
+# Description: Computer player for Falcon-Hunter Chess. Searches the legal moves of a ChessVar game, including Falcon
+#           and Hunter entries, with negamax alpha-beta search and a size-bounded transposition table keyed by the
+#           game's position hash. Capturing a king ends the game, so a position where the king can be taken is scored
+#           as won without searching further, with quicker king captures scored higher. Searches deepen one ply at a
+#           time until a depth limit, a hard time limit or a cancellation from another thread, always answering with
+#           the best move of the last completed depth. Positions at the depth limit are scored by the game's static
+#           evaluation, which ChessVar keeps up to date with each move, after a quiescence search of the captures, so
+#           that a score is never taken in the middle of an exchange or with a king about to be taken. Captures are
+#           judged by static exchange evaluation, which follows the exchanges on a square using each piece's attack
+#           table, so Falcons and Hunters take part only in the directions they can capture in, and which finds the
+#           pieces behind the first attackers as they are swapped off.
+#           Usage: python ChessEngine.py [--seconds N]
+
+import argparse
+import sys
+import threading
+import time
+
+from ChessVar import BETWEEN_MASKS, PIECES, PIECE_VALUES, SQUARE_BITS, SQUARE_INDICES
+from Perft import PERFT_SUITE
+
+
+# scores are in centipawns from the point of view of the player to move
+KING_CAPTURE_SCORE = 100000  # minus the number of plies to the king capture
+WIN_THRESHOLD = KING_CAPTURE_SCORE - 1000  # scores beyond this are forced king captures
+DEFAULT_DEPTH = 3
+MAX_DEPTH = 64  # iterative deepening never goes deeper than this
+POLL_NODES = 256  # the time limit and cancellation are checked once every this many nodes
+DELTA_MARGIN = 200  # quiescence skips captures that cannot raise alpha even if they win this much more than expected
+QUIESCENCE_EVASIONS = 4  # quiescence searches every move at most this many times in a line to save an attacked king
+
+# piece values in static exchange evaluation, where losing the king loses the game, and for each square index the
+# squares from which some piece could capture on it on an empty board
+EXCHANGE_VALUES = dict(PIECE_VALUES, king=KING_CAPTURE_SCORE)
+EXCHANGE_SQUARES = [tuple(index for index in range(64)
+                          if any(piece.get_attack_mask(index) >> target_index & 1 for piece in PIECES))
+                    for target_index in range(64)]
+
+# bound types of a transposition table entry
+EXACT = 0
+LOWER_BOUND = 1  # the search failed high, the score is at least the stored score
+UPPER_BOUND = 2  # the search failed low, the score is at most the stored score
+
+
+class SearchStopped(Exception):
+    """
+    Raised inside a search when its time limit is reached or it is cancelled, unwinding back to iterative deepening.
+    """
+
+
+class CancellationToken:
+    """
+    Represents a request to stop a search early. The search checks the token as it runs, so another thread can call
+    cancel to make the search return its best move so far.
+    """
+    def __init__(self):
+        self._event = threading.Event()
+
+    def cancel(self):
+        """
+        Asks every search using this token to stop.
+        """
+        self._event.set()
+
+    def is_cancelled(self):
+        """
+        Returns True if cancel has been called.
+        """
+        return self._event.is_set()
+
+
+class SearchResult:
+    """
+    Represents the outcome of a search: the best move and its score from the last completed depth, that depth, and the
+    number of positions visited and seconds taken by the whole search.
+    """
+    def __init__(self, move, score, depth, nodes, seconds):
+        self._move = move
+        self._score = score
+        self._depth = depth
+        self._nodes = nodes
+        self._seconds = seconds
+
+    def get_move(self):
+        """
+        Returns the best move, in the form generated by ChessVar.legal_moves, or None if there is no legal move.
+        """
+        return self._move
+
+    def get_score(self):
+        """
+        Returns the score of the best move for the player to move, in centipawns.
+        """
+        return self._score
+
+    def get_depth(self):
+        """
+        Returns the deepest depth the search completed.
+        """
+        return self._depth
+
+    def get_nodes(self):
+        """
+        Returns the number of positions visited.
+        """
+        return self._nodes
+
+    def get_seconds(self):
+        """
+        Returns the time taken in seconds.
+        """
+        return self._seconds
+
+    def get_nodes_per_second(self):
+        """
+        Returns the number of positions visited per second.
+        """
+        return self._nodes / self._seconds if self._seconds > 0 else 0.0
+
+
+class TranspositionTable:
+    """
+    Represents a fixed size table of search results indexed by position hash. Each slot holds one entry of
+    (hash, depth, score, bound, best move, generation). A new entry replaces the one in its slot if the slot is empty or
+    holds the same position, if the old entry is from an earlier search, or if the new entry was searched at least as
+    deep, so deep results from the current search are kept while stale ones are recycled.
+    """
+    def __init__(self, size=1 << 16):
+        self._size = size
+        self._slots = [None] * size
+        self._generation = 0
+
+    def get_size(self):
+        """
+        Returns the number of slots in the table.
+        """
+        return self._size
+
+    def new_search(self):
+        """
+        Marks the start of a new search so that entries from earlier searches are replaced first.
+        """
+        self._generation += 1
+
+    def clear(self):
+        """
+        Empties every slot of the table.
+        """
+        self._slots = [None] * self._size
+
+    def probe(self, position_hash):
+        """
+        Returns the (hash, depth, score, bound, best move, generation) entry stored for the position hash, or None.
+        """
+        entry = self._slots[position_hash % self._size]
+        if entry is not None and entry[0] == position_hash:
+            return entry
+        return None
+
+    def store(self, position_hash, depth, score, bound, best_move):
+        """
+        Stores a search result for the position hash, following the table's replacement policy.
+        """
+        index = position_hash % self._size
+        entry = self._slots[index]
+        if entry is None or entry[0] == position_hash or entry[5] != self._generation or depth >= entry[1]:
+            if best_move is None and entry is not None and entry[0] == position_hash:
+                best_move = entry[4]  # keep the best move of an earlier search of the same position
+            self._slots[index] = (position_hash, depth, score, bound, best_move, self._generation)
+
+
+class ChessEngine:
+    """
+    Represents a computer player that chooses moves for a ChessVar game. Communicates with ChessVar to generate, make
+    and undo moves and to read the position hash, and with TranspositionTable, or a SharedTranspositionTable passed in
+    as transposition_table, to reuse earlier search results.
+    """
+    def __init__(self, table_size=1 << 16, transposition_table=None, quiescence=True):
+        if transposition_table is None:
+            transposition_table = TranspositionTable(table_size)
+        self._transposition_table = transposition_table
+        self._quiescence = quiescence  # search captures at the depth limit rather than scoring straight away
+        self._nodes = 0
+        self._deadline = None  # perf_counter time at which the running search must stop, if any
+        self._cancellation_token = None
+
+    def get_transposition_table(self):
+        """
+        Returns the engine's transposition table.
+        """
+        return self._transposition_table
+
+    def get_nodes(self):
+        """
+        Returns the number of positions visited by the last search.
+        """
+        return self._nodes
+
+    def best_move(self, game, depth=None, time_ms=None, cancellation_token=None):
+        """
+        Returns the best move for the player whose turn it is in game, in the form generated by ChessVar.legal_moves,
+        or None if there is no legal move. See iterative_deepening for the arguments.
+        """
+        return self.iterative_deepening(game, depth, time_ms, cancellation_token).get_move()
+
+    def iterative_deepening(self, game, max_depth=None, time_ms=None, cancellation_token=None):
+        """
+        Searches the game's position at depth 1, 2, 3, ... until max_depth is completed, time_ms milliseconds have
+        passed or the cancellation_token is cancelled, and returns a SearchResult with the best move of the last
+        completed depth. With no limit at all the search goes to DEFAULT_DEPTH, and with only a cancellation_token it
+        runs until cancelled. The time limit is hard: a depth still running when the time is up is abandoned. The game
+        is returned to its starting position.
+        """
+        if max_depth is None and time_ms is None and cancellation_token is None:
+            max_depth = DEFAULT_DEPTH
+        start = time.perf_counter()
+        self._deadline = start + time_ms / 1000 if time_ms is not None else None
+        self._cancellation_token = cancellation_token
+        self._nodes = 0
+        self._transposition_table.new_search()
+
+        moves = game.get_legal_moves()
+        best_move = moves[0] if moves else None
+        score = 0
+        completed_depth = 0
+        try:
+            while moves and completed_depth < min(max_depth or MAX_DEPTH, MAX_DEPTH):
+                try:
+                    self._check_stop()
+                    score = self._negamax(game, completed_depth + 1, -KING_CAPTURE_SCORE - 1, KING_CAPTURE_SCORE + 1, 0)
+                except SearchStopped:
+                    break
+                completed_depth += 1
+                best_move = self._root_move(game, best_move)
+                if abs(score) >= WIN_THRESHOLD:
+                    break  # a forced king capture was found, searching deeper cannot change the result
+        finally:
+            self._deadline = None
+            self._cancellation_token = None
+        return SearchResult(best_move, score, completed_depth, self._nodes, time.perf_counter() - start)
+
+    def search(self, game, depth):
+        """
+        Searches the game's position to the given depth and returns a tuple of the best move and its score for the
+        player whose turn it is.
+        """
+        self._nodes = 0
+        self._transposition_table.new_search()
+        score = self._negamax(game, depth, -KING_CAPTURE_SCORE - 1, KING_CAPTURE_SCORE + 1, 0)
+        moves = game.get_legal_moves()
+        return self._root_move(game, moves[0] if moves else None), score
+
+    def search_move(self, game, move, depth, alpha=-KING_CAPTURE_SCORE - 1, beta=KING_CAPTURE_SCORE + 1, time_ms=None):
+        """
+        Plays move in the game and searches the resulting position to depth - 1 within the (alpha, beta) window,
+        returning the move's score for the player who made it, or None if time_ms milliseconds passed first. A score at
+        or below alpha is only an upper bound. Used to share out the root moves of a search between processes.
+        """
+        self._nodes = 0
+        self._deadline = time.perf_counter() + time_ms / 1000 if time_ms is not None else None
+        game.play_move(move)
+        try:
+            return -self._negamax(game, depth - 1, -beta, -alpha, 1)
+        except SearchStopped:
+            return None
+        finally:
+            game.undo_move()
+            self._deadline = None
+
+    def _root_move(self, game, default_move):
+        """
+        Returns the best move stored in the transposition table for the game's position, or default_move if there is
+        none.
+        """
+        entry = self._transposition_table.probe(game.get_hash())
+        if entry is not None and entry[4] is not None:
+            return entry[4]
+        return default_move
+
+    def _check_stop(self):
+        """
+        Raises SearchStopped if the running search has passed its deadline or been cancelled.
+        """
+        if self._deadline is not None and time.perf_counter() >= self._deadline:
+            raise SearchStopped()
+        if self._cancellation_token is not None and self._cancellation_token.is_cancelled():
+            raise SearchStopped()
+
+    def _negamax(self, game, depth, alpha, beta, ply):
+        """
+        Returns the score of the game's position for the player to move, searched to the given depth within the
+        (alpha, beta) window, where ply is the distance from the root of the search.
+        """
+        if depth == 0 and self._quiescence:
+            return self._quiesce(game, alpha, beta, ply)
+        self._nodes += 1
+        if self._nodes % POLL_NODES == 0:
+            self._check_stop()
+        if game.get_game_state() != 'UNFINISHED':
+            return -(KING_CAPTURE_SCORE - ply)  # the previous move captured the player to move's king
+
+        position_hash = game.get_hash()
+        entry = self._transposition_table.probe(position_hash)
+        table_move = None
+        if entry is not None:
+            table_move = entry[4]
+            if entry[1] >= depth and ply > 0:
+                score = self._score_from_table(entry[2], ply)
+                if entry[3] == EXACT:
+                    return score
+                if entry[3] == LOWER_BOUND and score >= beta:
+                    return score
+                if entry[3] == UPPER_BOUND and score <= alpha:
+                    return score
+
+        moves = game.get_legal_moves()
+        chessboard = game.get_chessboard()
+        for move in moves:
+            target = chessboard.get_piece(move[1])
+            if target and target.get_piece_type() == 'king':
+                score = KING_CAPTURE_SCORE - ply - 1
+                self._transposition_table.store(position_hash, max(depth, 1), self._score_to_table(score, ply),
+                                                EXACT, move)
+                return score
+        if depth == 0:
+            return self.evaluate(game)
+        if not moves:
+            return 0
+
+        original_alpha = alpha
+        best_score = -KING_CAPTURE_SCORE - 1
+        best_move = None
+        for move in self._order_moves(game, moves, table_move):
+            game.play_move(move)
+            try:
+                score = -self._negamax(game, depth - 1, -beta, -alpha, ply + 1)
+            finally:
+                game.undo_move()  # also taken back when the search is stopped
+            if score > best_score:
+                best_score = score
+                best_move = move
+            if score > alpha:
+                alpha = score
+            if alpha >= beta:
+                break
+
+        if best_score <= original_alpha:
+            bound = UPPER_BOUND
+        elif best_score >= beta:
+            bound = LOWER_BOUND
+        else:
+            bound = EXACT
+        self._transposition_table.store(position_hash, depth, self._score_to_table(best_score, ply), bound, best_move)
+        return best_score
+
+    def _quiesce(self, game, alpha, beta, ply, evasions=QUIESCENCE_EVASIONS):
+        """
+        Returns the score of the game's position for the player to move within the (alpha, beta) window, searching
+        only captures until the position is quiet. The player may stand pat on the static evaluation instead of
+        capturing, unless the opponent could take their king, in which case every move is searched and the position is
+        lost if none saves the king. Evasions are searched at most evasions times in a line, after which a king still
+        attacked is lost. Captures that lose material by static exchange evaluation, and captures that could not raise
+        alpha even winning DELTA_MARGIN more than the exchange, are hopeless and not searched.
+        """
+        self._nodes += 1
+        if self._nodes % POLL_NODES == 0:
+            self._check_stop()
+        if game.get_game_state() != 'UNFINISHED':
+            return -(KING_CAPTURE_SCORE - ply)
+
+        chessboard = game.get_chessboard()
+        captures = game.capture_packed_moves()
+        for move in captures:
+            if chessboard.get_piece_at(move & 63).get_piece_type() == 'king':
+                return KING_CAPTURE_SCORE - ply - 1
+        if self._king_attacked(chessboard, game.get_turn()):
+            best_score = -(KING_CAPTURE_SCORE - ply - 2)  # the king is taken next move whatever is played
+            if not evasions:
+                return best_score
+            for move in game.legal_packed_moves():
+                game.play_packed_move(move)
+                try:
+                    score = -self._quiesce(game, -beta, -alpha, ply + 1, evasions - 1)
+                finally:
+                    game.undo_move()
+                if score > best_score:
+                    best_score = score
+                if score > alpha:
+                    alpha = score
+                if alpha >= beta:
+                    break
+            return best_score
+
+        best_score = self.evaluate(game)
+        if best_score >= beta:
+            return best_score
+        alpha = max(alpha, best_score)
+
+        scored_captures = []
+        for move in captures:
+            gain = self._static_exchange(chessboard, move >> 6, move & 63)
+            if gain >= 0 and best_score + gain + DELTA_MARGIN > alpha:
+                scored_captures.append((gain, move))
+        scored_captures.sort(reverse=True)
+        for gain, move in scored_captures:
+            game.play_packed_move(move)
+            try:
+                score = -self._quiesce(game, -beta, -alpha, ply + 1, evasions)
+            finally:
+                game.undo_move()
+            if score > best_score:
+                best_score = score
+            if score > alpha:
+                alpha = score
+            if alpha >= beta:
+                break
+        return best_score
+
+    @staticmethod
+    def _king_attacked(chessboard, color):
+        """
+        Returns True if a piece of the other color could capture the king of the given color on the chessboard.
+        """
+        for king_index in range(64):
+            king = chessboard.get_piece_at(king_index)
+            if king and king.get_piece_type() == 'king' and king.get_color() == color:
+                break
+        else:
+            return False
+        for index in EXCHANGE_SQUARES[king_index]:
+            piece = chessboard.get_piece_at(index)
+            if (piece and piece.get_color() != color and piece.get_attack_mask(index) >> king_index & 1 and
+                    chessboard.is_path_clear(index, king_index)):
+                return True
+        return False
+
+    def static_exchange(self, game, move):
+        """
+        Returns the material, in centipawns, that the player to move wins (or loses, if negative) on the new square of
+        a board move in the form generated by ChessVar.legal_moves, when both players keep capturing there with their
+        least valuable piece for as long as it pays.
+        """
+        return self._static_exchange(game.get_chessboard(), SQUARE_INDICES[move[0]], SQUARE_INDICES[move[1]])
+
+    @staticmethod
+    def _static_exchange(chessboard, current_index, new_index):
+        """
+        Does the work of static_exchange for square indices. Every piece able to capture on the new square on an empty
+        board is an attacker once the squares between are empty, so pieces lined up behind one another join the
+        exchange in turn.
+        """
+        attackers = []  # (value, square index, color) of each piece whose attack table reaches the new square
+        occupied = 0
+        for index in EXCHANGE_SQUARES[new_index]:
+            piece = chessboard.get_piece_at(index)
+            if piece:
+                occupied |= SQUARE_BITS[index]
+                if piece.get_attack_mask(index) >> new_index & 1:
+                    attackers.append((EXCHANGE_VALUES[piece.get_piece_type()], index, piece.get_color()))
+        attackers.sort()
+
+        target = chessboard.get_piece_at(new_index)
+        piece = chessboard.get_piece_at(current_index)
+        gains = [EXCHANGE_VALUES[target.get_piece_type()] if target else 0]
+        value = EXCHANGE_VALUES[piece.get_piece_type()]  # of the piece standing on the new square
+        color = 'black' if piece.get_color() == 'white' else 'white'
+        occupied &= ~SQUARE_BITS[current_index]
+        while True:
+            for attacker_value, index, attacker_color in attackers:
+                if (attacker_color == color and occupied & SQUARE_BITS[index] and
+                        not BETWEEN_MASKS[index][new_index] & occupied):
+                    break
+            else:
+                break
+            gains.append(value - gains[-1])
+            value = attacker_value
+            occupied &= ~SQUARE_BITS[index]
+            color = 'black' if color == 'white' else 'white'
+        while len(gains) > 1:
+            last_gain = gains.pop()
+            gains[-1] = -max(-gains[-1], last_gain)  # a player stops capturing when going on would lose more
+        return gains[0]
+
+    def _order_moves(self, game, moves, table_move):
+        """
+        Returns the moves sorted to search the transposition table move first, then captures of the most valuable
+        pieces by the least valuable pieces, then fairy piece entries and quiet moves.
+        """
+        chessboard = game.get_chessboard()
+
+        def move_order(move):
+            if move == table_move:
+                return -1000000
+            if move[0] in ('F', 'H', 'f', 'h'):
+                return 0
+            target = chessboard.get_piece(move[1])
+            if not target:
+                return 1
+            attacker = chessboard.get_piece(move[0])
+            return PIECE_VALUES[attacker.get_piece_type()] // 10 - PIECE_VALUES[target.get_piece_type()] * 10
+
+        return sorted(moves, key=move_order)
+
+    @staticmethod
+    def _score_to_table(score, ply):
+        """
+        Converts a king capture score from distance to the root into distance to the stored position.
+        """
+        if score >= WIN_THRESHOLD:
+            return score + ply
+        if score <= -WIN_THRESHOLD:
+            return score - ply
+        return score
+
+    @staticmethod
+    def _score_from_table(score, ply):
+        """
+        Converts a stored king capture score from distance to the stored position into distance to the root.
+        """
+        if score >= WIN_THRESHOLD:
+            return score - ply
+        if score <= -WIN_THRESHOLD:
+            return score + ply
+        return score
+
+    def evaluate(self, game):
+        """
+        Returns the static evaluation of the game's position for the player to move: the material and square bonuses
+        of the pieces and the value of the fairy pieces off the board, read from ChessVar.get_evaluation without
+        looking at the squares.
+        """
+        return game.get_evaluation()
+
+
+def evaluation_benchmark(seconds=1.0, backend='dict'):
+    """
+    Evaluates the perft positions over and over for the given number of seconds, once with the incrementally updated
+    evaluation and once computing it from scratch, and returns a tuple of the evaluations per second of each.
+    """
+    games = [position.create_game(backend) for position in PERFT_SUITE]
+    engine = ChessEngine(table_size=1)
+    rates = []
+    for evaluate in (engine.evaluate, lambda game: game.compute_evaluation()):
+        evaluations = 0
+        start = time.perf_counter()
+        while time.perf_counter() - start < seconds / 2:
+            for game in games:
+                evaluate(game)
+            evaluations += len(games)
+        rates.append(evaluations / (time.perf_counter() - start))
+    return tuple(rates)
+
+
+def main(argv=None):
+    """
+    Runs the evaluation benchmark from the command line.
+    """
+    parser = argparse.ArgumentParser(description='Benchmark the static evaluation of Falcon-Hunter Chess positions.')
+    parser.add_argument('--seconds', type=float, default=2.0, help='duration of the benchmark')
+    parser.add_argument('--backend', choices=['dict', 'bitboard'], default='dict', help='chessboard backend')
+    args = parser.parse_args(argv)
+
+    incremental, from_scratch = evaluation_benchmark(args.seconds, args.backend)
+    print(f'incremental {incremental:.0f} evaluations/s  from scratch {from_scratch:.0f} evaluations/s')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
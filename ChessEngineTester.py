@@ -0,0 +1,150 @@
+from ChessEngine import *
+from ChessVar import ChessVar
+import threading
+import time
+import unittest
+
+
+class TestChessEngine(unittest.TestCase):
+    def play(self, moves):
+        """Returns a new game with the given moves played."""
+        game = ChessVar()
+        for move in moves:
+            self.assertTrue(game.play_move(move))
+        return game
+
+    def test_takes_king(self):
+        """Tests the engine captures the king when it can, scoring it as a win."""
+        game = self.play([('e2', 'e4'), ('f7', 'f6'), ('d1', 'h5'), ('a7', 'a6')])
+        engine = ChessEngine()
+        move, score = engine.search(game, 3)
+        self.assertEqual(move, ('h5', 'e8'))
+        self.assertEqual(score, KING_CAPTURE_SCORE - 1)
+        self.assertEqual(game.best_move(depth=2), ('h5', 'e8'))
+
+    def test_forced_king_capture(self):
+        """Tests the engine finds a king capture that black cannot prevent, like a mate in one."""
+        # after 1. e4 f6 2. d4 g5 white's Qh5 attacks the king and black has no way to block or escape
+        game = self.play([('e2', 'e4'), ('f7', 'f6'), ('d2', 'd4'), ('g7', 'g5')])
+        move, score = ChessEngine().search(game, 3)
+        self.assertEqual(move, ('d1', 'h5'))
+        self.assertEqual(score, KING_CAPTURE_SCORE - 3)
+
+    def test_avoids_king_capture(self):
+        """Tests the engine moves out of an attack on its king rather than losing it."""
+        game = self.play([('e2', 'e4'), ('f7', 'f6'), ('d1', 'h5')])
+        move = ChessEngine().best_move(game, depth=2)
+        game.play_move(move)
+        self.assertNotIn(('h5', 'e8'), game.get_legal_moves())
+
+    def test_game_unchanged(self):
+        """Tests searching returns the game to its starting position and the move is legal."""
+        game = self.play([('e2', 'e3'), ('b8', 'a6'), ('f1', 'a6'), ('b7', 'a6')])
+        board = game.get_chessboard().show_chessboard()
+        position_hash = game.get_hash()
+        move = game.best_move(time_ms=200)
+        self.assertIn(move, game.get_legal_moves())
+        self.assertEqual(game.get_chessboard().show_chessboard(), board)
+        self.assertEqual(game.get_hash(), position_hash)
+        self.assertEqual(game.get_turn(), 'white')
+
+    def test_no_moves_when_won(self):
+        """Tests there is no best move once the game is won."""
+        game = self.play([('e2', 'e4'), ('f7', 'f6'), ('d1', 'h5'), ('a7', 'a6'), ('h5', 'e8')])
+        self.assertIsNone(game.best_move(depth=2))
+
+    def test_evaluation(self):
+        """Tests the evaluation is the game's incremental one, symmetric at the start, and favours the player ahead
+        in material, and that the benchmark reports both ways of evaluating."""
+        engine = ChessEngine()
+        self.assertEqual(engine.evaluate(ChessVar()), 0)
+        game = self.play([('e2', 'e3'), ('b8', 'a6'), ('f1', 'a6')])  # white took a knight
+        self.assertEqual(engine.evaluate(game), game.compute_evaluation())
+        self.assertLess(engine.evaluate(game), -PIECE_VALUES['knight'] // 2)  # black to move is behind
+        incremental, from_scratch = evaluation_benchmark(seconds=0.1)
+        self.assertGreater(incremental, 0)
+        self.assertGreater(from_scratch, 0)
+
+    def test_static_exchange(self):
+        """Tests static exchange evaluation follows the exchanges on a square, with pieces lined up behind one another
+        and Falcons and Hunters recapturing only in the directions they capture in."""
+        engine = ChessEngine()
+        exchanges = [
+            ('4k3/8/4h3/3n4/8/1B6/8/4K3 w FHf - 0', ('b3', 'd5'), 300),  # a black hunter captures down files only
+            ('4k3/8/4f3/3n4/8/1B6/8/4K3 w FHh - 0', ('b3', 'd5'), -20),  # a black falcon captures down diagonals
+            ('4k3/3r4/8/3p4/8/8/3R4/3RK3 w FHfh - 0', ('d2', 'd5'), 100),
+            ('4k3/3r4/3r4/3p4/8/8/3R4/3RK3 w FHfh - 0', ('d2', 'd5'), -400),
+            ('4k3/8/2p5/3p4/8/8/8/3QK3 w FHfh - 0', ('d1', 'd5'), -800),
+            ('4k3/8/8/3p4/4P3/8/8/4K3 w FHfh - 0', ('e4', 'e5'), 0),  # a quiet move to a safe square
+        ]
+        for fen, move, gain in exchanges:
+            self.assertEqual(engine.static_exchange(ChessVar.from_fen(fen), move), gain)
+
+    def test_quiescence(self):
+        """Tests the quiescence search sees the recapture that makes taking a defended rook a losing move, at a depth
+        where the plain search does not."""
+        game = ChessVar.from_fen('6k1/8/2p5/3r4/n7/8/8/3Q2K1 w FHfh - 0')
+        self.assertEqual(ChessEngine(quiescence=False).search(game, 1)[0], ('d1', 'd5'))
+        self.assertEqual(ChessEngine().search(game, 1)[0], ('d1', 'a4'))
+        self.assertEqual(game.to_fen(), '6k1/8/2p5/3r4/n7/8/8/3Q2K1 w FHfh - 0')
+
+
+class TestIterativeDeepening(unittest.TestCase):
+    def test_depth_limit(self):
+        """Tests a depth limited search reports the completed depth, nodes and speed."""
+        result = ChessEngine().iterative_deepening(ChessVar(), max_depth=3)
+        self.assertEqual(result.get_depth(), 3)
+        self.assertIn(result.get_move(), ChessVar().get_legal_moves())
+        self.assertGreater(result.get_nodes(), 20)
+        self.assertGreater(result.get_nodes_per_second(), 0)
+
+    def test_hard_deadline(self):
+        """Tests a timed search stops close to its deadline with a completed depth and leaves the game unchanged."""
+        game = ChessVar()
+        start = time.perf_counter()
+        result = game.analyze(time_ms=300)
+        self.assertLess(time.perf_counter() - start, 0.6)
+        self.assertGreaterEqual(result.get_depth(), 1)
+        self.assertIn(result.get_move(), game.get_legal_moves())
+        self.assertEqual(game.get_hash(), ChessVar().get_hash())
+        self.assertEqual(game.get_turn(), 'white')
+
+    def test_tiny_deadline(self):
+        """Tests a search out of time before finishing depth 1 still answers with a legal move."""
+        result = ChessEngine().iterative_deepening(ChessVar(), time_ms=0)
+        self.assertEqual(result.get_depth(), 0)
+        self.assertIn(result.get_move(), ChessVar().get_legal_moves())
+
+    def test_cancel_from_other_thread(self):
+        """Tests an unlimited search stops when another thread cancels its token."""
+        game = ChessVar()
+        token = CancellationToken()
+        timer = threading.Timer(0.3, token.cancel)
+        timer.start()
+        start = time.perf_counter()
+        result = ChessEngine().iterative_deepening(game, cancellation_token=token)
+        timer.join()
+        self.assertTrue(token.is_cancelled())
+        self.assertLess(time.perf_counter() - start, 1.0)
+        self.assertIn(result.get_move(), game.get_legal_moves())
+        self.assertEqual(game.get_hash(), ChessVar().get_hash())
+
+
+class TestTranspositionTable(unittest.TestCase):
+    def test_replacement_policy(self):
+        """Tests deeper entries are kept within a search, and replaced by entries from a later search."""
+        table = TranspositionTable(size=4)
+        table.store(1, 5, 10, EXACT, ('e2', 'e4'))
+        table.store(5, 2, 20, EXACT, ('d2', 'd4'))  # same slot, shallower, same search
+        self.assertIsNotNone(table.probe(1))
+        self.assertIsNone(table.probe(5))
+        table.store(5, 6, 30, LOWER_BOUND, ('d2', 'd4'))  # same slot, deeper
+        self.assertIsNone(table.probe(1))
+        self.assertEqual(table.probe(5)[2:5], (30, LOWER_BOUND, ('d2', 'd4')))
+        table.new_search()
+        table.store(1, 1, 40, UPPER_BOUND, None)  # stale entries are replaced
+        self.assertEqual(table.probe(1)[1:5], (1, 40, UPPER_BOUND, None))
+
+
+if __name__ == '__main__':
+    unittest.main()
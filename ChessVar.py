@@ -9,6 +9,113 @@
 #           uses the players turn. The second 'fairy' piece may be entered any time after the player loses their second
 #           queen, rook, bishop, or knight.
 
+import random
+import types
+
+# square names in index order, a1 = 0, b1 = 1, ... h8 = 63, and the reverse mapping
+SQUARE_NAMES = [f'{chr(column + 97)}{row + 1}' for row in range(8) for column in range(8)]
+SQUARE_INDICES = {name: index for index, name in enumerate(SQUARE_NAMES)}
+
+# piece names in piece code order, used to index the bitboards of BitboardChessboard
+PIECE_NAMES = 'PNBRQKFHpnbrqkfh'
+PIECE_CODES = {name: code for code, name in enumerate(PIECE_NAMES)}
+EMPTY_CODE = len(PIECE_NAMES)  # stands for an empty square in the square codes of a GameSnapshot
+
+# Zobrist keys for the position hash, from a fixed seed so that hashes are the same in every process: one key per piece
+# code and square, one for black to move, one per fairy piece waiting off the board, and one per color for each count of
+# lost queens, rooks, bishops and knights (0, 1, 2 or more), which decides whether a fairy piece may enter
+_zobrist_random = random.Random(20240311)
+ZOBRIST_PIECES = [[_zobrist_random.getrandbits(64) for __ in range(64)] for __ in PIECE_NAMES]
+ZOBRIST_BLACK_TO_MOVE = _zobrist_random.getrandbits(64)
+ZOBRIST_OFF_BOARD = [_zobrist_random.getrandbits(64) for __ in PIECE_NAMES]
+ZOBRIST_LOST_PIECES = {color: [_zobrist_random.getrandbits(64) for __ in range(3)] for color in ('white', 'black')}
+
+# for each pair of square indices on the same row, column or diagonal, the indices of the squares strictly between
+# them (empty for other pairs), the same squares as names, and as a bitmask for BitboardChessboard
+
+
+def _squares_between(current_index, new_index):
+    """
+    Returns a tuple of the indices of the squares strictly between two square indices that share a row, column or
+    diagonal, or an empty tuple if they do not.
+    """
+    column_difference = new_index % 8 - current_index % 8
+    row_difference = new_index // 8 - current_index // 8
+    if not (column_difference == 0 or row_difference == 0 or abs(column_difference) == abs(row_difference)):
+        return ()
+    distance = max(abs(column_difference), abs(row_difference))
+    if distance < 2:
+        return ()
+    step = (column_difference // distance) + (row_difference // distance) * 8
+    return tuple(current_index + step * count for count in range(1, distance))
+
+
+BETWEEN_SQUARES = [[_squares_between(current, new) for new in range(64)] for current in range(64)]
+BETWEEN_NAMES = [[tuple(SQUARE_NAMES[index] for index in squares) for squares in row] for row in BETWEEN_SQUARES]
+BETWEEN_MASKS = [[sum(1 << index for index in squares) for squares in row] for row in BETWEEN_SQUARES]
+SQUARE_BITS = [1 << index for index in range(64)]  # the bit of each square index in a bitboard
+
+
+def _ray(index, column_step, row_step):
+    """
+    Returns a tuple of the square indices reached from a square index by repeating a (column step, row step) until
+    the edge of the board.
+    """
+    squares = []
+    column = index % 8 + column_step
+    row = index // 8 + row_step
+    while 0 <= column < 8 and 0 <= row < 8:
+        squares.append(row * 8 + column)
+        column += column_step
+        row += row_step
+    return tuple(squares)
+
+
+# for every (column step, row step) a piece can move in, the ray of square indices it passes from each square index
+RAYS = {step: [_ray(index, *step) for index in range(64)]
+        for step in [(1, 0), (-1, 0), (0, 1), (0, -1), (1, 1), (1, -1), (-1, -1), (-1, 1), (0, 2), (0, -2),
+                     (1, 2), (2, 1), (2, -1), (1, -2), (-1, -2), (-2, -1), (-2, 1), (-1, 2)]}
+
+# for every step, the bitmask of the ray it passes from each square index
+RAY_MASKS = {step: [sum(SQUARE_BITS[index] for index in ray) for ray in rays] for step, rays in RAYS.items()}
+
+# fairy piece names in the order used by packed moves
+FAIRY_NAMES = 'FHfh'
+
+# the piece codes of each color's king, of the pieces whose loss lets a fairy piece enter, and of the fairy pieces
+KING_CODES = {'white': PIECE_CODES['K'], 'black': PIECE_CODES['k']}
+LOST_PIECE_CODES = {'white': [PIECE_CODES[name] for name in 'QRBN'], 'black': [PIECE_CODES[name] for name in 'qrbn']}
+FAIRY_CODES = {'white': [PIECE_CODES['F'], PIECE_CODES['H']], 'black': [PIECE_CODES['f'], PIECE_CODES['h']]}
+
+# the position at the start of the game in the format of ChessVar.to_fen
+START_FEN = 'rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w FHfh - 0'
+
+
+def pack_move(move):
+    """
+    Packs a move in the form generated by ChessVar.legal_moves into a 16-bit integer. Bits 0-5 hold the new square
+    index and bits 6-11 the current square index of a board move. Bits 12-14 are 0 for a board move, or 1 to 4 for
+    entering 'F', 'H', 'f' or 'h', in which case bits 6-11 are 0. No move packs to 0.
+    """
+    if move is None:
+        return 0
+    if move[0] in FAIRY_NAMES:
+        return (FAIRY_NAMES.index(move[0]) + 1) << 12 | SQUARE_INDICES[move[1]]
+    return SQUARE_INDICES[move[0]] << 6 | SQUARE_INDICES[move[1]]
+
+
+def unpack_move(packed_move):
+    """
+    Unpacks a 16-bit integer made by pack_move back into a move tuple, or None for 0.
+    """
+    if not packed_move:
+        return None
+    kind = packed_move >> 12
+    if kind:
+        return FAIRY_NAMES[kind - 1], SQUARE_NAMES[packed_move & 63]
+    return SQUARE_NAMES[packed_move >> 6 & 63], SQUARE_NAMES[packed_move & 63]
+
+
 class ChessVar:
     """
     Represents a game of Falcon-Hunter Chess with a turn counter, managing the game's operation and movement of pieces.
@@ -16,10 +123,224 @@ class ChessVar:
     with Chessboard to provide board information and receive updates to the board. Communicates with BoardSquare to
     check any proposed move is to a position on the board.
     """
-    def __init__(self, turn=0, game_state='UNFINISHED'):
+    _start_counts = None  # (taken counts, off board counts, hash, board score) at the start of the game, white to move
+
+    def __init__(self, turn=0, game_state='UNFINISHED', backend='dict'):
         self._turn = turn
         self._game_state = game_state
-        self._chessboard = Chessboard()
+        self._undo_stack = []  # (move, taken piece, and game state, hash and board score before it) for each move
+        if backend == 'dict':
+            self._chessboard = Chessboard()
+        elif backend == 'bitboard':
+            self._chessboard = BitboardChessboard()
+        else:
+            raise ValueError(f"unknown chessboard backend '{backend}', expected 'dict' or 'bitboard'")
+        self._reset_counts()
+        if turn % 2:
+            self._hash ^= ZOBRIST_BLACK_TO_MOVE
+        self._engine = None  # created by best_move when first needed
+
+    def __getstate__(self):
+        """
+        Returns the attributes to pickle or copy, leaving out the engine and its transposition table so that games can
+        be sent cheaply to other processes.
+        """
+        state = self.__dict__.copy()
+        state['_engine'] = None
+        return state
+
+    def __copy__(self):
+        """
+        Returns copy(), so that copy.copy gives a game with its own chessboard rather than one shared with this game.
+        """
+        return self.copy()
+
+    def __deepcopy__(self, memo):
+        """
+        Returns copy(), since the pieces and squares a game refers to are immutable and need not be copied.
+        """
+        return self.copy()
+
+    def copy(self):
+        """
+        Returns an independent copy of the game, with the same position, turn, game state and moves to undo but no
+        engine. Only the chessboard's lists and the counters are copied; the pieces and squares are shared, as is each
+        undo record, which is an immutable tuple.
+        """
+        game = object.__new__(type(self))
+        game._turn = self._turn
+        game._game_state = self._game_state
+        game._undo_stack = self._undo_stack[:]
+        game._chessboard = self._chessboard.copy()
+        game._taken_counts = self._taken_counts[:]
+        game._off_board_counts = self._off_board_counts[:]
+        game._lost_piece_counts = self._lost_piece_counts.copy()
+        game._hash = self._hash
+        game._board_score = self._board_score
+        game._engine = None
+        return game
+
+    def snapshot(self):
+        """
+        Returns an immutable GameSnapshot of the position, turn, game state and hash, without the moves to undo.
+        """
+        chessboard = self._chessboard
+        off_board = bytes([PIECE_CODES[piece.get_name()] for color in ('white', 'black')
+                           for piece in chessboard.get_off_board(color)])
+        taken = bytes([PIECE_CODES[piece.get_name()] for color in ('white', 'black')
+                       for piece in chessboard.get_taken(color)])
+        return GameSnapshot(chessboard.get_square_codes(), off_board, taken, self._turn, self._game_state, self._hash)
+
+    def restore(self, snapshot):
+        """
+        Puts the game in the position of a GameSnapshot, keeping its chessboard backend and engine. The game has no
+        moves to undo afterwards.
+        """
+        self._chessboard.set_square_codes(snapshot.get_square_codes(), snapshot.get_off_board_codes(),
+                                          snapshot.get_taken_codes())
+        self._turn = snapshot.get_turn_count()
+        self._game_state = snapshot.get_game_state()
+        self._undo_stack.clear()
+        self._taken_counts = [0] * len(PIECE_CODES)
+        for code in snapshot.get_taken_codes():
+            self._taken_counts[code] += 1
+        self._off_board_counts = [0] * len(PIECE_CODES)
+        for code in snapshot.get_off_board_codes():
+            self._off_board_counts[code] += 1
+        self._lost_piece_counts = {color: sum(self._taken_counts[code] for code in LOST_PIECE_CODES[color])
+                                   for color in ('white', 'black')}
+        self._hash = snapshot.get_hash()
+        self._board_score = self.compute_board_score()
+
+    @classmethod
+    def from_snapshot(cls, snapshot, backend='dict'):
+        """
+        Returns a new game in the position of a GameSnapshot, on the given chessboard backend.
+        """
+        game = cls(backend=backend)
+        game.restore(snapshot)
+        return game
+
+    def reset(self):
+        """
+        Puts the game back to the start, with no moves to undo, keeping its chessboard backend and engine so that one
+        ChessVar can be reused for many games. The chessboard, counters and hash are copied from templates of the start
+        of the game rather than worked out again.
+        """
+        self._chessboard.setup_new_game()
+        self._turn = 0
+        self._game_state = 'UNFINISHED'
+        self._undo_stack.clear()
+        self._reset_counts()
+
+    def _reset_counts(self):
+        """
+        Sets the piece counters, hash and board score to those of the start of the game with white to move, counting,
+        hashing and scoring the chessboard the first time and copying the result afterwards.
+        """
+        start_counts = ChessVar._start_counts
+        if start_counts is None:
+            turn = self._turn
+            self._turn = 0
+            self.count_pieces()
+            self._hash = self.compute_hash()
+            self._turn = turn
+            start_counts = (self._taken_counts[:], self._off_board_counts[:], self._hash, self.compute_board_score())
+            ChessVar._start_counts = start_counts
+        self._taken_counts = start_counts[0][:]
+        self._off_board_counts = start_counts[1][:]
+        self._lost_piece_counts = {'white': 0, 'black': 0}
+        self._hash = start_counts[2]
+        self._board_score = start_counts[3]
+
+    @classmethod
+    def from_fen(cls, fen, backend='dict'):
+        """
+        Returns a new game in the position given by a string in the format of to_fen, on the given chessboard backend.
+        The game has no moves to undo. Raises ValueError if the string is not a valid position.
+        """
+        fields = fen.split()
+        if len(fields) not in (4, 5):
+            raise ValueError(f"expected 4 or 5 fields in position '{fen}'")
+        placement, side, off_board, taken = fields[:4]
+        if side not in ('w', 'b'):
+            raise ValueError(f"side to move must be 'w' or 'b', not '{side}'")
+
+        ranks = placement.split('/')
+        if len(ranks) != 8:
+            raise ValueError(f"expected 8 ranks in placement '{placement}'")
+        pieces = [None] * 64
+        for row, rank in zip(range(7, -1, -1), ranks):
+            column = 0
+            for name in rank:
+                if name.isdigit():
+                    column += int(name)
+                elif name in PIECE_CODES and column < 8:
+                    pieces[row * 8 + column] = PIECES[PIECE_CODES[name]]
+                    column += 1
+                else:
+                    raise ValueError(f"unexpected '{name}' in rank '{rank}'")
+            if column != 8:
+                raise ValueError(f"rank '{rank}' does not have 8 squares")
+
+        off_board_pieces = {'white': [], 'black': []}
+        if off_board != '-':
+            for name in off_board:
+                if name not in FAIRY_NAMES or off_board.count(name) > 1:
+                    raise ValueError(f"unexpected '{name}' in off board pieces '{off_board}'")
+                off_board_pieces['white' if name.isupper() else 'black'].append(PIECES[PIECE_CODES[name]])
+        taken_pieces = {'white': [], 'black': []}
+        if taken != '-':
+            for name in taken:
+                if name not in PIECE_CODES:
+                    raise ValueError(f"unexpected '{name}' in taken pieces '{taken}'")
+                taken_pieces['white' if name.isupper() else 'black'].append(PIECES[PIECE_CODES[name]])
+
+        turn = 0 if side == 'w' else 1
+        if len(fields) == 5:
+            if not fields[4].isdigit() or int(fields[4]) % 2 != turn:
+                raise ValueError(f"turn '{fields[4]}' does not agree with side to move '{side}'")
+            turn = int(fields[4])
+
+        game = cls(turn=turn, backend=backend)
+        game.get_chessboard().set_position(pieces, off_board_pieces, taken_pieces)
+        game.rehash()
+        game.set_game_state()
+        return game
+
+    def to_fen(self):
+        """
+        Returns the position as a single line string of five space separated fields: the pieces on each rank from the
+        eighth to the first, with uppercase letters for white, lowercase for black and digits for runs of empty
+        squares; 'w' or 'b' for the side to move; the fairy pieces off the board; the taken pieces ('-' when there are
+        none); and the turn counter. Off board and taken pieces are listed in the order of PIECE_NAMES, so a position
+        gives the same string on either backend whatever order the pieces were taken in. For example, the start of the
+        game is START_FEN.
+        """
+        chessboard = self._chessboard
+        ranks = []
+        for row in range(7, -1, -1):
+            rank = ''
+            empty = 0
+            for index in range(row * 8, row * 8 + 8):
+                piece = chessboard.get_piece_at(index)
+                if piece:
+                    if empty:
+                        rank += str(empty)
+                        empty = 0
+                    rank += piece.get_name()
+                else:
+                    empty += 1
+            if empty:
+                rank += str(empty)
+            ranks.append(rank)
+
+        off_board = ''.join(sorted((piece.get_name() for color in ('white', 'black')
+                                    for piece in chessboard.get_off_board(color)), key=PIECE_CODES.__getitem__))
+        taken = ''.join(sorted((piece.get_name() for color in ('white', 'black')
+                                for piece in chessboard.get_taken(color)), key=PIECE_CODES.__getitem__))
+        side = 'w' if self.get_turn() == 'white' else 'b'
+        return f"{'/'.join(ranks)} {side} {off_board or '-'} {taken or '-'} {self._turn}"
 
     def get_game_state(self):
         """
@@ -31,17 +352,30 @@ class ChessVar:
         """
         Checks the state of the game and returns 'UNFINISHED', 'WHITE_WON', or 'BLACK_WON'
         """
-        for piece in self._chessboard.get_chessboard_dict()['taken_white']:
-            if piece.get_piece_type() == 'king':
-                self._game_state = 'BLACK_WON'
-                return self._game_state
-        for piece in self._chessboard.get_chessboard_dict()['taken_black']:
-            if piece.get_piece_type() == 'king':
-                self._game_state = 'WHITE_WON'
-                return self._game_state
-        self._game_state = 'UNFINISHED'
+        if self._taken_counts[KING_CODES['white']]:
+            self._game_state = 'BLACK_WON'
+        elif self._taken_counts[KING_CODES['black']]:
+            self._game_state = 'WHITE_WON'
+        else:
+            self._game_state = 'UNFINISHED'
         return self._game_state
 
+    def count_pieces(self):
+        """
+        Counts the taken pieces and the off board fairy pieces of each piece code, and the queens, rooks, bishops and
+        knights each player has lost, from the chessboard. The counts are then kept up to date by each move, so that
+        checking whether the game is won or a fairy piece may enter takes constant time.
+        """
+        self._taken_counts = [0] * len(PIECE_CODES)
+        self._off_board_counts = [0] * len(PIECE_CODES)
+        for color in ('white', 'black'):
+            for piece in self._chessboard.get_taken(color):
+                self._taken_counts[PIECE_CODES[piece.get_name()]] += 1
+            for piece in self._chessboard.get_off_board(color):
+                self._off_board_counts[PIECE_CODES[piece.get_name()]] += 1
+        self._lost_piece_counts = {color: sum(self._taken_counts[code] for code in LOST_PIECE_CODES[color])
+                                   for color in ('white', 'black')}
+
     def get_turn(self):
         """
         Returns the color associated with the turn order where an even numbered turn order means it's white's turn and
@@ -58,6 +392,89 @@ class ChessVar:
         """
         return self._chessboard
 
+    def get_hash(self):
+        """
+        Returns the 64-bit Zobrist hash of the position, covering the pieces on the board, whose turn it is, the fairy
+        pieces off the board and how many queens, rooks, bishops and knights each player has lost. The hash is updated
+        with each move rather than recomputed.
+        """
+        return self._hash
+
+    def compute_hash(self):
+        """
+        Computes the Zobrist hash of the position from scratch and returns it.
+        """
+        position_hash = 0
+        for index in range(64):
+            piece = self._chessboard.get_piece_at(index)
+            if piece:
+                position_hash ^= ZOBRIST_PIECES[PIECE_CODES[piece.get_name()]][index]
+        if self.get_turn() == 'black':
+            position_hash ^= ZOBRIST_BLACK_TO_MOVE
+        for color in ('white', 'black'):
+            for piece in self._chessboard.get_off_board(color):
+                position_hash ^= ZOBRIST_OFF_BOARD[PIECE_CODES[piece.get_name()]]
+            position_hash ^= ZOBRIST_LOST_PIECES[color][min(self.get_lost_piece_count(color), 2)]
+        return position_hash
+
+    def rehash(self):
+        """
+        Recounts the pieces and recomputes the position hash and board score. Only needed after the chessboard has been
+        changed directly rather than through make_move or enter_fairy_piece.
+        """
+        self.count_pieces()
+        self._hash = self.compute_hash()
+        self._board_score = self.compute_board_score()
+
+    def get_evaluation(self):
+        """
+        Returns the static evaluation of the position in centipawns for the player to move: the material and square
+        bonuses of the pieces on the board (see SQUARE_SCORES), which are updated with each move rather than recomputed,
+        plus the fairy pieces off the board, looked up by their number and how close each player is to letting them
+        enter (see RESERVE_SCORES).
+        """
+        off_board_counts = self._off_board_counts
+        lost_piece_counts = self._lost_piece_counts
+        white_falcon, white_hunter = FAIRY_CODES['white']
+        black_falcon, black_hunter = FAIRY_CODES['black']
+        score = (self._board_score
+                 + RESERVE_SCORES[off_board_counts[white_falcon] + off_board_counts[white_hunter]][
+                     min(lost_piece_counts['white'], 2)]
+                 - RESERVE_SCORES[off_board_counts[black_falcon] + off_board_counts[black_hunter]][
+                     min(lost_piece_counts['black'], 2)])
+        return score if self._turn % 2 == 0 else -score
+
+    def compute_board_score(self):
+        """
+        Computes the material and square bonuses of the pieces on the board, white's minus black's, from scratch and
+        returns it.
+        """
+        board_score = 0
+        for index in range(64):
+            piece = self._chessboard.get_piece_at(index)
+            if piece:
+                board_score += SQUARE_SCORES[PIECE_CODES[piece.get_name()]][index]
+        return board_score
+
+    def compute_evaluation(self):
+        """
+        Computes the evaluation of get_evaluation from scratch, counting the pieces on every square and off the board,
+        and returns it.
+        """
+        score = self.compute_board_score()
+        for color, sign in (('white', 1), ('black', -1)):
+            fairy_count = len(self._chessboard.get_off_board(color))
+            lost_piece_count = sum(1 for piece in self._chessboard.get_taken(color)
+                                   if PIECE_CODES[piece.get_name()] in LOST_PIECE_CODES[color])
+            score += sign * RESERVE_SCORES[fairy_count][min(lost_piece_count, 2)]
+        return score if self.get_turn() == 'white' else -score
+
+    def get_lost_piece_count(self, color):
+        """
+        Returns the number of queens, rooks, bishops and knights of the given color that have been captured.
+        """
+        return self._lost_piece_counts[color]
+
     def turn_order(self):
         """
         Keeps track of turn order by incrementing turn by 1 and returning the variable with the new value.
@@ -73,213 +490,258 @@ class ChessVar:
         Returns True if the move was made, along with a message prompting th next player's turn, and False if it was
             not, along with a message prompting the current player to try again.
         """
+        current_index = SQUARE_INDICES.get(current_position)
+        new_index = SQUARE_INDICES.get(new_position)
+        if current_index is None or new_index is None:
+            return False  # not a square on the board
+        return self._make_move(current_index, new_index)
+
+    def _make_move(self, current_index, new_index):
+        """
+        Does the work of make_move for square indices. Returns True if the move was made and False if it was not.
+        """
         if self.get_game_state() != 'UNFINISHED':
             return False
-        if not self.valid_move(current_position, new_position):
+        if not self._valid_move(current_index, new_index):
             return False
         else:
-            self._chessboard.chessboard_position(current_position, new_position)
-            self.set_game_state()
+            position_hash = self._hash ^ ZOBRIST_BLACK_TO_MOVE
+            current_code = PIECE_CODES[self._chessboard.get_piece_at(current_index).get_name()]
+            position_hash ^= ZOBRIST_PIECES[current_code][current_index] ^ ZOBRIST_PIECES[current_code][new_index]
+            square_scores = SQUARE_SCORES[current_code]
+            board_score = self._board_score + square_scores[new_index] - square_scores[current_index]
+
+            taken_piece = self._chessboard.move_piece(current_index, new_index)
+            self._undo_stack.append(((current_index, new_index), taken_piece, self._game_state, self._hash,
+                                     self._board_score))
+            if taken_piece:
+                taken_code = PIECE_CODES[taken_piece.get_name()]
+                self._taken_counts[taken_code] += 1
+                position_hash ^= ZOBRIST_PIECES[taken_code][new_index]
+                board_score -= SQUARE_SCORES[taken_code][new_index]
+                taken_color = taken_piece.get_color()
+                if taken_code in LOST_PIECE_CODES[taken_color]:
+                    lost_piece_keys = ZOBRIST_LOST_PIECES[taken_color]
+                    lost_piece_count = self._lost_piece_counts[taken_color] + 1
+                    self._lost_piece_counts[taken_color] = lost_piece_count
+                    position_hash ^= lost_piece_keys[min(lost_piece_count - 1, 2)]
+                    position_hash ^= lost_piece_keys[min(lost_piece_count, 2)]
+                elif taken_code == KING_CODES[taken_color]:
+                    self.set_game_state()
+            self._hash = position_hash
+            self._board_score = board_score
             self.turn_order()
             return True
 
+    def undo_move(self):
+        """
+        Takes back the last move made with make_move or enter_fairy_piece, returning any captured piece to the board or
+        the entered fairy piece to its off board list, and restoring the game state and whose turn it is. Returns True
+        if a move was taken back and False if there is no move to take back.
+        """
+        if not self._undo_stack:
+            return False
+        move, taken_piece, game_state, position_hash, board_score = self._undo_stack.pop()
+        if move[0] in ('F', 'H', 'f', 'h'):
+            self._chessboard.exit_piece(move[1])
+            self._off_board_counts[PIECE_CODES[move[0]]] += 1
+        else:
+            self._chessboard.unmake_position(move[0], move[1], taken_piece)
+            if taken_piece:
+                taken_code = PIECE_CODES[taken_piece.get_name()]
+                self._taken_counts[taken_code] -= 1
+                if taken_code in LOST_PIECE_CODES[taken_piece.get_color()]:
+                    self._lost_piece_counts[taken_piece.get_color()] -= 1
+        self._game_state = game_state
+        self._hash = position_hash
+        self._board_score = board_score
+        self._turn -= 1
+        return True
+
     def valid_move(self, current_position_str, new_position_str):
         """
         Takes the strings of the current and new position and checks that the proposed move from current position to
         new position is legal. Returns True or False accordingly.
         """
-        current_piece = self._chessboard.get_chessboard_dict()[current_position_str]
-        current_position_obj = BoardSquare(current_position_str)
-        new_position_obj = BoardSquare(new_position_str)
-
-        if not current_piece:
-            return False
-
-        if current_piece.get_color() != self.get_turn():
-            return False
-
-        if not new_position_obj.check_valid_square():
-            return False  # new position is not a valid square
-
-        if self._chessboard.get_chessboard_dict()[new_position_str]:
-            new_piece_color = self._chessboard.get_chessboard_dict()[new_position_str].get_color()
-            if new_piece_color == current_piece.get_color():
-                return False  # cannot take own piece
-
-        if not current_piece.valid_moves(current_position_obj, new_position_obj):
-            return False  # piece cannot move from current to new
+        current_index = SQUARE_INDICES.get(current_position_str)
+        new_index = SQUARE_INDICES.get(new_position_str)
+        if current_index is None or new_index is None:
+            return False  # current or new position is not a valid square
+        return self._valid_move(current_index, new_index)
 
-        if not self.valid_journey(current_position_obj, new_position_obj, current_piece):
-            return False  # other pieces are interrupting the journey
-
-        else:
-            return True
+    def _valid_move(self, current_index, new_index):
+        """
+        Takes the square indices of the current and new position and checks that the proposed move from current
+        position to new position is legal for the player whose turn it is, which the chessboard works out from its own
+        storage. Returns True or False accordingly.
+        """
+        return self._chessboard.is_valid_move(current_index, new_index, self.get_turn())
 
     def valid_journey(self, current_position_obj, new_position_obj, current_piece):
         """
         Takes the current and new position instances of the BoardSquare class as current_position_obj and
         new_position_obj and the piece at the current position as current_piece. Checks that the piece can move from
-        the current to new position without another piece being in the way. Returns True or False accordingly, via
-        methods for horizontal, vertical and diagonal journeys.
+        the current to new position without another piece being in the way, looking up the squares in between in the
+        precomputed BETWEEN_SQUARES table. Returns True or False accordingly.
         """
-        current_row = current_position_obj.get_row()
-        new_row = new_position_obj.get_row()
-        current_column = current_position_obj.get_column()
-        new_column = new_position_obj.get_column()
-
         if current_piece.get_piece_type() == 'knight':
             return True
-
-        if current_row == new_row:
-            return self.check_horizontal_journey(current_column, new_column, current_row)
-
-        if current_column == new_column:
-            return self.check_vertical_journey(current_row, new_row, current_column)
-
-        else:
-            return self.check_diagonal_journey(current_row, new_row, current_column, new_column)
+        return self._chessboard.is_path_clear(current_position_obj.get_index(), new_position_obj.get_index())
 
     def check_horizontal_journey(self, current_column, new_column, current_row):
         """
         Checks all positions on the current row between the current column and the new column and returns False if any
         are occupied and True if they are empty.
         """
-        if new_column > current_column:
-            for column in range(current_column + 1, new_column):  # start, stop
-                position = f'{chr(column + 96)}{current_row}'  # convert indices to coordinates
-                if not self._chessboard.get_chessboard_dict()[position]:
-                    continue
-                else:
-                    return False
-            return True
-        else:
-            for column in range(new_column + 1, current_column):  # start, stop
-                position = f'{chr(column + 96)}{current_row}'  # convert indices to coordinates
-                if not self._chessboard.get_chessboard_dict()[position]:
-                    continue
-                else:
-                    return False
-            return True
+        return self._chessboard.is_path_clear((current_row - 1) * 8 + current_column - 1,
+                                              (current_row - 1) * 8 + new_column - 1)
 
     def check_vertical_journey(self, current_row, new_row, current_column):
         """
         Checks all positions on the current column between the current row and the new row and returns False if any are
         occupied and True if they are empty.
         """
-        if new_row > current_row:
-            for row in range(current_row + 1, new_row):  # start, stop
-                position = f'{chr(current_column + 96)}{row}'  # convert indices to coordinates
-                if not self._chessboard.get_chessboard_dict()[position]:
-                    continue
-                else:
-                    return False
-            return True
-        else:
-            for row in range(new_row + 1, current_row):  # start, stop
-                position = f'{chr(current_column + 96)}{row}'  # convert indices to coordinates
-                if not self._chessboard.get_chessboard_dict()[position]:
-                    continue
-                else:
-                    return False
-            return True
+        return self._chessboard.is_path_clear((current_row - 1) * 8 + current_column - 1,
+                                              (new_row - 1) * 8 + current_column - 1)
 
     def check_diagonal_journey(self, current_row, new_row, current_column, new_column):
         """
         Checks all positions on the diagonal from the current column and row to the new column and row and returns
         False if any are occupied and True if they are empty.
         """
-        if new_row > current_row:  # moving up the board
-            if new_column > current_column:  # moving right
-                column_loop = current_column + 1
-                for row in range(current_row+1, new_row):  # start, stop, step
-                    position = f'{chr(column_loop + 96)}{row}'
-                    column_loop += 1
-                    if not self._chessboard.get_chessboard_dict()[position]:
-                        continue
-                    else:
-                        return False
-                return True
-
-            else:  # moving left
-                column_loop = current_column - 1
-                for row in range(current_row+1, new_row):  # start, stop, step
-                    position = f'{chr(column_loop + 96)}{row}'
-                    column_loop -= 1
-                    if not self._chessboard.get_chessboard_dict()[position]:
-                        continue
-                    else:
-                        return False
-                return True
-
-        else:  # moving down the board
-            if new_column > current_column:  # moving right
-                column_loop = current_column + 1
-                for row in range(current_row-1, new_row, -1):  # start, stop, step
-                    position = f'{chr(column_loop + 96)}{row}'
-                    column_loop += 1
-                    if not self._chessboard.get_chessboard_dict()[position]:
-                        continue
-                    else:
-                        return False
-                return True
-
-            else:  # moving left
-                column_loop = current_column - 1
-                for row in range(current_row-1, new_row, -1):  # start, stop, step
-                    position = f'{chr(column_loop + 96)}{row}'
-                    column_loop -= 1
-                    if not self._chessboard.get_chessboard_dict()[position]:
-                        continue
-                    else:
-                        return False
-                return True
+        return self._chessboard.is_path_clear((current_row - 1) * 8 + current_column - 1,
+                                              (new_row - 1) * 8 + new_column - 1)
+
+    def legal_moves(self):
+        """
+        Generates every legal move for the player whose turn it is, in a single pass over their pieces. Board moves are
+        yielded as (current_position, new_position) tuples for make_move, and fairy piece entries as
+        (fairy_piece, entry_position) tuples for enter_fairy_piece. Nothing is generated once the game is won.
+        """
+        if self.get_game_state() != 'UNFINISHED':
+            return
+        color = self.get_turn()
+
+        for packed_move in self._chessboard.board_packed_moves(color):
+            yield SQUARE_NAMES[packed_move >> 6], SQUARE_NAMES[packed_move & 63]
+
+        home_rows = (0, 1) if color == 'white' else (6, 7)
+        fairy_pieces = [PIECE_NAMES[code] for code in FAIRY_CODES[color] if self._off_board_counts[code]]
+        for fairy_piece in fairy_pieces:
+            for row in home_rows:
+                for entry_index in range(row * 8, row * 8 + 8):
+                    if self._valid_fairy_enter(fairy_piece, entry_index):
+                        yield fairy_piece, SQUARE_NAMES[entry_index]
+
+    def get_legal_moves(self):
+        """
+        Returns a list of every legal move for the player whose turn it is, in the same form as legal_moves.
+        """
+        return list(self.legal_moves())
+
+    def legal_packed_moves(self):
+        """
+        Returns a list of every legal move for the player whose turn it is, packed into 16-bit integers as by
+        pack_move, in the same order as legal_moves. Cheaper than legal_moves when the moves are only played with
+        play_packed_move, as in random playouts: no position strings are made, and whether a fairy piece may enter is
+        worked out once rather than per square.
+        """
+        if self.get_game_state() != 'UNFINISHED':
+            return []
+        color = self.get_turn()
+        get_piece_at = self._chessboard.get_piece_at
+        moves = self._chessboard.board_packed_moves(color)
+
+        fairy_codes = [code for code in FAIRY_CODES[color] if self._off_board_counts[code]]
+        if not fairy_codes:
+            return moves
+        lost_piece_count = self._lost_piece_counts[color]
+        if len(fairy_codes) == 2 and lost_piece_count == 0 or len(fairy_codes) == 1 and lost_piece_count <= 1:
+            return moves
+        entry_indices = range(0, 16) if color == 'white' else range(48, 64)
+        entry_indices = [entry_index for entry_index in entry_indices if not get_piece_at(entry_index)]
+        for code in fairy_codes:
+            kind = (FAIRY_NAMES.index(PIECE_NAMES[code]) + 1) << 12
+            for entry_index in entry_indices:
+                moves.append(kind | entry_index)
+        return moves
+
+    def capture_packed_moves(self):
+        """
+        Returns a list of the legal captures for the player whose turn it is, packed as by pack_move, in the same order
+        as legal_packed_moves. Only the first piece along each of a piece's directions is looked at, and a pawn only
+        captures along its attack table, so the quiet moves are never generated.
+        """
+        if self.get_game_state() != 'UNFINISHED':
+            return []
+        return self._chessboard.capture_packed_moves(self.get_turn())
+
+    def best_move(self, depth=None, time_ms=None, cancellation_token=None):
+        """
+        Returns the best move found by the built-in ChessEngine for the player whose turn it is, in the form generated
+        by legal_moves, or None if there is no legal move. Searches to the given depth, until time_ms milliseconds
+        have passed or until the ChessEngine.CancellationToken is cancelled, whichever comes first.
+        """
+        return self.analyze(depth, time_ms, cancellation_token).get_move()
+
+    def analyze(self, depth=None, time_ms=None, cancellation_token=None):
+        """
+        Searches the position with the built-in ChessEngine as for best_move and returns its ChessEngine.SearchResult,
+        with the best move of the last completed depth, that depth, and the nodes searched per second. The engine and
+        its transposition table are kept between calls.
+        """
+        if self._engine is None:
+            from ChessEngine import ChessEngine  # imported here as ChessEngine itself imports this module
+            self._engine = ChessEngine()
+        return self._engine.iterative_deepening(self, depth, time_ms, cancellation_token)
+
+    def play_move(self, move):
+        """
+        Plays a move in the form generated by legal_moves, passing board moves to make_move and fairy piece entries
+        to enter_fairy_piece. Returns True if the move was made and False if it was not.
+        """
+        if move[0] in ('F', 'H', 'f', 'h'):
+            return self.enter_fairy_piece(move[0], move[1])
+        return self.make_move(move[0], move[1])
+
+    def play_packed_move(self, packed_move):
+        """
+        Plays a move packed into a 16-bit integer by pack_move without unpacking it to position strings. Returns True
+        if the move was made and False if it was not.
+        """
+        kind = packed_move >> 12
+        if kind:
+            if kind > len(FAIRY_NAMES):
+                return False
+            return self._enter_fairy_piece(FAIRY_NAMES[kind - 1], packed_move & 63)
+        if not packed_move:
+            return False
+        return self._make_move(packed_move >> 6 & 63, packed_move & 63)
 
     def enter_fairy_piece(self, fairy_piece, entry_position):
         """
         Enters the given fairy_piece on the board at the given entry_position after validating the entry with the
         valid_fairy_enter method. Updates the turn and returns True if the entry was made and False if it was not.
         """
-        if self.valid_fairy_enter(fairy_piece, entry_position):
-            if fairy_piece == 'F':
-                white_falcon = Falcon(color='white', name='F')
-                self._chessboard.place_piece(white_falcon, entry_position)
-
-                for piece in self._chessboard.get_chessboard_dict()['off_board_white']:
-                    if piece.get_name() == fairy_piece:
-                        fairy_piece_object = piece
-                        off_board_list = self._chessboard.get_chessboard_dict()['off_board_white']
-                        off_board_list.remove(fairy_piece_object)
-
-            if fairy_piece == 'f':
-                black_falcon = Falcon(color='black', name='f')
-                self._chessboard.place_piece(black_falcon, entry_position)
-
-                for piece in self._chessboard.get_chessboard_dict()['off_board_black']:
-                    if piece.get_name() == fairy_piece:
-                        fairy_piece_object = piece
-                        off_board_list = self._chessboard.get_chessboard_dict()['off_board_black']
-                        off_board_list.remove(fairy_piece_object)
-
-            if fairy_piece == 'H':
-                white_hunter = Hunter(color='white', name='H')
-                self._chessboard.place_piece(white_hunter, entry_position)
-
-                for piece in self._chessboard.get_chessboard_dict()['off_board_white']:
-                    if piece.get_name() == fairy_piece:
-                        fairy_piece_object = piece
-                        off_board_list = self._chessboard.get_chessboard_dict()['off_board_white']
-                        off_board_list.remove(fairy_piece_object)
-
-            if fairy_piece == 'h':
-                black_hunter = Hunter(color='black', name='h')
-                self._chessboard.place_piece(black_hunter, entry_position)
-
-                for piece in self._chessboard.get_chessboard_dict()['off_board_black']:
-                    if piece.get_name() == fairy_piece:
-                        fairy_piece_object = piece
-                        off_board_list = self._chessboard.get_chessboard_dict()['off_board_black']
-                        off_board_list.remove(fairy_piece_object)
-
+        entry_index = SQUARE_INDICES.get(entry_position)
+        if entry_index is None:
+            return False  # not a square on the board
+        return self._enter_fairy_piece(fairy_piece, entry_index)
+
+    def _enter_fairy_piece(self, fairy_piece, entry_index):
+        """
+        Does the work of enter_fairy_piece for a square index. Returns True if the entry was made and False if it was
+        not.
+        """
+        if self._valid_fairy_enter(fairy_piece, entry_index):
+            self._chessboard.enter_piece(fairy_piece, entry_index)
+            self._undo_stack.append(((fairy_piece, entry_index), None, self._game_state, self._hash,
+                                     self._board_score))
+            fairy_code = PIECE_CODES[fairy_piece]
+            self._off_board_counts[fairy_code] -= 1
+            self._hash ^= (ZOBRIST_PIECES[fairy_code][entry_index] ^ ZOBRIST_OFF_BOARD[fairy_code] ^
+                           ZOBRIST_BLACK_TO_MOVE)
+            self._board_score += SQUARE_SCORES[fairy_code][entry_index]
             self.turn_order()
             return True
 
@@ -291,8 +753,16 @@ class ChessVar:
         Checks that the given fairy_piece can enter the board at the given entry_position. Returns True if the move is
         valid and False if it is not.
         """
-        board_square = BoardSquare(entry_position)
+        entry_index = SQUARE_INDICES.get(entry_position)
+        if entry_index is None:
+            return False  # entry position is not a valid square
+        return self._valid_fairy_enter(fairy_piece, entry_index)
 
+    def _valid_fairy_enter(self, fairy_piece, entry_index):
+        """
+        Checks that the given fairy_piece can enter the board at the given square index. Returns True if the move is
+        valid and False if it is not.
+        """
         if self.get_game_state() != 'UNFINISHED':
             return False
 
@@ -304,19 +774,10 @@ class ChessVar:
         if self.get_turn() != piece_color:
             return False
 
-        off_board_pieces = []
-        if piece_color == 'white':
-            for piece in self._chessboard.get_chessboard_dict()['off_board_white']:
-                off_board_pieces.append(piece.get_name())
-            if fairy_piece not in off_board_pieces:
-                return False
-        if piece_color == 'black':
-            for piece in self._chessboard.get_chessboard_dict()['off_board_black']:
-                off_board_pieces.append(piece.get_name())
-            if fairy_piece not in off_board_pieces:
-                return False
+        if not self._off_board_counts[PIECE_CODES[fairy_piece]]:
+            return False
 
-        entry_row = board_square.get_row()
+        entry_row = BOARD_SQUARES[entry_index].get_row()
         if piece_color == 'white':
             if entry_row != 1 and entry_row != 2:
                 return False
@@ -325,19 +786,9 @@ class ChessVar:
                 return False
 
         fairy_count = 0
-        piece_count = 0
-        if piece_color == 'white':
-            for __ in self._chessboard.get_chessboard_dict()['off_board_white']:
-                fairy_count += 1
-            for piece in self._chessboard.get_chessboard_dict()['taken_white']:
-                if isinstance(piece, ChessPiece) and piece.get_name() in ['R', 'N', 'B', 'Q']:
-                    piece_count += 1
-        if piece_color == 'black':
-            for __ in self._chessboard.get_chessboard_dict()['off_board_black']:
-                fairy_count += 1
-            for piece in self._chessboard.get_chessboard_dict()['taken_black']:
-                if isinstance(piece, ChessPiece) and piece.get_name() in ['r', 'n', 'b', 'q']:
-                    piece_count += 1
+        for code in FAIRY_CODES[piece_color]:
+            fairy_count += self._off_board_counts[code]
+        piece_count = self._lost_piece_counts[piece_color]
         if fairy_count == 2 and piece_count == 0:
             return False
         if fairy_count == 1 and piece_count <= 1:
@@ -345,21 +796,127 @@ class ChessVar:
         if fairy_count == 0:
             return False
 
-        if self._chessboard.get_chessboard_dict()[entry_position]:
+        if self._chessboard.get_piece_at(entry_index):
             return False
         else:
             return True
 
 
+class GameSnapshot:
+    """
+    Represents an immutable record of a game's position, made by ChessVar.snapshot and put back with ChessVar.restore
+    or ChessVar.from_snapshot. Holds only compact state: the piece code on each square index as 64 bytes (EMPTY_CODE
+    for an empty square), the codes of the off board and taken pieces in piece code order, the turn counter, the game
+    state and the position hash. Snapshots of the same position are equal whatever the backend or the order the pieces
+    were taken in, as their hashes are, and can be used as dictionary keys.
+    """
+    __slots__ = ('_squares', '_off_board', '_taken', '_turn', '_game_state', '_hash')
+
+    def __init__(self, squares, off_board, taken, turn, game_state, position_hash):
+        object.__setattr__(self, '_squares', bytes(squares))
+        object.__setattr__(self, '_off_board', bytes(sorted(off_board)))
+        object.__setattr__(self, '_taken', bytes(sorted(taken)))
+        object.__setattr__(self, '_turn', turn)
+        object.__setattr__(self, '_game_state', game_state)
+        object.__setattr__(self, '_hash', position_hash)
+
+    def __setattr__(self, name, value):
+        raise AttributeError('GameSnapshot is immutable')
+
+    def __reduce__(self):
+        return GameSnapshot, (self._squares, self._off_board, self._taken, self._turn, self._game_state, self._hash)
+
+    def __eq__(self, other):
+        if not isinstance(other, GameSnapshot):
+            return NotImplemented
+        return (self._hash == other._hash and self._squares == other._squares and self._turn == other._turn
+                and self._off_board == other._off_board and self._taken == other._taken
+                and self._game_state == other._game_state)
+
+    def __hash__(self):
+        return self._hash
+
+    def get_square_codes(self):
+        """
+        Returns the 64 bytes holding the piece code on each square index, or EMPTY_CODE for an empty square.
+        """
+        return self._squares
+
+    def get_pieces(self):
+        """
+        Returns a list of the piece on each square index, or None for an empty square.
+        """
+        return [SNAPSHOT_PIECES[code] for code in self._squares]
+
+    def get_off_board(self, color):
+        """
+        Returns a list of the fairy pieces of the given color that have not yet entered the board.
+        """
+        return [PIECES[code] for code in self._off_board if PIECES[code].get_color() == color]
+
+    def get_off_board_codes(self):
+        """
+        Returns the bytes holding the piece codes of the fairy pieces off the board in piece code order, white's first.
+        """
+        return self._off_board
+
+    def get_taken_codes(self):
+        """
+        Returns the bytes holding the piece codes of the taken pieces in piece code order, white's first.
+        """
+        return self._taken
+
+    def get_taken(self, color):
+        """
+        Returns a list of the pieces of the given color that have been captured.
+        """
+        return [PIECES[code] for code in self._taken if PIECES[code].get_color() == color]
+
+    def get_turn_count(self):
+        """
+        Returns the turn counter, even when it is white's turn and odd when it is black's.
+        """
+        return self._turn
+
+    def get_game_state(self):
+        """
+        Returns the game state, 'UNFINISHED', 'WHITE_WON' or 'BLACK_WON'.
+        """
+        return self._game_state
+
+    def get_hash(self):
+        """
+        Returns the Zobrist hash of the position.
+        """
+        return self._hash
+
+
 class BoardSquare:
     """
     Represents a single square of the chessboard with a coordinate string that can be break down as a row and a column.
     Communicates with the ChessPiece classes and subclasses to receive the coordinate and provide the square's column
     and row, as well as the ChessBoard class. Communicates with the ChessVar class to ensure any potential new_square
-    is part of the board.
+    is part of the board. The column, row and square index are worked out once when the square is created and the
+    square cannot be changed afterwards, so the 64 squares of the board are shared from the BOARD_SQUARES table.
     """
+    __slots__ = ('_square', '_column', '_row', '_index')
+
     def __init__(self, square):
-        self._square = square
+        column = row = None
+        if square:
+            column = ord(square[0].lower()) - 96
+            if square[1:].isdigit():
+                row = int(square[1:])
+        object.__setattr__(self, '_square', square)
+        object.__setattr__(self, '_column', column)
+        object.__setattr__(self, '_row', row)
+        object.__setattr__(self, '_index', SQUARE_INDICES.get(square))
+
+    def __setattr__(self, name, value):
+        raise AttributeError('BoardSquare is immutable')
+
+    def __reduce__(self):
+        return get_board_square, (self._square,)
 
     def get_square(self):
         """
@@ -371,38 +928,117 @@ class BoardSquare:
         """
         Returns the square's column as an integer.
         """
-        column_alph = self._square[0].lower()
-        column_num = ord(column_alph) - 96
-        return column_num
+        return self._column
 
     def get_row(self):
         """
         Returns the square's row as an integer.
         """
-        row = int(self._square[1])
-        return row
+        return self._row
+
+    def get_index(self):
+        """
+        Returns the square's index (a1 = 0, b1 = 1, ... h8 = 63), or None if the square is not on the board.
+        """
+        return self._index
 
     def check_valid_square(self):
         """
         Checks that the square is valid by making sure that its row and column is within the board range and returns
         True or False accordingly.
         """
-        if self.get_row() > 8 or self.get_row() < 1 or self.get_column() > 8 or self.get_column() < 1:
-            return False
-        else:
-            return True
+        return self._index is not None
+
+
+# the interned square of each square index
+BOARD_SQUARES = tuple(BoardSquare(name) for name in SQUARE_NAMES)
+
+
+def get_board_square(square):
+    """
+    Returns the interned BoardSquare for a coordinate string on the board, or a new BoardSquare for any other string.
+    """
+    index = SQUARE_INDICES.get(square)
+    if index is None:
+        return BoardSquare(square)
+    return BOARD_SQUARES[index]
+
+
+def _direction_masks(directions):
+    """
+    Returns a list with a bitmask for each square index of the squares a piece moving in the given (column step,
+    row step, slides) directions reaches from it on an empty board.
+    """
+    masks = []
+    for index in range(64):
+        mask = 0
+        for column_step, row_step, slides in directions:
+            ray = RAYS[column_step, row_step][index]
+            for new_index in (ray if slides else ray[:1]):
+                mask |= 1 << new_index
+        masks.append(mask)
+    return masks
 
 
 class ChessPiece:
     """
     Represents a ChessPiece with a color and piece_type. Acts as a parent class for all piece type subclasses.
     Communicates with the Chessboard and ChessVar classes to provide the color and move habits of the piece in any
-    proposed position on the board.
+    proposed position on the board. The move habits are worked out once, when the piece is created, as a table of the
+    squares it can move to and attack from each square, and a piece cannot be changed afterwards, so one piece of each
+    name is shared by every square and game (see PIECES).
     """
-    def __init__(self, color, piece_type, name):
-        self._color = color
-        self._piece_type = piece_type
-        self._name = name
+    __slots__ = ('_color', '_piece_type', '_name', '_directions', '_move_masks', '_attack_masks')
+
+    def __init__(self, color, piece_type, name, directions=(), move_masks=None, attack_masks=None):
+        if move_masks is None:
+            move_masks = _direction_masks(directions)
+        object.__setattr__(self, '_color', color)
+        object.__setattr__(self, '_piece_type', piece_type)
+        object.__setattr__(self, '_name', name)
+        object.__setattr__(self, '_directions', tuple(directions))
+        object.__setattr__(self, '_move_masks', tuple(move_masks))
+        object.__setattr__(self, '_attack_masks', tuple(attack_masks if attack_masks is not None else move_masks))
+
+    def __setattr__(self, name, value):
+        raise AttributeError('chess pieces are immutable')
+
+    def __reduce__(self):
+        return get_chess_piece, (self._name,)
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
+    def get_move_directions(self):
+        """
+        Returns the tuple of (column step, row step, slides) directions the piece can move in.
+        """
+        return self._directions
+
+    def get_move_mask(self, index):
+        """
+        Returns the bitmask of the squares the piece can move to from the given square index on an empty board.
+        """
+        return self._move_masks[index]
+
+    def get_attack_mask(self, index):
+        """
+        Returns the bitmask of the squares the piece can capture on from the given square index on an empty board.
+        """
+        return self._attack_masks[index]
+
+    def valid_moves(self, current_square, new_square, *, is_capture):
+        """
+        Returns True if the proposed move from current_square to new_square is valid for the piece type, capturing a
+        piece on new_square if is_capture is True. Returns False if the proposed move is not valid. Whether other pieces
+        are in the way is checked by ChessVar. is_capture must be given by keyword, as a pawn moves differently when it
+        captures and the piece cannot see the board.
+        """
+        masks = self._attack_masks if is_capture else self._move_masks
+        return bool(masks[current_square.get_index()] >> new_square.get_index() & 1)
 
     def get_color(self):
         """
@@ -425,494 +1061,869 @@ class ChessPiece:
 
 class Rook(ChessPiece):
     """
-    Represents a Rook (castle) chess piece. Inherits from ChessPiece. Communicates with the BoardSquare class to get
-    columns and rows to define the pieces movement style. Communicates with Chessboard for the pieces to be added to the
-    chessboard dictionary when setting up the board. Communicates with ChessVar to share the pieces movement style.
+    Represents a Rook (castle) chess piece. Inherits from ChessPiece, sliding along rows and columns. Communicates with
+    Chessboard for the pieces to be added to the chessboard when setting up the board. Communicates with ChessVar to
+    share the pieces movement style.
     """
+    __slots__ = ()
+
     def __init__(self, color, name):
-        super().__init__(color, "rook", name)
+        super().__init__(color, "rook", name, [(1, 0, True), (-1, 0, True), (0, 1, True), (0, -1, True)])
 
-    def valid_moves(self, current_square, new_square):
-        """
-        Defines the movement method of the rook/castle piece. Returns True if the proposed move from current_square to
-        new_square is valid for the piece type. Returns False if the proposed move is not valid.
-        """
-        current_column = current_square.get_column()
-        current_row = current_square.get_row()
 
-        new_column = new_square.get_column()
-        new_row = new_square.get_row()
+class Knight(ChessPiece):
+    """
+    Represents a Knight chess piece. Inherits from ChessPiece, jumping two squares along a row or column and one
+    across. Communicates with Chessboard for the pieces to be added to the chessboard when setting up the board.
+    Communicates with ChessVar to share the pieces movement style.
+    """
+    __slots__ = ()
 
-        column_difference = abs(new_column - current_column)
-        row_difference = abs(new_row - current_row)
+    def __init__(self, color, name):
+        super().__init__(color, "knight", name, [(1, 2, False), (2, 1, False), (2, -1, False), (1, -2, False),
+                                                 (-1, -2, False), (-2, -1, False), (-2, 1, False), (-1, 2, False)])
 
-        if column_difference == 0 and row_difference == 0:
-            return False
-        if new_column == current_column or new_row == current_row:
-            return True
-        else:
-            return False
 
+class Bishop(ChessPiece):
+    """
+    Represents a Bishop chess piece. Inherits from ChessPiece, sliding along diagonals. Communicates with Chessboard
+    for the pieces to be added to the chessboard when setting up the board. Communicates with ChessVar to share the
+    pieces movement style.
+    """
+    __slots__ = ()
+
+    def __init__(self, color, name):
+        super().__init__(color, "bishop", name, [(1, 1, True), (1, -1, True), (-1, -1, True), (-1, 1, True)])
 
-class Knight(ChessPiece):
+
+class Queen(ChessPiece):
     """
-    Represents a Knight chess piece. Inherits from ChessPiece. Communicates with the BoardSquare class to get columns
-    and rows to define the pieces movement style. Communicates with Chessboard for the pieces to be added to the
-    chessboard dictionary when setting up the board. Communicates with ChessVar to share the pieces movement style.
+    Represents a Queen chess piece. Inherits from ChessPiece, sliding along rows, columns and diagonals. Communicates
+    with Chessboard for the pieces to be added to the chessboard when setting up the board. Communicates with ChessVar
+    to share the pieces movement style.
     """
+    __slots__ = ()
+
     def __init__(self, color, name):
-        super().__init__(color, "knight", name)
+        super().__init__(color, "queen", name, [(1, 0, True), (-1, 0, True), (0, 1, True), (0, -1, True),
+                                                (1, 1, True), (1, -1, True), (-1, -1, True), (-1, 1, True)])
 
-    def valid_moves(self, current_square, new_square):
-        """
-        Defines the movement method of the knight piece. Returns True if the proposed move from current_square to
-        new_square is valid for the piece type. Returns False if the proposed move is not valid.
-        """
-        current_column = current_square.get_column()
-        current_row = current_square.get_row()
 
-        new_column = new_square.get_column()
-        new_row = new_square.get_row()
+class King(ChessPiece):
+    """
+    Represents a King chess piece. Inherits from ChessPiece, stepping one square in any direction. Communicates with
+    Chessboard for the pieces to be added to the chessboard when setting up the board. Communicates with ChessVar to
+    share the pieces movement style.
+    """
+    __slots__ = ()
 
-        column_difference = abs(new_column - current_column)
-        row_difference = abs(new_row - current_row)
+    def __init__(self, color, name):
+        super().__init__(color, "king", name, [(1, 0, False), (-1, 0, False), (0, 1, False), (0, -1, False),
+                                               (1, 1, False), (1, -1, False), (-1, -1, False), (-1, 1, False)])
 
-        if column_difference == 1 and row_difference == 2 or column_difference == 2 and row_difference == 1:
-            return True
-        else:
-            return False
 
+class Pawn(ChessPiece):
+    """
+    Represents a Pawn chess piece. Inherits from ChessPiece, moving one square forward, or two from its starting row,
+    onto an empty square and capturing one square diagonally forward. Communicates with Chessboard for the pieces to be
+    added to the chessboard when setting up the board. Communicates with ChessVar to share the pieces movement style.
+    The directions are every square the pawn may be able to move to; which is allowed depends on whether it captures.
+    """
+    __slots__ = ()
 
-class Bishop(ChessPiece):
+    def __init__(self, color, name):
+        forward = 1 if color == 'white' else -1
+        start_row = 1 if color == 'white' else 6
+        move_masks = []
+        for index in range(64):
+            steps = 2 if index // 8 == start_row else 1
+            move_masks.append(sum(1 << new_index for new_index in RAYS[0, forward][index][:steps]))
+        super().__init__(color, "pawn", name,
+                         [(0, forward, False), (0, 2 * forward, False), (1, forward, False), (-1, forward, False)],
+                         move_masks, _direction_masks([(1, forward, False), (-1, forward, False)]))
+
+
+class Hunter(ChessPiece):
     """
-    Represents a Bishop chess piece. Inherits from ChessPiece. Communicates with the BoardSquare class to get columns
-    and rows to define the pieces movement style. Communicates with Chessboard for the pieces to be added to the
-    chessboard dictionary when setting up the board. Communicates with ChessVar to share the pieces movement style.
+    Represents a Hunter chess piece. Inherits from ChessPiece, moving forward like a rook and backward like a bishop.
+    Communicates with Chessboard for the pieces to be added to the chessboard off board positions when setting up the
+    board and adding the fairy piece to the board proper via the enter_fairy_piece method of ChessVar. Communicates
+    with ChessVar to share the pieces movement style.
     """
+    __slots__ = ()
+
     def __init__(self, color, name):
-        super().__init__(color, "bishop", name)
+        forward = 1 if color == 'white' else -1
+        super().__init__(color, "hunter", name, [(0, forward, True), (1, -forward, True), (-1, -forward, True)])
 
-    def valid_moves(self, current_square, new_square):
-        """
-        Defines the movement method of the bishop piece. Returns True if the proposed move from current_square to
-        new_square is valid for the piece type. Returns False if the proposed move is not valid.
-        """
-        current_column = current_square.get_column()
-        current_row = current_square.get_row()
 
-        new_column = new_square.get_column()
-        new_row = new_square.get_row()
+class Falcon(ChessPiece):
+    """
+    Represents a Falcon chess piece. Inherits from ChessPiece, moving forward like a bishop and backward like a rook.
+    Communicates with Chessboard for the pieces to be added to the chessboard off board positions when setting up the
+    board and adding the fairy piece to the board proper via the enter_fairy_piece method of ChessVar. Communicates
+    with ChessVar to share the pieces movement style.
+    """
+    __slots__ = ()
 
-        column_difference = abs(new_column - current_column)
-        row_difference = abs(new_row - current_row)
+    def __init__(self, color, name):
+        forward = 1 if color == 'white' else -1
+        super().__init__(color, "falcon", name, [(1, forward, True), (-1, forward, True), (0, -forward, True)])
 
-        if column_difference == 0 and row_difference == 0:
-            return False
-        if column_difference == row_difference:
-            return True
-        else:
-            return False
 
+# the shared piece of each piece code
+PIECES = (
+    Pawn('white', 'P'), Knight('white', 'N'), Bishop('white', 'B'), Rook('white', 'R'), Queen('white', 'Q'),
+    King('white', 'K'), Falcon('white', 'F'), Hunter('white', 'H'),
+    Pawn('black', 'p'), Knight('black', 'n'), Bishop('black', 'b'), Rook('black', 'r'), Queen('black', 'q'),
+    King('black', 'k'), Falcon('black', 'f'), Hunter('black', 'h'),
+)
 
-class Queen(ChessPiece):
+
+def get_chess_piece(name):
     """
-    Represents a Queen chess piece. Inherits from ChessPiece. Communicates with the BoardSquare class to get columns
-    and rows to define the pieces movement style. Communicates with Chessboard for the pieces to be added to the
-    chessboard dictionary when setting up the board. Communicates with ChessVar to share the pieces movement style.
+    Returns the shared piece with the given name, such as 'P' for a white pawn or 'h' for a black hunter.
     """
-    def __init__(self, color, name):
-        super().__init__(color, "queen", name)
+    return PIECES[PIECE_CODES[name]]
 
-    def valid_moves(self, current_square, new_square):
-        """
-        Defines the movement method of the queen piece. Returns True if the proposed move from current_square to
-        new_square is valid for the piece type. Returns False if the proposed move is not valid.
-        """
-        current_column = current_square.get_column()
-        current_row = current_square.get_row()
 
-        new_column = new_square.get_column()
-        new_row = new_square.get_row()
+# the pieces on each square index and the fairy pieces off the board at the start of the game, copied by the
+# chessboards to set up a new game
+START_SQUARES = tuple(get_chess_piece(name) if name != '.' else None
+                      for name in 'RNBQKBNR' + 'P' * 8 + '.' * 32 + 'p' * 8 + 'rnbqkbnr')
+START_OFF_BOARD = {'white': (get_chess_piece('F'), get_chess_piece('H')),
+                   'black': (get_chess_piece('f'), get_chess_piece('h'))}
 
-        column_difference = abs(new_column - current_column)
-        row_difference = abs(new_row - current_row)
+# the piece of each code in the square codes of a GameSnapshot, with None for EMPTY_CODE
+SNAPSHOT_PIECES = PIECES + (None,)
 
-        if column_difference == 0 and row_difference == 0:
-            return False
-        if new_column == current_column or new_row == current_row:
-            return True
-        if column_difference == row_difference:
-            return True
-        else:
-            return False
+# static evaluation, in centipawns: the material of each piece plus a bonus for its square, and the fairy pieces off
+# the board at a fraction of their value that grows as the player loses the queens, rooks, bishops and knights that
+# let them enter
+PIECE_VALUES = {
+    'pawn': 100, 'knight': 300, 'bishop': 320, 'rook': 500, 'queen': 900, 'king': 0, 'falcon': 450, 'hunter': 450,
+}
+MOBILITY_BONUS = 4  # for each square a piece reaches on an empty board, counting squares in the opponent's half
+#                    twice, beyond its average over every square
+PAWN_ADVANCE_BONUS = 10  # for each row a pawn has moved forward
+KING_ADVANCE_PENALTY = 20  # for each row the king has left its home row, as losing the king loses the game
+RESERVE_FACTORS = (0.7, 0.55, 0.4)  # for an off board fairy piece that may enter now, or after 1 or 2 more losses
 
 
-class King(ChessPiece):
+def _square_scores(piece):
     """
-    Represents a King chess piece. Inherits from ChessPiece. Communicates with the BoardSquare class to get columns
-    and rows to define the pieces movement style. Communicates with Chessboard for the pieces to be added to the
-    chessboard dictionary when setting up the board. Communicates with ChessVar to share the pieces movement style.
+    Returns a list of the evaluation of the piece on each square index, positive for white and negative for black.
+    Pieces other than pawns and kings get the mobility bonus for the squares they reach from each square on an empty
+    board. Reaching into the opponent's half counts for more, so Falcons and Hunters, which move differently forward
+    and backward, score squares differently to each other and to the pieces they move like.
     """
-    def __init__(self, color, name):
-        super().__init__(color, "king", name)
+    piece_type = piece.get_piece_type()
+    sign = 1 if piece.get_color() == 'white' else -1
+    opponent_half = sum(SQUARE_BITS[32:]) if sign == 1 else sum(SQUARE_BITS[:32])
+    reach = [bin(piece.get_attack_mask(index)).count('1') + bin(piece.get_attack_mask(index) & opponent_half).count('1')
+             for index in range(64)]
+    average_reach = sum(reach) / 64
+    scores = []
+    for index in range(64):
+        row = index // 8 if sign == 1 else 7 - index // 8  # rows forward from the player's home row
+        if piece_type == 'pawn':
+            bonus = PAWN_ADVANCE_BONUS * max(row - 1, 0)
+        elif piece_type == 'king':
+            bonus = -KING_ADVANCE_PENALTY * row
+        else:
+            bonus = round(MOBILITY_BONUS * (reach[index] - average_reach))
+        scores.append(sign * (PIECE_VALUES[piece_type] + bonus))
+    return scores
 
-    def valid_moves(self, current_square, new_square):
-        """
-        Defines the movement method of the king piece. Returns True if the proposed move from current_square to
-        new_square is valid for the piece type. Returns False if the proposed move is not valid.
-        """
-        current_column = current_square.get_column()
-        current_row = current_square.get_row()
 
-        new_column = new_square.get_column()
-        new_row = new_square.get_row()
+def _reserve_score(fairy_count, lost_piece_count):
+    """
+    Returns the value of a player's fairy_count fairy pieces off the board when they have lost lost_piece_count
+    queens, rooks, bishops and knights. The first fairy piece may enter after one loss and the second after two. The
+    Falcon and Hunter are worth the same, so it does not matter which is off the board.
+    """
+    score = 0
+    for entry in range(3 - fairy_count, 3):  # the first or second entry of the game
+        score += PIECE_VALUES['falcon'] * RESERVE_FACTORS[max(entry - lost_piece_count, 0)]
+    return round(score)
 
-        column_difference = abs(new_column - current_column)
-        row_difference = abs(new_row - current_row)
 
-        if column_difference > 1 or row_difference > 1:
-            return False
-        if column_difference == 0 and row_difference == 0:
-            return False
-        else:
-            return True
+# the evaluation of the piece of each code on each square index, and of the fairy pieces off the board by their number
+# and the lost piece count, capped at two
+SQUARE_SCORES = tuple(tuple(_square_scores(piece)) for piece in PIECES)
+RESERVE_SCORES = tuple(tuple(_reserve_score(fairy_count, lost_piece_count) for lost_piece_count in range(3))
+                       for fairy_count in range(3))
 
 
-class Pawn(ChessPiece):
+class Chessboard:
     """
-    Represents a Pawn chess piece. Inherits from ChessPiece. Communicates with the BoardSquare class to get columns
-    and rows to define the pieces movement style. Communicates with Chessboard for the pieces to be added to the
-    chessboard dictionary when setting up the board. Communicates with ChessVar to share the pieces movement style.
+    Represents the entire chess board and manages each position on the board. Communicates with ChessPiece and its
+    subclasses to place chess pieces on the board in a list of the 64 squares in square index order. Communicates with
+    ChessVar to provide board information and receive updates to the board. Communicates with BoardSquare to get and
+    set the columns and rows of each position on the board. Coordinate strings are only used by the public methods
+    that take a position; ChessVar works with square indices.
     """
-    def __init__(self, color, name, chessboard):
-        super().__init__(color, "pawn", name)
-        self._chessboard = chessboard
+    def __init__(self):
+        self._squares = [None] * 64  # the piece on each square index, or None if empty
+        self._off_board = {'white': [], 'black': []}
+        self._taken = {'white': [], 'black': []}
+        self.setup_new_game()  # initialize the board with pieces for the start of the game
+        self._board_square = BoardSquare(None)
 
-    def valid_moves(self, current_square, new_square):
+    def get_chessboard_dict(self):
         """
-        Defines the movement method of a pawn piece. Returns True if the proposed move from current_square to
-        new_square is valid for the piece type. Returns False if the proposed move is not valid.
+        Returns a read-only view of the board as a dictionary mapping each position to its piece, and the 'off_board_*'
+        and 'taken_*' keys to tuples of off board and taken pieces. The view is built from the board when called and
+        does not follow later moves. It cannot be changed: the board is changed with place_piece, remove_piece and the
+        other Chessboard methods.
         """
-        current_column = current_square.get_column()
-        current_row = current_square.get_row()
+        chessboard_dict = dict(zip(SQUARE_NAMES, self._squares))
+        for color in ('white', 'black'):
+            chessboard_dict['off_board_' + color] = tuple(self._off_board[color])
+            chessboard_dict['taken_' + color] = tuple(self._taken[color])
+        return types.MappingProxyType(chessboard_dict)
 
-        new_column = new_square.get_column()
-        new_row = new_square.get_row()
+    def get_piece(self, position):
+        """
+        Returns the chess piece at the given position, or None if the square is empty.
+        """
+        return self._squares[SQUARE_INDICES[position]]
 
-        column_difference = abs(new_column - current_column)
-        row_difference = (new_row - current_row)
+    def get_piece_at(self, index):
+        """
+        Returns the chess piece on the given square index, or None if the square is empty.
+        """
+        return self._squares[index]
 
-        # if there is a piece at the new square straight ahead (because pawns can't take forward)
-        if column_difference == 0 and self._chessboard.get_chessboard_dict()[new_square.get_square()]:
-            return False
+    def get_square_codes(self):
+        """
+        Returns 64 bytes holding the piece code on each square index, or EMPTY_CODE for an empty square.
+        """
+        return bytes([EMPTY_CODE if piece is None else PIECE_CODES[piece.get_name()] for piece in self._squares])
 
-        # if there is a piece diagonal one, the pawn can move and take it
-        if column_difference == 1 and self._chessboard.get_chessboard_dict()[new_square.get_square()]:
-            if self.get_color() == 'white' and row_difference == 1:
-                return True
-            if self.get_color() == 'black' and row_difference == -1:
-                return True
-
-        if self.get_color() == 'white':
-            if current_square.get_row() == 2:
-                if column_difference == 0 and (row_difference == 1 or row_difference == 2):
-                    return True
-                else:
-                    return False
-            else:
-                if column_difference == 0 and row_difference == 1:
-                    return True
-                else:
-                    return False
+    def copy(self):
+        """
+        Returns an independent copy of the chessboard, copying its lists but sharing the pieces.
+        """
+        chessboard = object.__new__(type(self))
+        chessboard._squares = self._squares[:]
+        chessboard._off_board = {'white': self._off_board['white'][:], 'black': self._off_board['black'][:]}
+        chessboard._taken = {'white': self._taken['white'][:], 'black': self._taken['black'][:]}
+        chessboard._board_square = self._board_square
+        return chessboard
 
-        else:  # black
-            if current_square.get_row() == 7:
-                if column_difference == 0 and (row_difference == -1 or row_difference == -2):
-                    return True
-                else:
-                    return False
-            else:
-                if column_difference == 0 and row_difference == -1:
-                    return True
-                else:
-                    return False
+    def get_off_board(self, color):
+        """
+        Returns the list of fairy pieces of the given color that have not yet entered the board.
+        """
+        return self._off_board[color]
 
+    def is_path_clear(self, current_index, new_index):
+        """
+        Returns True if every square strictly between the two square indices, which share a row, column or diagonal, is
+        empty, and False otherwise.
+        """
+        squares = self._squares
+        for index in BETWEEN_SQUARES[current_index][new_index]:
+            if squares[index]:
+                return False
+        return True
 
-class Hunter(ChessPiece):
-    """
-    Represents a Hunter chess piece. Inherits from ChessPiece. Communicates with the BoardSquare class to get columns
-    and rows to define the pieces movement style. Communicates with Chessboard for the pieces to be added to the
-    chessboard dictionary off board positions when setting up the board and adding the fairy piece to the board proper
-    via the enter_fairy_piece method of ChessVar. Communicates with ChessVar to share the pieces movement style.
-    """
+    def is_valid_move(self, current_index, new_index, color):
+        """
+        Returns True if the piece of the given color on the current square index can move to the new square index,
+        capturing any piece of the other color there, and False otherwise. A knight's squares share no row, column or
+        diagonal, so nothing is ever between them.
+        """
+        squares = self._squares
+        current_piece = squares[current_index]
+        if not current_piece or current_piece.get_color() != color:
+            return False
+        new_piece = squares[new_index]
+        if new_piece:
+            if new_piece.get_color() == color:
+                return False  # cannot take own piece
+            mask = current_piece.get_attack_mask(current_index)
+        else:
+            mask = current_piece.get_move_mask(current_index)
+        return bool(mask >> new_index & 1) and self.is_path_clear(current_index, new_index)
+
+    def board_packed_moves(self, color):
+        """
+        Returns a list of the legal board moves of the pieces of the given color, packed as by pack_move, walking each
+        piece's directions square by square from a1 to h8. Fairy piece entries are left to ChessVar.
+        """
+        squares = self._squares
+        moves = []
+        for index in range(64):
+            current_piece = squares[index]
+            if not current_piece or current_piece.get_color() != color:
+                continue
+            is_pawn = current_piece.get_piece_type() == 'pawn'
+            for column_step, row_step, slides in current_piece.get_move_directions():
+                for new_index in RAYS[column_step, row_step][index]:
+                    new_piece = squares[new_index]
+                    if new_piece and new_piece.get_color() == color:
+                        break  # cannot take own piece or move through it
+                    if not is_pawn:
+                        moves.append(index << 6 | new_index)
+                    else:
+                        mask = current_piece.get_attack_mask(index) if new_piece else current_piece.get_move_mask(index)
+                        if mask >> new_index & 1 and self.is_path_clear(index, new_index):
+                            moves.append(index << 6 | new_index)
+                    if new_piece or not slides:
+                        break  # the journey stops at a capture or after a single step
+        return moves
+
+    def capture_packed_moves(self, color):
+        """
+        Returns a list of the legal captures of the pieces of the given color, packed as by pack_move, in the same
+        order as board_packed_moves.
+        """
+        squares = self._squares
+        moves = []
+        for index in range(64):
+            current_piece = squares[index]
+            if not current_piece or current_piece.get_color() != color:
+                continue
+            attack_mask = current_piece.get_attack_mask(index)
+            for column_step, row_step, slides in current_piece.get_move_directions():
+                for new_index in RAYS[column_step, row_step][index]:
+                    new_piece = squares[new_index]
+                    if new_piece:
+                        if new_piece.get_color() != color and attack_mask >> new_index & 1:
+                            moves.append(index << 6 | new_index)
+                        break
+                    if not slides:
+                        break
+        return moves
+
+    def get_taken(self, color):
+        """
+        Returns the list of pieces of the given color that have been captured.
+        """
+        return self._taken[color]
 
-    def __init__(self, color, name):
-        super().__init__(color, "hunter", name)
+    def setup_new_game(self):
+        """
+        Sets up chess board for the start of the game, copying the START_SQUARES template in one go.
+        """
+        self._squares = list(START_SQUARES)
+        self._off_board = {'white': list(START_OFF_BOARD['white']), 'black': list(START_OFF_BOARD['black'])}
+        self._taken = {'white': [], 'black': []}
 
-    def valid_moves(self, current_square, new_square):
+    def set_position(self, pieces, off_board, taken):
         """
-        Defines the movement method of the hunter piece. Returns True if the proposed move from current_square to
-        new_square is valid for the piece type. Returns False if the proposed move is not valid.
+        Replaces the whole position with a list of the pieces on each square index (None for empty squares), and
+        dictionaries mapping each color to its list of off board and taken pieces.
         """
-        current_column = current_square.get_column()
-        current_row = current_square.get_row()
+        self._squares = list(pieces)
+        self._off_board = {color: list(off_board[color]) for color in ('white', 'black')}
+        self._taken = {color: list(taken[color]) for color in ('white', 'black')}
 
-        new_column = new_square.get_column()
-        new_row = new_square.get_row()
+    def set_square_codes(self, squares, off_board, taken):
+        """
+        Replaces the whole position with the piece codes on each square index (EMPTY_CODE for empty squares) and the
+        piece codes of the off board and taken pieces, in the form held by a GameSnapshot.
+        """
+        self._squares = list(map(SNAPSHOT_PIECES.__getitem__, squares))
+        self._off_board = {'white': [], 'black': []}
+        for code in off_board:
+            self._off_board[PIECES[code].get_color()].append(PIECES[code])
+        self._taken = {'white': [], 'black': []}
+        for code in taken:
+            self._taken[PIECES[code].get_color()].append(PIECES[code])
 
-        abs_column_difference = abs(new_column - current_column)
-        row_difference = new_row - current_row
-        abs_row_difference = abs(new_row - current_row)
+    def place_piece(self, chess_piece, position):
+        """
+        Places the chess piece on the board at the given position.
+        """
+        self._squares[SQUARE_INDICES[position]] = chess_piece
 
-        if self.get_color() == 'white':
-            if row_difference > 0:  # if white moving forward
-                if current_column == new_column:  # move like a rook
-                    return True
-                else:
-                    return False
-            else:  # if white moving backwards (or level)
-                if abs_row_difference == abs_column_difference:  # move like a bishop
-                    return True
-                else:
-                    return False
-        else:  # black
-            if row_difference < 0:  # if black moving forward
-                if current_column == new_column:  # move like a rook
-                    return True
-                else:
-                    return False
-            else:  # if black moving backwards (or level)
-                if abs_row_difference == abs_column_difference:  # move like a bishop
-                    return True
-                else:
-                    return False
+    def remove_piece(self, position):
+        """
+        Removes the chess piece at the given position from the board.
+        """
+        self._squares[SQUARE_INDICES[position]] = None
 
+    def take_piece(self, chess_piece):
+        """
+        Takes a chess_piece object and adds it to the appropriate taken_white or taken_black list depending on the
+        pieces color.
+        """
+        self._taken[chess_piece.get_color()].append(chess_piece)
 
-class Falcon(ChessPiece):
-    """
-    Represents a Falcon chess piece. Inherits from ChessPiece. Communicates with the BoardSquare class to get columns
-    and rows to define the pieces movement style. Communicates with Chessboard for the pieces to be added to the
-    chessboard dictionary off board positions when setting up the board and adding the fairy piece to the board proper
-    via the enter_fairy_piece method of ChessVar. Communicates with ChessVar to share the pieces movement style.
-    """
+    def enter_piece(self, fairy_piece, index):
+        """
+        Takes the name of an off board fairy piece ('F', 'H', 'f' or 'h'), removes it from the appropriate off_board
+        list and places it on the board at the given square index.
+        """
+        color = 'white' if fairy_piece.isupper() else 'black'
+        off_board_list = self._off_board[color]
+        for piece in off_board_list:
+            if piece.get_name() == fairy_piece:
+                off_board_list.remove(piece)
+                self._squares[index] = piece
+                return
 
-    def __init__(self, color, name):
-        super().__init__(color, "falcon", name)
+    def exit_piece(self, index):
+        """
+        Reverses enter_piece, removing the fairy piece at the given square index from the board and returning it to the
+        appropriate off_board list.
+        """
+        fairy_piece = self._squares[index]
+        off_board_list = self._off_board[fairy_piece.get_color()]
+        if fairy_piece.get_piece_type() == 'falcon':
+            off_board_list.insert(0, fairy_piece)  # keep the falcon ahead of the hunter
+        else:
+            off_board_list.append(fairy_piece)
+        self._squares[index] = None
+
+    def chessboard_position(self, current_position, new_position):
+        """
+        Updates the chessboard when a move is made. Removes any piece in the given new_position and adds it to the
+        taken list, and removes the piece in the given current_position and adds it to the new_position. Returns the
+        taken piece, or None if the move was not a capture.
+        """
+        return self.move_piece(SQUARE_INDICES[current_position], SQUARE_INDICES[new_position])
 
-    def valid_moves(self, current_square, new_square):
+    def move_piece(self, current_index, new_index):
         """
-        Defines the movement method of the falcon piece. Returns True if the proposed move from current_square to
-        new_square is valid for the piece type. Returns False if the proposed move is not valid.
+        Does the work of chessboard_position for square indices, returning the taken piece, or None if the move was not
+        a capture.
         """
-        current_column = current_square.get_column()
-        current_row = current_square.get_row()
+        squares = self._squares
+        # removes any piece at the new square from the board and adds it to the appropriate 'taken' list
+        taken_piece = squares[new_index]
+        if taken_piece:
+            self.take_piece(taken_piece)
 
-        new_column = new_square.get_column()
-        new_row = new_square.get_row()
+        # add the chess piece to the new square and removes it from the old square
+        squares[new_index] = squares[current_index]
+        squares[current_index] = None
+        return taken_piece
 
-        abs_column_difference = abs(new_column - current_column)
-        row_difference = new_row - current_row
-        abs_row_difference = abs(new_row - current_row)
+    def unmake_position(self, current_index, new_index, taken_piece):
+        """
+        Reverses move_piece, moving the piece on new_index back to current_index and returning the taken_piece (if any)
+        from the end of its 'taken' list to new_index.
+        """
+        squares = self._squares
+        squares[current_index] = squares[new_index]
+        if taken_piece:
+            self._taken[taken_piece.get_color()].pop()
+        squares[new_index] = taken_piece
 
-        if self.get_color() == 'white':
-            if row_difference > 0:  # if white moving forward
-                if abs_row_difference == abs_column_difference:  # move like a bishop
-                    return True
-                else:
-                    return False
-            else:  # if white moving backwards
-                if current_column == new_column:  # move like a rook
-                    return True
-                else:
-                    return False
-        else:
-            if row_difference < 0:  # if black moving forward
-                if abs_row_difference == abs_column_difference:  # move like a bishop
-                    return True
-                else:
-                    return False
-            else:  # if black moving backwards
-                if current_column == new_column:  # move like a rook
-                    return True
+    def show_chessboard(self):
+        """
+        Returns a readable chessboard for printing with each chess piece listed in its position.
+        """
+        columns = 8
+        rows = 8
+        chessboard_representation = ""
+        for row in range(rows - 1, -1, -1):  # iterate through in reverse order (start, stop, step)
+            for column in range(columns):
+                piece = self._squares[row * 8 + column]
+                if piece:
+                    chessboard_representation += f'{piece.get_name()}'
                 else:
-                    return False
+                    chessboard_representation += '-'
+                chessboard_representation += " "
+            chessboard_representation += "\n"  # insert a new line after each row
+        return chessboard_representation
 
 
-class Chessboard:
+# for each piece code and square index, a (ray mask, ray masks of the step, descending) tuple for each direction the
+# piece moves in from it, in the order of the piece's directions, for BitboardChessboard. The ray mask of a direction
+# the piece does not slide in holds only the first square, and a descending ray passes the squares from h8 towards a1.
+PIECE_RAYS = tuple(tuple(tuple((RAY_MASKS[column_step, row_step][index] if slides
+                                else SQUARE_BITS[RAYS[column_step, row_step][index][0]],
+                                RAY_MASKS[column_step, row_step], column_step + 8 * row_step < 0)
+                               for column_step, row_step, slides in piece.get_move_directions()
+                               if RAYS[column_step, row_step][index])
+                         for index in range(64))
+                   for piece in PIECES)
+PIECE_MOVE_MASKS = tuple(tuple(piece.get_move_mask(index) for index in range(64)) for piece in PIECES)
+PIECE_ATTACK_MASKS = tuple(tuple(piece.get_attack_mask(index) for index in range(64)) for piece in PIECES)
+
+
+class BitboardChessboard(Chessboard):
     """
-    Represents the entire chess board and manages each position on the board. Communicates with ChessPiece and its
-    subclasses to place chess pieces on the board in a chessboard dictionary with coordinates as the keys. Communicates
-    with ChessVar to provide board information and receive updates to the board. Communicates with BoardSquare to get
-    and set the columns and rows of each position on the board.
+    Represents the chess board as a set of 64-bit integers, one occupancy bitboard for each piece type and color, with
+    a mailbox list of piece codes for constant time lookup of the piece on a square. Off board fairy pieces and taken
+    pieces are kept as counters per piece code rather than lists of piece objects. Provides the same methods as
+    Chessboard so that ChessVar can use either backend, with get_chessboard_dict building an equivalent read-only view
+    on request. Moves are checked and generated on the occupancy of each color: a sliding piece's ray stops at the
+    first occupied square found by a bit scan, rather than looking at the squares one by one.
     """
+    _start_template = None  # (bitboards, occupied, side occupancy, mailbox, off board counts) at the start of the game
+
     def __init__(self):
-        self._chessboard_dict = {}  # initialize dictionary that maps positions to pieces
-        self.setup_new_game()  # initialize the board with pieces for the start of the game
+        self._bitboards = [0] * len(PIECE_CODES)  # one occupancy bitboard per piece code
+        self._occupied = 0  # union of every bitboard
+        self._sides = [0, 0]  # union of the bitboards of the white pieces, codes below 8, and of the black pieces
+        self._mailbox = [None] * 64  # piece code on each square index, or None if empty
+        self._off_board_counts = [0] * len(PIECE_CODES)
+        self._taken_counts = [0] * len(PIECE_CODES)
+        self._pieces = PIECES  # the shared piece of each piece code
+        self.setup_new_game()  # initialize the bitboards with pieces for the start of the game
         self._board_square = BoardSquare(None)
 
+    def get_bitboard(self, name):
+        """
+        Returns the occupancy bitboard for the piece with the given name, where bit n is set when square index n
+        (a1 = 0, b1 = 1, ... h8 = 63) holds that piece.
+        """
+        return self._bitboards[PIECE_CODES[name]]
+
+    def get_occupied(self):
+        """
+        Returns the bitboard of all occupied squares.
+        """
+        return self._occupied
+
+    def get_side_occupied(self, color):
+        """
+        Returns the bitboard of the squares occupied by the pieces of the given color.
+        """
+        return self._sides[color != 'white']
+
     def get_chessboard_dict(self):
         """
-        Returns the chessboard dictionary.
+        Returns a read-only view of the board built from the bitboards in the same layout as Chessboard, mapping
+        positions to pieces and the 'off_board_*' and 'taken_*' keys to tuples of pieces.
         """
-        return self._chessboard_dict
+        chessboard_dict = {}
+        for index in range(64):
+            chessboard_dict[SQUARE_NAMES[index]] = self.get_piece_at(index)
+        for color in ('white', 'black'):
+            chessboard_dict['off_board_' + color] = tuple(self.get_off_board(color))
+            chessboard_dict['taken_' + color] = tuple(self.get_taken(color))
+        return types.MappingProxyType(chessboard_dict)
+
+    def get_piece(self, position):
+        """
+        Returns the chess piece at the given position, or None if the square is empty.
+        """
+        return self.get_piece_at(SQUARE_INDICES[position])
+
+    def get_piece_at(self, index):
+        """
+        Returns the chess piece on the given square index, or None if the square is empty.
+        """
+        code = self._mailbox[index]
+        if code is None:
+            return None
+        return self._pieces[code]
+
+    def get_square_codes(self):
+        """
+        Returns 64 bytes holding the piece code on each square index, or EMPTY_CODE for an empty square.
+        """
+        return bytes([EMPTY_CODE if code is None else code for code in self._mailbox])
+
+    def copy(self):
+        """
+        Returns an independent copy of the bitboards, mailbox and counters.
+        """
+        chessboard = object.__new__(type(self))
+        chessboard._bitboards = self._bitboards[:]
+        chessboard._occupied = self._occupied
+        chessboard._sides = self._sides[:]
+        chessboard._mailbox = self._mailbox[:]
+        chessboard._off_board_counts = self._off_board_counts[:]
+        chessboard._taken_counts = self._taken_counts[:]
+        chessboard._pieces = self._pieces
+        chessboard._board_square = self._board_square
+        return chessboard
+
+    def get_off_board(self, color):
+        """
+        Returns a list of the fairy pieces of the given color that have not yet entered the board.
+        """
+        return self._pieces_from_counts(self._off_board_counts, color)
+
+    def is_path_clear(self, current_index, new_index):
+        """
+        Returns True if every square strictly between the two square indices, which share a row, column or diagonal, is
+        empty, testing the occupancy bitboard against a precomputed mask of the squares in between.
+        """
+        return not BETWEEN_MASKS[current_index][new_index] & self._occupied
+
+    def is_valid_move(self, current_index, new_index, color):
+        """
+        Returns True if the piece of the given color on the current square index can move to the new square index,
+        capturing any piece of the other color there, and False otherwise. The pieces are read from the mailbox, as
+        shifting a 64-bit integer makes a new one, and the piece's move or attack mask and the squares in between are
+        tested against the occupancy bitboard.
+        """
+        side = color != 'white'
+        code = self._mailbox[current_index]
+        if code is None or code >> 3 != side:
+            return False
+        new_code = self._mailbox[new_index]
+        if new_code is None:
+            mask = PIECE_MOVE_MASKS[code][current_index]
+        elif new_code >> 3 == side:
+            return False  # cannot take own piece
+        else:
+            mask = PIECE_ATTACK_MASKS[code][current_index]
+        return bool(mask & SQUARE_BITS[new_index]) and not BETWEEN_MASKS[current_index][new_index] & self._occupied
+
+    def board_packed_moves(self, color):
+        """
+        Returns a list of the legal board moves of the pieces of the given color, packed as by pack_move, in the same
+        order as Chessboard.board_packed_moves. Each ray is cut at its first occupied square, and the squares reached
+        are read off in the order the piece passes them.
+        """
+        own = self._sides[color != 'white']
+        occupied = self._occupied
+        mailbox = self._mailbox
+        moves = []
+        remaining = own
+        while remaining:
+            bit = remaining & -remaining
+            remaining ^= bit
+            index = bit.bit_length() - 1
+            code = mailbox[index]
+            origin = index << 6
+            if code & 7:
+                allowed = ~own
+            else:  # a pawn only moves onto empty squares and captures diagonally, along its move and attack tables
+                piece = self._pieces[code]
+                allowed = piece.get_move_mask(index) & ~occupied | piece.get_attack_mask(index) & occupied & ~own
+            for ray_mask, step_rays, descending in PIECE_RAYS[code][index]:
+                blockers = ray_mask & occupied
+                if blockers:
+                    first = blockers.bit_length() - 1 if descending else (blockers & -blockers).bit_length() - 1
+                    reach = ray_mask & ~step_rays[first] & allowed
+                else:
+                    reach = ray_mask & allowed
+                while reach:
+                    if descending:
+                        new_index = reach.bit_length() - 1
+                    else:
+                        new_index = (reach & -reach).bit_length() - 1
+                    reach ^= 1 << new_index
+                    if code & 7 or not BETWEEN_MASKS[index][new_index] & occupied:
+                        moves.append(origin | new_index)
+        return moves
+
+    def capture_packed_moves(self, color):
+        """
+        Returns a list of the legal captures of the pieces of the given color, packed as by pack_move, in the same
+        order as board_packed_moves. Only the first occupied square of each ray is looked at.
+        """
+        own = self._sides[color != 'white']
+        occupied = self._occupied
+        enemy = occupied & ~own
+        if not enemy:
+            return []
+        mailbox = self._mailbox
+        pieces = self._pieces
+        moves = []
+        remaining = own
+        while remaining:
+            bit = remaining & -remaining
+            remaining ^= bit
+            index = bit.bit_length() - 1
+            code = mailbox[index]
+            targets = pieces[code].get_attack_mask(index) & enemy
+            if not targets:
+                continue
+            for ray_mask, step_rays, descending in PIECE_RAYS[code][index]:
+                blockers = ray_mask & occupied
+                if blockers:
+                    first = blockers.bit_length() - 1 if descending else (blockers & -blockers).bit_length() - 1
+                    if targets >> first & 1:
+                        moves.append(index << 6 | first)
+        return moves
+
+    def get_taken(self, color):
+        """
+        Returns a list of the pieces of the given color that have been captured.
+        """
+        return self._pieces_from_counts(self._taken_counts, color)
+
+    def _pieces_from_counts(self, counts, color):
+        """
+        Expands a list of counters per piece code into a list of piece objects of the given color.
+        """
+        pieces = []
+        for code in range(len(PIECE_CODES)):
+            if counts[code] and self._pieces[code].get_color() == color:
+                pieces.extend([self._pieces[code]] * counts[code])
+        return pieces
 
     def setup_new_game(self):
         """
-        Sets up chess board for the start of the game.
-        """
-        white_rook = Rook(color='white', name='R')
-        self.place_piece(white_rook, 'a1')
-        white_knight = Knight(color='white', name='N')
-        self.place_piece(white_knight, 'b1')
-        white_bishop = Bishop(color='white', name='B')
-        self.place_piece(white_bishop, 'c1')
-        white_queen = Queen(color='white', name='Q')
-        self.place_piece(white_queen, 'd1')
-        white_king = King(color='white', name='K')
-        self.place_piece(white_king, 'e1')
-        self.place_piece(white_bishop, 'f1')
-        self.place_piece(white_knight, 'g1')
-        self.place_piece(white_rook, 'h1')
-
-        white_pawn = Pawn(color='white', name='P', chessboard=self)
-        self.place_piece(white_pawn, 'a2')
-        self.place_piece(white_pawn, 'b2')
-        self.place_piece(white_pawn, 'c2')
-        self.place_piece(white_pawn, 'd2')
-        self.place_piece(white_pawn, 'e2')
-        self.place_piece(white_pawn, 'f2')
-        self.place_piece(white_pawn, 'g2')
-        self.place_piece(white_pawn, 'h2')
-
-        self.place_piece(None, 'a3')
-        self.place_piece(None, 'b3')
-        self.place_piece(None, 'c3')
-        self.place_piece(None, 'd3')
-        self.place_piece(None, 'e3')
-        self.place_piece(None, 'f3')
-        self.place_piece(None, 'g3')
-        self.place_piece(None, 'h3')
-
-        self.place_piece(None, 'a4')
-        self.place_piece(None, 'b4')
-        self.place_piece(None, 'c4')
-        self.place_piece(None, 'd4')
-        self.place_piece(None, 'e4')
-        self.place_piece(None, 'f4')
-        self.place_piece(None, 'g4')
-        self.place_piece(None, 'h4')
-
-        self.place_piece(None, 'a5')
-        self.place_piece(None, 'b5')
-        self.place_piece(None, 'c5')
-        self.place_piece(None, 'd5')
-        self.place_piece(None, 'e5')
-        self.place_piece(None, 'f5')
-        self.place_piece(None, 'g5')
-        self.place_piece(None, 'h5')
-
-        self.place_piece(None, 'a6')
-        self.place_piece(None, 'b6')
-        self.place_piece(None, 'c6')
-        self.place_piece(None, 'd6')
-        self.place_piece(None, 'e6')
-        self.place_piece(None, 'f6')
-        self.place_piece(None, 'g6')
-        self.place_piece(None, 'h6')
-
-        black_pawn = Pawn(color='black', name='p', chessboard=self)
-        self.place_piece(black_pawn, 'a7')
-        self.place_piece(black_pawn, 'b7')
-        self.place_piece(black_pawn, 'c7')
-        self.place_piece(black_pawn, 'd7')
-        self.place_piece(black_pawn, 'e7')
-        self.place_piece(black_pawn, 'f7')
-        self.place_piece(black_pawn, 'g7')
-        self.place_piece(black_pawn, 'h7')
-
-        black_rook = Rook(color='black', name='r')
-        self.place_piece(black_rook, 'a8')
-        black_knight = Knight(color='black', name='n')
-        self.place_piece(black_knight, 'b8')
-        black_bishop = Bishop(color='black', name='b')
-        self.place_piece(black_bishop, 'c8')
-        black_queen = Queen(color='black', name='q')
-        self.place_piece(black_queen, 'd8')
-        black_king = King(color='black', name='k')
-        self.place_piece(black_king, 'e8')
-        self.place_piece(black_bishop, 'f8')
-        self.place_piece(black_knight, 'g8')
-        self.place_piece(black_rook, 'h8')
-
-        self._chessboard_dict['off_board_white'] = []
-        white_falcon = Falcon(color='white', name='F')
-        self._chessboard_dict['off_board_white'].append(white_falcon)
-        white_hunter = Hunter(color='white', name='H')
-        self._chessboard_dict['off_board_white'].append(white_hunter)
-
-        self._chessboard_dict['off_board_black'] = []
-        black_falcon = Falcon(color='black', name='f')
-        self._chessboard_dict['off_board_black'].append(black_falcon)
-        black_hunter = Hunter(color='black', name='h')
-        self._chessboard_dict['off_board_black'].append(black_hunter)
-
-        self._chessboard_dict['taken_white'] = []
-        self._chessboard_dict['taken_black'] = []
+        Sets up the bitboards for the start of the game by copying a template of the start position, which is built
+        from START_SQUARES the first time.
+        """
+        template = BitboardChessboard._start_template
+        if template is None:
+            self.set_position(START_SQUARES, START_OFF_BOARD, {'white': (), 'black': ()})
+            template = (self._bitboards[:], self._occupied, self._sides[:], self._mailbox[:],
+                        self._off_board_counts[:])
+            BitboardChessboard._start_template = template
+        self._bitboards = template[0][:]
+        self._occupied = template[1]
+        self._sides = template[2][:]
+        self._mailbox = template[3][:]
+        self._off_board_counts = template[4][:]
+        self._taken_counts = [0] * len(PIECE_CODES)
+
+    def _set_square(self, index, code):
+        """
+        Puts the piece with the given code on the square index, clearing whatever was there before. A code of None
+        leaves the square empty.
+        """
+        bit = 1 << index
+        old_code = self._mailbox[index]
+        if old_code is not None:
+            self._bitboards[old_code] &= ~bit
+            self._sides[old_code >> 3] &= ~bit
+            self._occupied &= ~bit
+        self._mailbox[index] = code
+        if code is not None:
+            self._bitboards[code] |= bit
+            self._sides[code >> 3] |= bit
+            self._occupied |= bit
+
+    def set_position(self, pieces, off_board, taken):
+        """
+        Replaces the whole position with a list of the pieces on each square index (None for empty squares), and
+        dictionaries mapping each color to its list of off board and taken pieces.
+        """
+        bitboards = [0] * len(PIECE_CODES)
+        mailbox = [None] * 64
+        occupied = 0
+        for index, piece in enumerate(pieces):
+            if piece:
+                code = PIECE_CODES[piece.get_name()]
+                mailbox[index] = code
+                bitboards[code] |= SQUARE_BITS[index]
+                occupied |= SQUARE_BITS[index]
+        self._bitboards = bitboards
+        self._occupied = occupied
+        self._sides = [sum(bitboards[:8]), sum(bitboards[8:])]
+        self._mailbox = mailbox
+        self._off_board_counts = [0] * len(PIECE_CODES)
+        self._taken_counts = [0] * len(PIECE_CODES)
+        for color in ('white', 'black'):
+            for piece in off_board[color]:
+                self._off_board_counts[PIECE_CODES[piece.get_name()]] += 1
+            for piece in taken[color]:
+                self._taken_counts[PIECE_CODES[piece.get_name()]] += 1
+
+    def set_square_codes(self, squares, off_board, taken):
+        """
+        Replaces the whole position with the piece codes on each square index (EMPTY_CODE for empty squares) and the
+        piece codes of the off board and taken pieces, in the form held by a GameSnapshot.
+        """
+        bitboards = [0] * len(PIECE_CODES)
+        for index, code in enumerate(squares):
+            if code != EMPTY_CODE:
+                bitboards[code] |= SQUARE_BITS[index]
+        occupied = 0
+        for bitboard in bitboards:
+            occupied |= bitboard
+        self._bitboards = bitboards
+        self._occupied = occupied
+        self._sides = [sum(bitboards[:8]), sum(bitboards[8:])]
+        self._mailbox = [None if code == EMPTY_CODE else code for code in squares]
+        self._off_board_counts = [0] * len(PIECE_CODES)
+        for code in off_board:
+            self._off_board_counts[code] += 1
+        self._taken_counts = [0] * len(PIECE_CODES)
+        for code in taken:
+            self._taken_counts[code] += 1
 
     def place_piece(self, chess_piece, position):
         """
         Places the chess piece on the board at the given position.
         """
-        self._chessboard_dict[position] = chess_piece
+        if chess_piece is None:
+            self._set_square(SQUARE_INDICES[position], None)
+        else:
+            self._set_square(SQUARE_INDICES[position], PIECE_CODES[chess_piece.get_name()])
 
     def remove_piece(self, position):
         """
         Removes the chess piece at the given position from the board.
         """
-        self._chessboard_dict[position] = None
+        self._set_square(SQUARE_INDICES[position], None)
 
     def take_piece(self, chess_piece):
         """
-        Takes a chess_piece object and adds it to the appropriate taken_white or taken_black list keys of the chessboard
-        dictionary depending on the pieces color.
+        Takes a chess_piece object and counts it as taken for its color.
         """
-        if chess_piece.get_color() == 'white':
-            self._chessboard_dict['taken_white'].append(chess_piece)
-        else:
-            self._chessboard_dict['taken_black'].append(chess_piece)
+        self._taken_counts[PIECE_CODES[chess_piece.get_name()]] += 1
+
+    def enter_piece(self, fairy_piece, index):
+        """
+        Takes the name of an off board fairy piece ('F', 'H', 'f' or 'h'), removes it from the off board counters and
+        places it on the board at the given square index.
+        """
+        code = PIECE_CODES[fairy_piece]
+        if self._off_board_counts[code]:
+            self._off_board_counts[code] -= 1
+            self._set_square(index, code)
+
+    def exit_piece(self, index):
+        """
+        Reverses enter_piece, removing the fairy piece at the given square index from the board and counting it as off
+        board again.
+        """
+        self._off_board_counts[self._mailbox[index]] += 1
+        self._set_square(index, None)
 
     def chessboard_position(self, current_position, new_position):
         """
-        Updates the position keys of the chessboard dictionary when a move is made. Removes any piece in the given
-        new_position and adds it to the taken position key, and removes the piece in the given current_position and adds
-        it to the new_position key. Returns True when the dictionary is updated.
+        Updates the bitboards when a move is made. Counts any piece in the given new_position as taken and moves the
+        piece in the given current_position to the new_position. Returns the taken piece, or None if the move was not a
+        capture.
         """
-        # removes any piece at the new position from the board and adds it to the appropriate 'taken' list
-        if self._chessboard_dict[new_position]:
-            taken_piece = self._chessboard_dict[new_position]
-            self.take_piece(taken_piece)
-            self.remove_piece(new_position)
+        return self.move_piece(SQUARE_INDICES[current_position], SQUARE_INDICES[new_position])
+
+    def move_piece(self, current_index, new_index):
+        """
+        Does the work of chessboard_position for square indices, returning the taken piece, or None if the move was not
+        a capture.
+        """
+        taken_code = self._mailbox[new_index]
+        self._set_square(new_index, self._mailbox[current_index])
+        self._set_square(current_index, None)
+        if taken_code is None:
+            return None
+        self._taken_counts[taken_code] += 1
+        return self._pieces[taken_code]
 
-        # add the chess piece to the new position and removes from the old position
-        chess_piece = self._chessboard_dict[current_position]
-        self.place_piece(chess_piece, new_position)
-        self.remove_piece(current_position)
+    def unmake_position(self, current_index, new_index, taken_piece):
+        """
+        Reverses move_piece, moving the piece on new_index back to current_index and returning the taken_piece (if any)
+        from the taken counters to new_index.
+        """
+        self._set_square(current_index, self._mailbox[new_index])
+        if taken_piece:
+            taken_code = PIECE_CODES[taken_piece.get_name()]
+            self._taken_counts[taken_code] -= 1
+            self._set_square(new_index, taken_code)
+        else:
+            self._set_square(new_index, None)
 
     def show_chessboard(self):
         """
         Returns a readable chessboard for printing with each chess piece listed in its position.
         """
-        columns = 8
-        rows = 8
         chessboard_representation = ""
-        for row in range(rows - 1, -1, -1):  # iterate through in reverse order (start, stop, step)
-            for column in range(columns):
-                position = f'{chr(column + 97)}{row + 1}'  # Convert indices to coordinates
-                piece = self._chessboard_dict[position]
-                if piece:
-                    chessboard_representation += f'{piece.get_name()}'
+        for row in range(7, -1, -1):
+            for column in range(8):
+                code = self._mailbox[row * 8 + column]
+                if code is not None:
+                    chessboard_representation += PIECE_NAMES[code]
                 else:
                     chessboard_representation += '-'
                 chessboard_representation += " "
-            chessboard_representation += "\n"  # insert a new line after each row
+            chessboard_representation += "\n"
         return chessboard_representation
@@ -1,4 +1,7 @@
 from ChessVar import *
+import copy
+import pickle
+import random
 import unittest
 
 
@@ -284,5 +287,526 @@ class TestSecondEnter(unittest.TestCase):
         print('Taken Black Pieces: ' + str(taken_black_names))
 
 
+class TestHunterPieceBitboard(TestHunterPiece):
+    def setUp(self):
+        # Initialize the ChessGame on the bitboard backend before each test
+        self._game = ChessVar(backend='bitboard')
+
+
+class TestFalconPieceBitboard(TestFalconPiece):
+    def setUp(self):
+        # Initialize the ChessGame on the bitboard backend before each test
+        self._game = ChessVar(backend='bitboard')
+
+
+class TestSecondEnterBitboard(TestSecondEnter):
+    def setUp(self):
+        # Initialize the ChessGame on the bitboard backend before each test
+        self._game = ChessVar(backend='bitboard')
+
+
+class TestBitboardBackend(unittest.TestCase):
+    def test_matches_dict_backend(self):
+        """Tests that the bitboard backend keeps the same board, bitboards and taken pieces as the dictionary backend
+        through a game with captures."""
+        dict_game = ChessVar()
+        bitboard_game = ChessVar(backend='bitboard')
+        for move in [('e2', 'e4'), ('d7', 'd5'), ('e4', 'd5'), ('d8', 'd5'), ('b1', 'c3'), ('d5', 'a2'),
+                     ('a1', 'a2'), ('e8', 'd8'), ('g1', 'f3')]:
+            self.assertEqual(dict_game.make_move(*move), bitboard_game.make_move(*move))
+        self.assertEqual(dict_game.get_chessboard().show_chessboard(),
+                         bitboard_game.get_chessboard().show_chessboard())
+        self.assertEqual(sorted(piece.get_name() for piece in dict_game.get_chessboard().get_taken('black')),
+                         sorted(piece.get_name() for piece in bitboard_game.get_chessboard().get_taken('black')))
+        self.assertEqual(bitboard_game.get_chessboard().get_bitboard('q'), 0)
+        self.assertEqual(bitboard_game.get_chessboard().get_bitboard('R'), 1 << 8 | 1 << 7)
+        self.assertEqual(bin(bitboard_game.get_chessboard().get_occupied()).count('1'), 28)
+        self.assertTrue(bitboard_game.enter_fairy_piece('f', 'e8'))
+        self.assertEqual(bitboard_game.get_chessboard().get_piece('e8').get_name(), 'f')
+        self.assertEqual([piece.get_name() for piece in bitboard_game.get_chessboard().get_off_board('black')], ['h'])
+
+    def test_chessboard_dict_is_read_only(self):
+        """Tests get_chessboard_dict gives the same read-only view on both backends, which cannot be changed."""
+        views = []
+        for backend in ('dict', 'bitboard'):
+            game = ChessVar(backend=backend)
+            self.assertTrue(game.make_move('e2', 'e4'))
+            view = game.get_chessboard().get_chessboard_dict()
+            with self.assertRaises(TypeError):
+                view['e4'] = None
+            with self.assertRaises(AttributeError):
+                view['off_board_white'].append(get_chess_piece('F'))
+            views.append(dict(view))
+        self.assertEqual(views[0], views[1])
+        self.assertEqual(views[0]['off_board_white'], (get_chess_piece('F'), get_chess_piece('H')))
+        self.assertEqual(views[0]['e4'].get_name(), 'P')
+
+    def test_path_checks_match_dict_backend(self):
+        """Tests that the bitboard backend's occupancy test of a journey agrees with the dictionary backend for every
+        pair of squares, and so does valid_move."""
+        dict_game = ChessVar()
+        bitboard_game = ChessVar(backend='bitboard')
+        for move in [('e2', 'e4'), ('d7', 'd5'), ('e4', 'd5'), ('d8', 'd5'), ('b1', 'c3'), ('d5', 'a2')]:
+            self.assertTrue(dict_game.make_move(*move) and bitboard_game.make_move(*move))
+        squares = [f'{column}{row}' for column in 'abcdefgh' for row in range(1, 9)]
+        for current_position in squares:
+            for new_position in squares:
+                current_index, new_index = SQUARE_INDICES[current_position], SQUARE_INDICES[new_position]
+                self.assertEqual(dict_game.get_chessboard().is_path_clear(current_index, new_index),
+                                 bitboard_game.get_chessboard().is_path_clear(current_index, new_index))
+                self.assertEqual(dict_game.valid_move(current_position, new_position),
+                                 bitboard_game.valid_move(current_position, new_position))
+        self.assertFalse(bitboard_game.get_chessboard().is_path_clear(SQUARE_INDICES['a1'], SQUARE_INDICES['a8']))
+        # the e2 pawn took on d5
+        self.assertTrue(bitboard_game.get_chessboard().is_path_clear(SQUARE_INDICES['e1'], SQUARE_INDICES['e3']))
+
+    def test_same_moves_in_same_order(self):
+        """Tests the bitboard backend's mask based move generation gives the same moves in the same order as the
+        dictionary backend through random games, with the side occupancy kept up to date."""
+        generator = random.Random(4)
+        for __ in range(10):
+            dict_game = ChessVar()
+            bitboard_game = ChessVar(backend='bitboard')
+            for __ in range(80):
+                if dict_game.get_game_state() != 'UNFINISHED':
+                    break
+                self.assertEqual(dict_game.legal_packed_moves(), bitboard_game.legal_packed_moves())
+                self.assertEqual(dict_game.capture_packed_moves(), bitboard_game.capture_packed_moves())
+                move = generator.choice(dict_game.get_legal_moves())
+                self.assertTrue(dict_game.play_move(move) and bitboard_game.play_move(move))
+            chessboard = bitboard_game.get_chessboard()
+            for color, names in (('white', 'PNBRQKFH'), ('black', 'pnbrqkfh')):
+                self.assertEqual(chessboard.get_side_occupied(color),
+                                 sum(chessboard.get_bitboard(name) for name in names))
+
+
+class TestLegalMoves(unittest.TestCase):
+    def brute_force_moves(self, game):
+        """Returns the set of legal moves found by trying valid_move on every pair of squares and valid_fairy_enter on
+        every square."""
+        moves = set()
+        if game.get_game_state() != 'UNFINISHED':
+            return moves
+        for current_position in SQUARE_NAMES:
+            for new_position in SQUARE_NAMES:
+                if game.valid_move(current_position, new_position):
+                    moves.add((current_position, new_position))
+        for fairy_piece in 'FHfh':
+            for entry_position in SQUARE_NAMES:
+                if game.valid_fairy_enter(fairy_piece, entry_position):
+                    moves.add((fairy_piece, entry_position))
+        return moves
+
+    def test_start_position(self):
+        """Tests the twenty opening moves are generated."""
+        game = ChessVar()
+        self.assertEqual(len(game.get_legal_moves()), 20)
+        self.assertIn(('e2', 'e4'), game.get_legal_moves())
+        self.assertNotIn(('e2', 'e5'), game.get_legal_moves())
+
+    def test_matches_brute_force(self):
+        """Tests the generated moves match a brute force search through random games on both backends, including
+        positions where fairy pieces can enter."""
+        for backend in ('dict', 'bitboard'):
+            generator = random.Random(7)
+            for __ in range(4):
+                game = ChessVar(backend=backend)
+                for __ in range(80):
+                    moves = game.get_legal_moves()
+                    self.assertEqual(len(moves), len(set(moves)))
+                    self.assertEqual(set(moves), self.brute_force_moves(game))
+                    if not moves:
+                        break
+                    captures = [move for move in moves if move[0] in 'FHfh' or
+                                game.get_chessboard().get_piece(move[1])]
+                    self.assertTrue(game.play_move(generator.choice(captures or moves)))
+
+    def test_packed_moves(self):
+        """Tests the packed legal moves and packed captures match the generated moves, in the same order, through
+        random games on both backends."""
+        for backend in ('dict', 'bitboard'):
+            generator = random.Random(8)
+            for __ in range(4):
+                game = ChessVar(backend=backend)
+                for __ in range(80):
+                    packed_moves = game.legal_packed_moves()
+                    self.assertEqual(packed_moves, [pack_move(move) for move in game.get_legal_moves()])
+                    self.assertEqual(game.capture_packed_moves(),
+                                     [move for move in packed_moves
+                                      if move < 4096 and game.get_chessboard().get_piece_at(move & 63)])
+                    if not packed_moves:
+                        break
+                    self.assertTrue(game.play_packed_move(generator.choice(packed_moves)))
+
+
+class TestUndoMove(unittest.TestCase):
+    def snapshot(self, game):
+        """Returns the board, off board and taken pieces, game state and turn of the game for comparison."""
+        chessboard = game.get_chessboard()
+        return (chessboard.show_chessboard(), game.get_game_state(), game.get_turn(),
+                [sorted(piece.get_name() for piece in chessboard.get_off_board(color)) for color in ('white', 'black')],
+                [sorted(piece.get_name() for piece in chessboard.get_taken(color)) for color in ('white', 'black')])
+
+    def test_undo_to_start(self):
+        """Tests every move of random games, including captures, fairy piece entries and king captures, can be taken
+        back one at a time to the start position on both backends."""
+        self.assertFalse(ChessVar().undo_move())
+        for backend in ('dict', 'bitboard'):
+            generator = random.Random(11)
+            for __ in range(4):
+                game = ChessVar(backend=backend)
+                snapshots = []
+                while game.get_game_state() == 'UNFINISHED' and len(snapshots) < 150:
+                    snapshots.append(self.snapshot(game))
+                    moves = game.get_legal_moves()
+                    captures = [move for move in moves if move[0] in 'FHfh' or
+                                game.get_chessboard().get_piece(move[1])]
+                    self.assertTrue(game.play_move(generator.choice(captures or moves)))
+                while snapshots:
+                    self.assertTrue(game.undo_move())
+                    self.assertEqual(self.snapshot(game), snapshots.pop())
+                self.assertFalse(game.undo_move())
+                self.assertEqual(len(game.get_legal_moves()), 20)
+
+    def test_undo_king_capture(self):
+        """Tests taking back a king capture returns the king and reopens the game."""
+        game = ChessVar()
+        for move in [('e2', 'e4'), ('f7', 'f6'), ('d1', 'h5'), ('a7', 'a6'), ('h5', 'e8')]:
+            self.assertTrue(game.play_move(move))
+        self.assertEqual(game.get_game_state(), 'WHITE_WON')
+        self.assertTrue(game.undo_move())
+        self.assertEqual(game.get_game_state(), 'UNFINISHED')
+        self.assertEqual(game.get_chessboard().get_piece('e8').get_name(), 'k')
+        self.assertEqual(game.get_turn(), 'white')
+
+
+class TestPositionHash(unittest.TestCase):
+    def test_incremental_hash_matches_full_hash(self):
+        """Tests the incrementally updated hash matches a hash computed from scratch through random games with captures
+        and fairy piece entries, and is restored by undo_move."""
+        for backend in ('dict', 'bitboard'):
+            generator = random.Random(5)
+            for __ in range(3):
+                game = ChessVar(backend=backend)
+                hashes = []
+                while game.get_game_state() == 'UNFINISHED' and len(hashes) < 120:
+                    self.assertEqual(game.get_hash(), game.compute_hash())
+                    hashes.append(game.get_hash())
+                    moves = game.get_legal_moves()
+                    captures = [move for move in moves if move[0] in 'FHfh' or
+                                game.get_chessboard().get_piece(move[1])]
+                    game.play_move(generator.choice(captures or moves))
+                self.assertEqual(game.get_hash(), game.compute_hash())
+                while hashes:
+                    game.undo_move()
+                    self.assertEqual(game.get_hash(), hashes.pop())
+
+    def test_transpositions(self):
+        """Tests the same position reached by different move orders has the same hash, and that the side to move
+        changes the hash."""
+        first_game = ChessVar()
+        second_game = ChessVar()
+        for move in [('g1', 'f3'), ('g8', 'f6'), ('b1', 'c3')]:
+            first_game.play_move(move)
+        for move in [('b1', 'c3'), ('g8', 'f6'), ('g1', 'f3')]:
+            second_game.play_move(move)
+        self.assertEqual(first_game.get_hash(), second_game.get_hash())
+        self.assertNotEqual(first_game.get_hash(), ChessVar().get_hash())
+
+        knights_home = ChessVar()
+        for move in [('g1', 'f3'), ('g8', 'f6'), ('f3', 'g1'), ('f6', 'g8')]:
+            knights_home.play_move(move)
+        self.assertEqual(knights_home.get_hash(), ChessVar().get_hash())
+        self.assertNotEqual(ChessVar(turn=1).get_hash(), ChessVar().get_hash())
+
+
+class TestJourneyTables(unittest.TestCase):
+    def test_between_squares(self):
+        """Tests the precomputed squares between aligned squares, and that other pairs have none."""
+        self.assertEqual(BETWEEN_NAMES[SQUARE_INDICES['a1']][SQUARE_INDICES['h8']],
+                         ('b2', 'c3', 'd4', 'e5', 'f6', 'g7'))
+        self.assertEqual(BETWEEN_NAMES[SQUARE_INDICES['h1']][SQUARE_INDICES['e1']], ('g1', 'f1'))
+        self.assertEqual(BETWEEN_NAMES[SQUARE_INDICES['d8']][SQUARE_INDICES['d5']], ('d7', 'd6'))
+        self.assertEqual(BETWEEN_SQUARES[SQUARE_INDICES['a1']][SQUARE_INDICES['b3']], ())
+        self.assertEqual(BETWEEN_SQUARES[SQUARE_INDICES['a1']][SQUARE_INDICES['b2']], ())
+        self.assertEqual(BETWEEN_MASKS[SQUARE_INDICES['a1']][SQUARE_INDICES['a3']], 1 << SQUARE_INDICES['a2'])
+
+    def test_journey_checks(self):
+        """Tests the horizontal, vertical and diagonal journey checks on both backends."""
+        for backend in ('dict', 'bitboard'):
+            game = ChessVar(backend=backend)
+            self.assertFalse(game.check_vertical_journey(1, 4, 1))  # a1 to a4 through the a2 pawn
+            self.assertTrue(game.check_vertical_journey(2, 4, 1))
+            self.assertFalse(game.check_horizontal_journey(1, 8, 1))
+            self.assertTrue(game.check_horizontal_journey(3, 6, 4))
+            self.assertFalse(game.check_diagonal_journey(1, 3, 3, 1))  # c1 to a3 through the b2 pawn
+            game.make_move('b2', 'b3')
+            self.assertTrue(game.check_diagonal_journey(1, 3, 3, 1))
+            self.assertFalse(game.valid_move('c1', 'a3'))  # black's turn
+            game.make_move('a7', 'a6')
+            self.assertTrue(game.valid_move('c1', 'a3'))
+            self.assertFalse(game.valid_move('f1', 'a6'))
+
+
+class TestBoardSquares(unittest.TestCase):
+    def test_interned_squares(self):
+        """Tests the board squares are shared, immutable and survive pickling as the same object."""
+        import pickle
+        square = get_board_square('e4')
+        self.assertIs(square, BOARD_SQUARES[SQUARE_INDICES['e4']])
+        self.assertEqual((square.get_column(), square.get_row(), square.get_index()), (5, 4, 28))
+        self.assertIs(pickle.loads(pickle.dumps(square)), square)
+        with self.assertRaises(AttributeError):
+            square._row = 5
+        self.assertFalse(get_board_square('i1').check_valid_square())
+        self.assertFalse(get_board_square('a9').check_valid_square())
+
+    def test_off_board_positions(self):
+        """Tests moves and entries to positions off the board are refused rather than raising."""
+        game = ChessVar()
+        self.assertFalse(game.valid_move('e2', 'e9'))
+        self.assertFalse(game.make_move('e2', 'z4'))
+        self.assertFalse(game.make_move('e0', 'e4'))
+        self.assertFalse(game.enter_fairy_piece('F', 'a0'))
+        self.assertEqual(game.get_turn(), 'white')
+
+
+class TestFlyweightPieces(unittest.TestCase):
+    def test_shared_pieces(self):
+        """Tests every game and backend uses the same immutable piece objects, and copies keep them."""
+        import copy
+        import pickle
+        for backend in ('dict', 'bitboard'):
+            game = ChessVar(backend=backend)
+            self.assertIs(game.get_chessboard().get_piece('a2'), get_chess_piece('P'))
+            self.assertIs(game.get_chessboard().get_off_board('white')[0], get_chess_piece('F'))
+            self.assertIs(copy.deepcopy(game).get_chessboard().get_piece('e8'), get_chess_piece('k'))
+            self.assertIs(pickle.loads(pickle.dumps(game)).get_chessboard().get_piece('h1'), get_chess_piece('R'))
+        with self.assertRaises(AttributeError):
+            get_chess_piece('Q')._color = 'black'
+        self.assertFalse(hasattr(get_chess_piece('p'), '__dict__'))
+
+    def test_move_tables(self):
+        """Tests the precomputed move and attack tables, including the forward and backward moves of the fairy
+        pieces, which are mirrored for black."""
+        def squares(mask):
+            return {SQUARE_NAMES[index] for index in range(64) if mask >> index & 1}
+
+        e4 = SQUARE_INDICES['e4']
+        self.assertEqual(squares(get_chess_piece('H').get_move_mask(e4)),
+                         {'e5', 'e6', 'e7', 'e8', 'd3', 'c2', 'b1', 'f3', 'g2', 'h1'})
+        self.assertEqual(squares(get_chess_piece('h').get_move_mask(e4)),
+                         {'e3', 'e2', 'e1', 'd5', 'c6', 'b7', 'a8', 'f5', 'g6', 'h7'})
+        self.assertEqual(squares(get_chess_piece('F').get_move_mask(e4)),
+                         {'d5', 'c6', 'b7', 'a8', 'f5', 'g6', 'h7', 'e3', 'e2', 'e1'})
+        self.assertEqual(squares(get_chess_piece('P').get_move_mask(SQUARE_INDICES['e2'])), {'e3', 'e4'})
+        self.assertEqual(squares(get_chess_piece('P').get_move_mask(SQUARE_INDICES['e3'])), {'e4'})
+        self.assertEqual(squares(get_chess_piece('p').get_attack_mask(SQUARE_INDICES['a7'])), {'b6'})
+        self.assertEqual(squares(get_chess_piece('N').get_attack_mask(SQUARE_INDICES['b1'])), {'a3', 'c3', 'd2'})
+
+    def test_valid_moves_needs_capture_flag(self):
+        """Tests valid_moves must be told by keyword whether the move captures, which decides a pawn's diagonal step."""
+        pawn = get_chess_piece('P')
+        e2, d3 = BOARD_SQUARES[SQUARE_INDICES['e2']], BOARD_SQUARES[SQUARE_INDICES['d3']]
+        self.assertTrue(pawn.valid_moves(e2, d3, is_capture=True))
+        self.assertFalse(pawn.valid_moves(e2, d3, is_capture=False))
+        with self.assertRaises(TypeError):
+            pawn.valid_moves(e2, d3)
+        with self.assertRaises(TypeError):
+            pawn.valid_moves(e2, d3, True)
+
+
+class TestPieceCounters(unittest.TestCase):
+    def test_counters_match_recount(self):
+        """Tests the taken, lost and off board counters kept by each move and undo match a recount of the board."""
+        generator = random.Random(7)
+        for backend in ('dict', 'bitboard'):
+            for __ in range(10):
+                game = ChessVar(backend=backend)
+                plies = 0
+                while game.get_game_state() == 'UNFINISHED' and plies < 120:
+                    moves = game.get_legal_moves()
+                    captures = [move for move in moves if move[0] not in FAIRY_NAMES and
+                                game.get_chessboard().get_piece(move[1])]
+                    game.play_move(generator.choice(captures or moves))
+                    plies += 1
+                counts = (game.get_lost_piece_count('white'), game.get_lost_piece_count('black'),
+                          game.get_legal_moves())
+                game.count_pieces()
+                self.assertEqual((game.get_lost_piece_count('white'), game.get_lost_piece_count('black'),
+                                  game.get_legal_moves()), counts)
+                self.assertEqual(game.get_game_state(), game.set_game_state())
+                while game.undo_move():
+                    pass
+                self.assertEqual((game.get_lost_piece_count('white'), game.get_lost_piece_count('black')), (0, 0))
+                self.assertEqual(game.get_game_state(), 'UNFINISHED')
+                self.assertEqual(game.get_legal_moves(), ChessVar().get_legal_moves())
+
+
+class TestEvaluation(unittest.TestCase):
+    def test_incremental_evaluation_matches_full_evaluation(self):
+        """Tests the evaluation kept by each move, entry and undo matches one computed from scratch, and carries over
+        to copies, snapshots and positions read back from to_fen."""
+        for backend in ('dict', 'bitboard'):
+            generator = random.Random(9)
+            for __ in range(4):
+                game = ChessVar(backend=backend)
+                evaluations = []
+                while game.get_game_state() == 'UNFINISHED' and len(evaluations) < 120:
+                    self.assertEqual(game.get_evaluation(), game.compute_evaluation())
+                    evaluations.append(game.get_evaluation())
+                    moves = game.get_legal_moves()
+                    captures = [move for move in moves if move[0] in 'FHfh' or
+                                game.get_chessboard().get_piece(move[1])]
+                    game.play_move(generator.choice(captures or moves))
+                self.assertEqual(game.get_evaluation(), game.compute_evaluation())
+                self.assertEqual(game.copy().get_evaluation(), game.get_evaluation())
+                self.assertEqual(ChessVar.from_snapshot(game.snapshot()).get_evaluation(), game.get_evaluation())
+                self.assertEqual(ChessVar.from_fen(game.to_fen()).get_evaluation(), game.get_evaluation())
+                while evaluations:
+                    game.undo_move()
+                    self.assertEqual(game.get_evaluation(), evaluations.pop())
+                game.reset()
+                self.assertEqual(game.get_evaluation(), 0)
+
+    def test_square_tables(self):
+        """Tests Falcons and Hunters score squares differently from each other, and black's tables mirror white's."""
+        falcon = SQUARE_SCORES[PIECE_CODES['F']]
+        hunter = SQUARE_SCORES[PIECE_CODES['H']]
+        self.assertNotEqual(falcon, hunter)
+        self.assertNotEqual(falcon, SQUARE_SCORES[PIECE_CODES['B']])
+        for name in PIECE_NAMES[:8]:
+            white = SQUARE_SCORES[PIECE_CODES[name]]
+            black = SQUARE_SCORES[PIECE_CODES[name.lower()]]
+            self.assertEqual([-score for score in black], [white[index ^ 56] for index in range(64)])
+
+    def test_reserve_unlocking(self):
+        """Tests a fairy piece off the board is worth more the closer its player is to letting it enter, and less
+        than on the board."""
+        self.assertEqual(RESERVE_SCORES[0], (0, 0, 0))
+        for fairy_count in (1, 2):
+            self.assertLess(RESERVE_SCORES[fairy_count][0], RESERVE_SCORES[fairy_count][1])
+            self.assertLessEqual(RESERVE_SCORES[fairy_count][1], RESERVE_SCORES[fairy_count][2])
+        self.assertLess(RESERVE_SCORES[1][2], PIECE_VALUES['falcon'])
+
+        # black took white's knight for a pawn, then white enters the Falcon it has unlocked
+        game = ChessVar()
+        for move in [('b1', 'c3'), ('d7', 'd5'), ('c3', 'd5'), ('d8', 'd5')]:
+            game.play_move(move)
+        before_entry = game.get_evaluation()
+        game.play_move(('F', 'b1'))
+        self.assertGreater(-game.get_evaluation(), before_entry)
+        self.assertEqual(game.get_evaluation(), game.compute_evaluation())
+
+
+class TestPositionFormat(unittest.TestCase):
+    def test_round_trip(self):
+        """Tests positions saved with to_fen load on both backends with the same hash, moves and counters."""
+        game = ChessVar()
+        for move in [('e2', 'e3'), ('b8', 'a6'), ('f1', 'a6'), ('b7', 'a6'), ('F', 'e2'), ('d7', 'd6')]:
+            self.assertTrue(game.play_move(move))
+        fen = game.to_fen()
+        self.assertEqual(fen, 'r1bqkbnr/p1p1pppp/p2p4/8/8/4P3/PPPPFPPP/RNBQK1NR w Hfh Bn 6')
+        for backend in ('dict', 'bitboard'):
+            loaded = ChessVar.from_fen(fen, backend)
+            self.assertEqual(loaded.to_fen(), fen)
+            self.assertEqual(loaded.get_hash(), game.get_hash())
+            self.assertEqual(loaded.get_lost_piece_count('white'), 1)
+            self.assertEqual(loaded.get_legal_moves(), game.get_legal_moves())
+            self.assertFalse(loaded.undo_move())
+        self.assertEqual(ChessVar().to_fen(), START_FEN)
+        self.assertEqual(ChessVar.from_fen('4k3/8/8/8/8/8/8/4K3 b FHfh QRr').get_turn(), 'black')
+
+    def test_same_string_on_both_backends(self):
+        """Tests the off board and taken pieces are written in the order of PIECE_NAMES, whatever the backend and the
+        order they were taken in."""
+        fens = []
+        for backend in ('dict', 'bitboard'):
+            game = ChessVar(backend=backend)
+            for move in [('b1', 'c3'), ('d7', 'd5'), ('c3', 'd5'), ('d8', 'd5'), ('e2', 'e4'), ('d5', 'e4')]:
+                self.assertTrue(game.play_move(move))
+            fens.append(game.to_fen())
+        self.assertEqual(fens[0], fens[1])
+        self.assertEqual(fens[0].split()[2:], ['FHfh', 'PNp', '6'])
+
+    def test_game_over(self):
+        """Tests a position with a taken king loads as won."""
+        game = ChessVar.from_fen('4Q3/8/8/8/8/8/8/4K3 b FHfh k 9')
+        self.assertEqual(game.get_game_state(), 'WHITE_WON')
+        self.assertEqual(game.get_legal_moves(), [])
+
+    def test_invalid_positions(self):
+        """Tests malformed positions raise ValueError."""
+        for fen in ['', '8/8/8/8/8/8/8 w - - 0', '9/8/8/8/8/8/8/8 w - - 0', '7/8/8/8/8/8/8/8 w - - 0',
+                    'x7/8/8/8/8/8/8/8 w - - 0', '8/8/8/8/8/8/8/8 white - - 0', '8/8/8/8/8/8/8/8 w FF - 0',
+                    '8/8/8/8/8/8/8/8 w Q - 0', '8/8/8/8/8/8/8/8 w - x 0', '8/8/8/8/8/8/8/8 w - - 1']:
+            with self.assertRaises(ValueError):
+                ChessVar.from_fen(fen)
+
+
+class TestCloning(unittest.TestCase):
+    def setUp(self):
+        self._game = ChessVar()
+        for move in [('e2', 'e3'), ('b8', 'a6'), ('f1', 'a6'), ('b7', 'a6'), ('F', 'e2'), ('d7', 'd6')]:
+            self._game.play_move(move)
+
+    def test_copy(self):
+        """Tests a copy plays and undoes moves without changing the original, on both backends."""
+        for backend in ('dict', 'bitboard'):
+            game = ChessVar.from_fen(self._game.to_fen(), backend)
+            game.play_move(('e2', 'd3'))
+            fen = game.to_fen()
+            for clone in (game.copy(), copy.copy(game), copy.deepcopy(game)):
+                self.assertIsInstance(clone.get_chessboard(), type(game.get_chessboard()))
+                self.assertEqual(clone.to_fen(), fen)
+                self.assertTrue(clone.play_move(('d6', 'd5')))
+                self.assertEqual(clone.get_hash(), clone.compute_hash())
+                self.assertTrue(clone.undo_move())
+                self.assertTrue(clone.undo_move())
+                self.assertEqual(game.to_fen(), fen)
+            self.assertEqual(game.get_chessboard().get_piece('d3').get_name(), 'F')
+
+    def test_snapshot(self):
+        """Tests a snapshot restores the position, counters and hash on either backend and is immutable."""
+        snapshot = self._game.snapshot()
+        self.assertEqual(len(snapshot.get_square_codes()), 64)
+        self.assertEqual(snapshot, ChessVar.from_fen(self._game.to_fen(), 'bitboard').snapshot())
+        self.assertEqual(pickle.loads(pickle.dumps(snapshot)), snapshot)
+        self.assertEqual(snapshot.get_hash(), self._game.get_hash())
+        with self.assertRaises(AttributeError):
+            snapshot._turn = 0
+        for backend in ('dict', 'bitboard'):
+            game = ChessVar.from_snapshot(snapshot, backend)
+            self.assertEqual(game.to_fen(), self._game.to_fen())
+            self.assertEqual(game.get_hash(), game.compute_hash())
+            self.assertEqual(game.get_lost_piece_count('white'), 1)
+            self.assertEqual(game.get_legal_moves(), self._game.get_legal_moves())
+            game.play_move(('e2', 'd3'))
+            self.assertNotEqual(game.snapshot(), snapshot)
+            game.restore(snapshot)
+            self.assertEqual(game.snapshot(), snapshot)
+            self.assertFalse(game.undo_move())
+
+    def test_snapshot_equality(self):
+        """Tests snapshots of one position are equal on both backends whatever order the pieces were taken in, and that
+        a piece placed directly rather than shared from PIECES can be snapshotted."""
+        snapshots = []
+        for backend in ('dict', 'bitboard'):
+            game = ChessVar(backend=backend)
+            for move in [('b1', 'c3'), ('d7', 'd5'), ('c3', 'd5'), ('d8', 'd5'), ('e2', 'e4'), ('d5', 'e4')]:
+                self.assertTrue(game.play_move(move))
+            snapshots.append(game.snapshot())
+        self.assertEqual(snapshots[0], snapshots[1])
+        self.assertEqual(snapshots[0].get_taken_codes(), bytes([PIECE_CODES['P'], PIECE_CODES['N'], PIECE_CODES['p']]))
+        for backend in ('dict', 'bitboard'):
+            game = ChessVar(backend=backend)
+            game.get_chessboard().remove_piece('e1')
+            game.get_chessboard().place_piece(King(color='white', name='K'), 'c1')
+            game.rehash()
+            self.assertEqual(game.snapshot().get_square_codes()[SQUARE_INDICES['c1']], PIECE_CODES['K'])
+            snapshots.append(game.snapshot())
+        self.assertEqual(snapshots[2], snapshots[3])
+
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,178 @@
+# Author: Ethan David Lee
+# GitHub username: ethandavidlee
+# Date: 2024/03/11
+# Description: Bounded pool of reusable Falcon-Hunter Chess games for servers and simulators that start many games.
+#           A game taken from the pool is at the start of the game; a game given back is reset, which copies the start
+#           position from a template instead of building a new ChessVar and Chessboard. At most max_size games are ever
+#           created, and acquire waits for a game to be given back once they are all in use. The benchmark compares
+#           building a new ChessVar for each game, resetting one ChessVar, and taking a game from the pool, reporting
+#           the time and the memory allocated for each game.
+#           Usage: python GamePool.py [--games N] [--backend dict|bitboard]
+
+import argparse
+import sys
+import threading
+import time
+import tracemalloc
+
+from ChessVar import ChessVar
+
+
+class GamePool:
+    """
+    Represents a bounded pool of ChessVar games at the start of the game. Games are created when first needed, up to
+    max_size, and reset when they are given back so that acquire only has to hand one out. Safe to share between
+    threads.
+    """
+    def __init__(self, max_size=64, backend='dict'):
+        if backend not in ('dict', 'bitboard'):
+            raise ValueError(f"unknown chessboard backend '{backend}', expected 'dict' or 'bitboard'")
+        if max_size < 1:
+            raise ValueError('max_size must be at least 1')
+        self._max_size = max_size
+        self._backend = backend
+        self._games = []  # games given back and reset, most recently given back last
+        self._in_use = {}  # the games acquired and not yet given back, by id
+        self._created = 0
+        self._condition = threading.Condition()
+
+    def get_max_size(self):
+        """
+        Returns the most games the pool will create.
+        """
+        return self._max_size
+
+    def get_created(self):
+        """
+        Returns the number of games the pool has created.
+        """
+        return self._created
+
+    def get_available(self):
+        """
+        Returns the number of games in the pool waiting to be acquired.
+        """
+        return len(self._games)
+
+    def get_in_use(self):
+        """
+        Returns the number of games acquired and not yet given back.
+        """
+        return len(self._in_use)
+
+    def acquire(self, timeout=None):
+        """
+        Returns a game at the start of the game, reusing one given back if there is one and otherwise creating one if
+        fewer than max_size have been created. When every game is in use, waits up to timeout seconds in all (forever
+        if None) for one to be given back, and raises RuntimeError if none is.
+        """
+        with self._condition:
+            if not self._condition.wait_for(lambda: self._games or self._created < self._max_size, timeout):
+                raise RuntimeError(f'all {self._max_size} games of the pool are in use')
+            if self._games:
+                game = self._games.pop()
+            else:
+                self._created += 1
+                game = ChessVar(backend=self._backend)
+            self._in_use[id(game)] = game
+            return game
+
+    def release(self, game):
+        """
+        Resets a game taken from the pool and gives it back. Raises ValueError, leaving the game as it is, if the game
+        was not acquired from the pool or has already been given back.
+        """
+        with self._condition:
+            if self._in_use.get(id(game)) is not game:
+                raise ValueError('game was not acquired from the pool or has already been given back')
+            del self._in_use[id(game)]
+        game.reset()
+        with self._condition:
+            self._games.append(game)
+            self._condition.notify()
+
+    def game(self, timeout=None):
+        """
+        Returns a context manager that acquires a game and gives it back when the block ends.
+        """
+        return _PooledGame(self, timeout)
+
+
+class _PooledGame:
+    """
+    Context manager returned by GamePool.game, giving the acquired game to the with block.
+    """
+    def __init__(self, pool, timeout):
+        self._pool = pool
+        self._timeout = timeout
+        self._game = None
+
+    def __enter__(self):
+        self._game = self._pool.acquire(self._timeout)
+        return self._game
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self._pool.release(self._game)
+        self._game = None
+
+
+def benchmark(games=10000, backend='dict'):
+    """
+    Starts games games, making one move in each, by building a new ChessVar, by resetting one ChessVar and by using a
+    GamePool, and returns a dictionary mapping each way to (microseconds per game, bytes allocated per game). The
+    bytes are the peak memory traced by tracemalloc while starting a game, measured in a separate pass so tracing
+    does not slow the timed one.
+    """
+    game = ChessVar(backend=backend)
+    pool = GamePool(1, backend)
+
+    def new_game():
+        ChessVar(backend=backend).make_move('e2', 'e4')
+
+    def reset_game():
+        game.reset()
+        game.make_move('e2', 'e4')
+
+    def pooled_game():
+        pooled = pool.acquire()
+        pooled.make_move('e2', 'e4')
+        pool.release(pooled)
+
+    results = {}
+    for name, start_game in (('new', new_game), ('reset', reset_game), ('pool', pooled_game)):
+        start_game()
+        start = time.perf_counter()
+        for __ in range(games):
+            start_game()
+        seconds = time.perf_counter() - start
+
+        allocation_games = min(games, 1000)
+        allocated = 0
+        tracemalloc.start()
+        for __ in range(allocation_games):
+            current, __ = tracemalloc.get_traced_memory()
+            tracemalloc.reset_peak()
+            start_game()
+            allocated += tracemalloc.get_traced_memory()[1] - current
+        tracemalloc.stop()
+        results[name] = (seconds / games * 1e6, allocated / allocation_games)
+    return results
+
+
+def main(argv=None):
+    """
+    Runs the benchmark from the command line and prints the time and memory allocated for each game.
+    """
+    parser = argparse.ArgumentParser(description='Compare new, reset and pooled Falcon-Hunter Chess games.')
+    parser.add_argument('--games', type=int, default=10000, help='games started each way')
+    parser.add_argument('--backend', choices=['dict', 'bitboard'], default='dict', help='chessboard backend')
+    args = parser.parse_args(argv)
+
+    results = benchmark(args.games, args.backend)
+    for name, (microseconds, allocated) in results.items():
+        print(f'{name:<6} {microseconds:8.2f} us per game  {allocated:8.0f} bytes allocated per game')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
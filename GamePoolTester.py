@@ -0,0 +1,96 @@
+from GamePool import *
+from ChessVar import ChessVar
+import threading
+import time
+import unittest
+
+
+class TestGamePool(unittest.TestCase):
+    def test_reset(self):
+        """Tests a reset game matches a new game, with both chessboard backends."""
+        for backend in ('dict', 'bitboard'):
+            game = ChessVar(backend=backend)
+            for move in (('b1', 'c3'), ('d7', 'd5'), ('c3', 'd5'), ('d8', 'd5'), ('F', 'b1')):
+                self.assertTrue(game.play_move(move))
+            game.reset()
+            new_game = ChessVar(backend=backend)
+            self.assertEqual(game.to_fen(), new_game.to_fen())
+            self.assertEqual(game.get_hash(), new_game.compute_hash())
+            self.assertEqual(game.get_legal_moves(), new_game.get_legal_moves())
+            self.assertFalse(game.undo_move())
+            self.assertTrue(game.play_move(('e2', 'e4')))
+            self.assertEqual(game.get_hash(), game.compute_hash())
+        self.assertEqual(ChessVar(turn=1).get_hash(), ChessVar(turn=1).compute_hash())
+
+    def test_pool(self):
+        """Tests the pool reuses reset games, creates no more than max_size and waits for a game to be given back."""
+        pool = GamePool(2)
+        with pool.game() as game:
+            game.make_move('e2', 'e4')
+        first = pool.acquire()
+        self.assertIs(first, game)
+        self.assertEqual(first.get_turn(), 'white')
+        second = pool.acquire()
+        self.assertEqual((pool.get_created(), pool.get_in_use(), pool.get_available()), (2, 2, 0))
+        with self.assertRaises(RuntimeError):
+            pool.acquire(timeout=0.01)
+        threading.Timer(0.05, pool.release, (second,)).start()
+        self.assertIs(pool.acquire(timeout=5.0), second)
+        pool.release(first)
+        pool.release(second)
+        with self.assertRaises(ValueError):
+            pool.release(ChessVar())
+
+    def test_release_checks_game(self):
+        """Tests a game given back twice while another is in use is refused, so no game is handed out twice, and a
+        game from outside the pool is refused without being reset."""
+        pool = GamePool(2)
+        first = pool.acquire()
+        second = pool.acquire()
+        pool.release(first)
+        with self.assertRaises(ValueError):
+            pool.release(first)
+        self.assertEqual((pool.get_in_use(), pool.get_available()), (1, 1))
+        self.assertIs(pool.acquire(), first)
+        with self.assertRaises(RuntimeError):
+            pool.acquire(timeout=0.01)
+        outsider = ChessVar()
+        outsider.make_move('e2', 'e4')
+        with self.assertRaises(ValueError):
+            pool.release(outsider)
+        self.assertEqual(outsider.get_turn(), 'black')
+        pool.release(second)
+        pool.release(first)
+        self.assertEqual((pool.get_in_use(), pool.get_available()), (0, 2))
+
+    def test_timeout_is_overall(self):
+        """Tests acquire gives up after its timeout in all, even when woken before then without a game to take."""
+        pool = GamePool(1)
+        game = pool.acquire()
+        stop = threading.Event()
+
+        def wake_waiters():
+            while not stop.wait(0.02):
+                with pool._condition:
+                    pool._condition.notify_all()
+        waker = threading.Thread(target=wake_waiters)
+        waker.start()
+        try:
+            start = time.monotonic()
+            with self.assertRaises(RuntimeError):
+                pool.acquire(timeout=0.1)
+            self.assertLess(time.monotonic() - start, 1.0)
+        finally:
+            stop.set()
+            waker.join()
+        pool.release(game)
+
+    def test_benchmark(self):
+        """Tests the benchmark reports a time and allocation for each way of starting a game."""
+        results = benchmark(20)
+        self.assertEqual(set(results), {'new', 'reset', 'pool'})
+        self.assertLess(results['reset'][1], results['new'][1])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,269 @@
+# Author: Ethan David Lee
+# GitHub username: ethandavidlee
+# Date: 2024/03/11
+# Description: Compact binary archive of Falcon-Hunter Chess games. Each move, including fairy piece entries, is packed
+#           into 16 bits with ChessVar.pack_move, and each game is appended to the file as a 4-byte record header (move
+#           count and result) followed by its moves. When a writer closes the file it appends an index of the offset
+#           of every game and records where the index starts in the file header, so that a reader can jump straight to
+#           any game through mmap. A file left without an index, for example by a crash, is still readable from the
+#           start, and reopening it for writing carries on appending after the last complete game.
+#           File layout (little-endian):
+#               header  magic b'FHGR', version u16, reserved u16, index offset u64 (0 while open), game count u64
+#               game    move count u16, result u8, reserved u8, then one u16 packed move per move
+#               index   one u64 file offset per game, from the index offset to the end of the file
+
+from array import array
+import mmap
+import os
+import struct
+import sys
+
+from ChessVar import ChessVar, pack_move, unpack_move
+
+MAGIC = b'FHGR'
+VERSION = 1
+HEADER = struct.Struct('<4sHHQQ')
+RECORD_HEADER = struct.Struct('<HBB')
+MAX_MOVES = 0xFFFF
+RESULTS = (None, 'UNFINISHED', 'WHITE_WON', 'BLACK_WON')  # results in result code order, None when not recorded
+RESULT_CODES = {result: code for code, result in enumerate(RESULTS)}
+READ_CHUNK_BYTES = 1 << 16
+
+
+def _read_header(header_bytes, path):
+    """
+    Unpacks and checks a file header, returning a tuple of the index offset and the game count.
+    """
+    if len(header_bytes) < HEADER.size:
+        raise ValueError(f"'{path}' is too short to be a game record file")
+    magic, version, __, index_offset, game_count = HEADER.unpack_from(header_bytes)
+    if magic != MAGIC:
+        raise ValueError(f"'{path}' is not a game record file")
+    if version != VERSION:
+        raise ValueError(f"'{path}' is game record version {version}, expected {VERSION}")
+    return index_offset, game_count
+
+
+def _packed_moves(move_bytes):
+    """
+    Returns an array of the little-endian 16-bit packed moves in move_bytes.
+    """
+    packed_moves = array('H', move_bytes)
+    if sys.byteorder == 'big':
+        packed_moves.byteswap()
+    return packed_moves
+
+
+def _scan_records(buffer, end):
+    """
+    Returns a list of the offsets of the complete game records in buffer from the end of the header up to end,
+    ignoring a record cut short at the end.
+    """
+    offsets = []
+    offset = HEADER.size
+    while offset + RECORD_HEADER.size <= end:
+        move_count = RECORD_HEADER.unpack_from(buffer, offset)[0]
+        record_end = offset + RECORD_HEADER.size + 2 * move_count
+        if record_end > end:
+            break
+        offsets.append(offset)
+        offset = record_end
+    return offsets
+
+
+class GameRecordWriter:
+    """
+    Represents a game record file open for appending games. Creates the file if it does not exist, otherwise carries on
+    after its last game. The index is rewritten when the writer is closed.
+    """
+    def __init__(self, path):
+        self._path = path
+        if os.path.exists(path) and os.path.getsize(path) > 0:
+            self._file = open(path, 'r+b')
+            index_offset, game_count = _read_header(self._file.read(HEADER.size), path)
+            if index_offset:
+                self._file.seek(index_offset)
+                index_bytes = self._file.read(8 * game_count)
+                self._offsets = list(struct.unpack(f'<{game_count}Q', index_bytes))
+                end = index_offset
+            else:
+                self._file.seek(0)
+                file_bytes = self._file.read()
+                self._offsets = _scan_records(file_bytes, len(file_bytes))
+                end = HEADER.size
+                if self._offsets:
+                    move_count = RECORD_HEADER.unpack_from(file_bytes, self._offsets[-1])[0]
+                    end = self._offsets[-1] + RECORD_HEADER.size + 2 * move_count
+            self._file.truncate(end)  # drop the old index, or a game cut short, before appending
+        else:
+            self._file = open(path, 'w+b')
+            self._offsets = []
+        self._write_header(0)
+        self._file.seek(0, os.SEEK_END)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def get_game_count(self):
+        """
+        Returns the number of games in the file, including those written by this writer.
+        """
+        return len(self._offsets)
+
+    def write_game(self, moves, result=None):
+        """
+        Appends a game given as a sequence of moves in the form generated by ChessVar.legal_moves, with its result
+        ('UNFINISHED', 'WHITE_WON', 'BLACK_WON' or None if not known). Returns the game's id.
+        """
+        return self.write_packed_game([pack_move(move) for move in moves], result)
+
+    def write_packed_game(self, packed_moves, result=None):
+        """
+        Appends a game given as a sequence of moves packed by pack_move, with its result. Returns the game's id.
+        """
+        if len(packed_moves) > MAX_MOVES:
+            raise ValueError(f'a game record holds at most {MAX_MOVES} moves, not {len(packed_moves)}')
+        if result not in RESULT_CODES:
+            raise ValueError(f"unknown result '{result}'")
+        move_array = array('H', packed_moves)
+        if sys.byteorder == 'big':
+            move_array.byteswap()
+        self._offsets.append(self._file.tell())
+        self._file.write(RECORD_HEADER.pack(len(move_array), RESULT_CODES[result], 0))
+        self._file.write(move_array.tobytes())
+        return len(self._offsets) - 1
+
+    def close(self):
+        """
+        Writes the index of game offsets and the header pointing to it, then closes the file.
+        """
+        if self._file.closed:
+            return
+        self._file.seek(0, os.SEEK_END)
+        index_offset = self._file.tell()
+        self._file.write(struct.pack(f'<{len(self._offsets)}Q', *self._offsets))
+        self._write_header(index_offset)
+        self._file.close()
+
+    def _write_header(self, index_offset):
+        """
+        Writes the file header with the given index offset and the current game count.
+        """
+        self._file.seek(0)
+        self._file.write(HEADER.pack(MAGIC, VERSION, 0, index_offset, len(self._offsets)))
+
+
+class GameRecordReader:
+    """
+    Represents a game record file mapped into memory for random access to games by id. Only the index is read when the
+    file is opened; a game's moves are read when it is asked for. Iterating over the reader yields (moves, result)
+    tuples in game id order.
+    """
+    def __init__(self, path):
+        self._path = path
+        self._file = open(path, 'rb')
+        self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        index_offset, game_count = _read_header(self._mmap, path)
+        if index_offset:
+            self._offsets = struct.unpack_from(f'<{game_count}Q', self._mmap, index_offset)
+        else:
+            self._offsets = _scan_records(self._mmap, len(self._mmap))  # not closed by its writer
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def __len__(self):
+        return len(self._offsets)
+
+    def __iter__(self):
+        for game_id in range(len(self._offsets)):
+            yield self.get_moves(game_id), self.get_result(game_id)
+
+    def get_game_count(self):
+        """
+        Returns the number of games in the file.
+        """
+        return len(self._offsets)
+
+    def get_packed_moves(self, game_id):
+        """
+        Returns an array of the packed moves of the game with the given id.
+        """
+        offset = self._offsets[game_id]
+        move_count = RECORD_HEADER.unpack_from(self._mmap, offset)[0]
+        start = offset + RECORD_HEADER.size
+        return _packed_moves(self._mmap[start:start + 2 * move_count])
+
+    def get_moves(self, game_id):
+        """
+        Returns a list of the moves of the game with the given id, in the form generated by ChessVar.legal_moves.
+        """
+        return [unpack_move(packed_move) for packed_move in self.get_packed_moves(game_id)]
+
+    def get_result(self, game_id):
+        """
+        Returns the recorded result of the game with the given id, or None if it was not recorded.
+        """
+        return RESULTS[RECORD_HEADER.unpack_from(self._mmap, self._offsets[game_id])[1]]
+
+    def close(self):
+        """
+        Unmaps and closes the file.
+        """
+        self._mmap.close()
+        self._file.close()
+
+
+def read_games(path, packed=False, first_game=0):
+    """
+    Streams the games of a game record file from first_game onward, reading the file in chunks rather than mapping it,
+    and yields a (moves, result) tuple for each. Moves are in the form generated by ChessVar.legal_moves, or arrays of
+    packed moves if packed is True.
+    """
+    with open(path, 'rb') as record_file:
+        index_offset, __ = _read_header(record_file.read(HEADER.size), path)
+        remaining = (index_offset or os.fstat(record_file.fileno()).st_size) - HEADER.size
+        buffer = b''
+        position = 0  # where the next game starts in buffer
+        game_id = 0
+        while True:
+            record_size = RECORD_HEADER.size
+            if len(buffer) - position >= record_size:
+                record_size += 2 * RECORD_HEADER.unpack_from(buffer, position)[0]
+            if len(buffer) - position < record_size:
+                chunk = record_file.read(min(max(READ_CHUNK_BYTES, record_size), remaining))
+                remaining -= len(chunk)
+                buffer = buffer[position:] + chunk
+                position = 0
+                if len(buffer) < record_size:
+                    return  # the end of the games, or the last game was cut short
+                continue  # the record header may only now be complete
+            if game_id >= first_game:
+                move_count, result_code, __ = RECORD_HEADER.unpack_from(buffer, position)
+                packed_moves = _packed_moves(buffer[position + RECORD_HEADER.size:position + record_size])
+                if packed:
+                    yield packed_moves, RESULTS[result_code]
+                else:
+                    yield [unpack_move(packed_move) for packed_move in packed_moves], RESULTS[result_code]
+            position += record_size
+            game_id += 1
+
+
+def replay_game(packed_moves, game=None):
+    """
+    Plays the packed moves of a game on game, or on a new ChessVar, stopping at the first illegal move. Returns a tuple
+    of the game and the number of the illegal move counting from 0, or None if every move was legal.
+    """
+    if game is None:
+        game = ChessVar()
+    play_packed_move = game.play_packed_move
+    for ply, packed_move in enumerate(packed_moves):
+        if not play_packed_move(packed_move):
+            return game, ply
+    return game, None
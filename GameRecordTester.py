@@ -0,0 +1,87 @@
+from GameRecord import *
+from ChessVar import ChessVar, pack_move
+import os
+import random
+import tempfile
+import unittest
+
+
+def random_game(generator, max_plies=80):
+    """Returns the moves and result of a random game."""
+    game = ChessVar()
+    moves = []
+    while game.get_game_state() == 'UNFINISHED' and len(moves) < max_plies:
+        move = generator.choice(game.get_legal_moves())
+        game.play_move(move)
+        moves.append(move)
+    return moves, game.get_game_state()
+
+
+class TestGameRecord(unittest.TestCase):
+    def setUp(self):
+        self._directory = tempfile.TemporaryDirectory()
+        self._path = os.path.join(self._directory.name, 'games.fhgr')
+        generator = random.Random(3)
+        self._games = [random_game(generator) for __ in range(20)] + [([], None)]
+
+    def tearDown(self):
+        self._directory.cleanup()
+
+    def test_round_trip(self):
+        """Tests games written to a file are read back the same by random access and by streaming."""
+        with GameRecordWriter(self._path) as writer:
+            for game_id, (moves, result) in enumerate(self._games):
+                self.assertEqual(writer.write_game(moves, result), game_id)
+        # a 24 byte header, then 4 bytes per game record header, 2 per move and 8 per index entry
+        self.assertEqual(os.path.getsize(self._path), 24 + sum(12 + 2 * len(moves) for moves, __ in self._games))
+        with GameRecordReader(self._path) as reader:
+            self.assertEqual(len(reader), len(self._games))
+            self.assertEqual(reader.get_moves(7), self._games[7][0])
+            self.assertEqual(reader.get_result(7), self._games[7][1])
+            self.assertEqual(list(reader), self._games)
+        self.assertEqual(list(read_games(self._path)), self._games)
+        self.assertEqual([list(moves) for moves, __ in read_games(self._path, packed=True, first_game=19)],
+                         [[pack_move(move) for move in self._games[19][0]], []])
+
+    def test_append_and_recover(self):
+        """Tests reopening a file appends after its games, and a file never closed is read up to its last complete
+        game."""
+        with GameRecordWriter(self._path) as writer:
+            writer.write_game(*self._games[0])
+        writer = GameRecordWriter(self._path)
+        self.assertEqual(writer.write_game(*self._games[1]), 1)
+        writer.write_game(*self._games[2])
+        writer._file.flush()
+        with open(self._path, 'ab') as record_file:
+            record_file.write(b'\x05\x00\x00')  # half a record header left by a crash
+        self.assertEqual(list(read_games(self._path)), self._games[:3])
+        with GameRecordReader(self._path) as reader:
+            self.assertEqual(reader.get_moves(2), self._games[2][0])
+        writer._file.close()
+
+        with GameRecordWriter(self._path) as writer:
+            self.assertEqual(writer.get_game_count(), 3)
+            writer.write_game(*self._games[3])
+        self.assertEqual(list(read_games(self._path)), self._games[:4])
+
+    def test_replay(self):
+        """Tests replaying packed moves reaches the recorded result and stops at an illegal move."""
+        moves, result = self._games[0]
+        game, illegal_ply = replay_game([pack_move(move) for move in moves])
+        self.assertIsNone(illegal_ply)
+        self.assertEqual(game.get_game_state(), result)
+        game, illegal_ply = replay_game([pack_move(('e2', 'e4')), pack_move(('e2', 'e4'))])
+        self.assertEqual(illegal_ply, 1)
+
+    def test_invalid_file(self):
+        """Tests a file that is not a game record raises ValueError."""
+        with open(self._path, 'wb') as record_file:
+            record_file.write(b'not a game record file')
+        with self.assertRaises(ValueError):
+            GameRecordReader(self._path)
+        with self.assertRaises(ValueError):
+            next(read_games(self._path))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,515 @@
+# Author: Ethan David Lee
+# GitHub username: ethandavidlee
+# Date: 2024/03/11
+# Description: Asyncio server hosting many Falcon-Hunter Chess games over local TCP, one ChessVar per session, and a
+#           load test client. Clients send one JSON request per line and receive one JSON response per line with the
+#           same id; a connection may have several requests in flight, and the requests of each session are applied
+#           in the order they arrived. A connection stops being read while it has max_pending requests in flight and
+#           the server waits for each response to be sent, so slow clients are held back rather than queued without
+#           limit. A session belongs to the connection that opened it: other connections cannot use it, and it is
+#           closed when that connection ends. Sessions left idle longer than idle_timeout are evicted, and new sessions
+#           are refused once max_sessions are open.
+#           Requests:  {"id": 1, "op": "new"}                                 optionally with "fen" and "backend"
+#                      {"id": 2, "op": "move", "session": 1, "move": ["e2", "e4"]}   or ["F", "e2"] to enter a fairy
+#                      {"id": 3, "op": "state", "session": 1}
+#                      {"id": 4, "op": "moves", "session": 1}
+#                      {"id": 5, "op": "close", "session": 1}
+#           Responses: {"id": 2, "ok": true, "game_state": "UNFINISHED", "turn": "black"}
+#                      {"id": 2, "ok": false, "error": "illegal move"}
+#           Usage: python GameServer.py serve [--host HOST] [--port PORT] [--max-sessions N] [--idle-timeout SECONDS]
+#                  python GameServer.py load-test [--host HOST] [--port PORT] [--clients N] [--moves N]
+
+import argparse
+import asyncio
+import itertools
+import json
+import random
+import sys
+import time
+
+from ChessVar import ChessVar
+
+DEFAULT_PORT = 8765
+
+
+class GameSession:
+    """
+    Represents one game hosted by the server, with the lock that keeps its requests in order, the time it was last
+    used and whether it has been closed.
+    """
+    def __init__(self, session_id, game):
+        self._session_id = session_id
+        self._game = game
+        self._lock = asyncio.Lock()
+        self._last_used = time.monotonic()
+        self._closed = False
+
+    def get_session_id(self):
+        """
+        Returns the session's id.
+        """
+        return self._session_id
+
+    def get_game(self):
+        """
+        Returns the session's ChessVar.
+        """
+        return self._game
+
+    def get_lock(self):
+        """
+        Returns the asyncio.Lock held while a request of the session is applied.
+        """
+        return self._lock
+
+    def touch(self):
+        """
+        Marks the session as used now.
+        """
+        self._last_used = time.monotonic()
+
+    def get_idle_seconds(self):
+        """
+        Returns the number of seconds since the session was last used.
+        """
+        return time.monotonic() - self._last_used
+
+    def close(self):
+        """
+        Marks the session as closed, so requests still waiting for its lock are refused.
+        """
+        self._closed = True
+
+    def is_closed(self):
+        """
+        Returns True if the session has been closed, evicted or dropped when the server closed.
+        """
+        return self._closed
+
+
+class GameServer:
+    """
+    Represents the asyncio TCP server and its sessions. Communicates with ChessVar to apply each session's moves
+    through make_move and enter_fairy_piece.
+    """
+    def __init__(self, host='127.0.0.1', port=DEFAULT_PORT, max_sessions=10000, idle_timeout=300.0, max_pending=32,
+                 backend='dict'):
+        self._host = host
+        self._port = port
+        self._max_sessions = max_sessions
+        self._idle_timeout = idle_timeout
+        self._max_pending = max_pending
+        self._backend = backend
+        self._sessions = {}
+        self._session_ids = itertools.count(1)
+        self._server = None
+        self._eviction_task = None
+        self._connection_tasks = set()  # the task handling each open connection
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.close()
+
+    async def start(self):
+        """
+        Starts listening and evicting idle sessions. Returns the port listened on, which is chosen by the system when
+        the server was created with port 0.
+        """
+        self._server = await asyncio.start_server(self._handle_connection, self._host, self._port)
+        self._port = self._server.sockets[0].getsockname()[1]
+        self._eviction_task = asyncio.create_task(self._evict_periodically())
+        return self._port
+
+    async def serve_forever(self):
+        """
+        Starts the server if needed and serves until cancelled.
+        """
+        if self._server is None:
+            await self.start()
+        await self._server.serve_forever()
+
+    async def close(self):
+        """
+        Stops listening, stops evicting sessions, closes every open connection and drops every session.
+        """
+        tasks = list(self._connection_tasks)
+        if self._eviction_task is not None:
+            tasks.append(self._eviction_task)
+            self._eviction_task = None
+        if self._server is not None:
+            self._server.close()
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        if self._server is not None:
+            await self._server.wait_closed()
+            self._server = None
+        for session in list(self._sessions.values()):
+            self._close_session(session)
+
+    def get_port(self):
+        """
+        Returns the port the server listens on.
+        """
+        return self._port
+
+    def get_session_count(self):
+        """
+        Returns the number of open sessions.
+        """
+        return len(self._sessions)
+
+    def evict_idle_sessions(self):
+        """
+        Closes every session idle for longer than idle_timeout that has no request being applied, and returns the
+        number of sessions closed.
+        """
+        idle_sessions = [session_id for session_id, session in self._sessions.items()
+                         if session.get_idle_seconds() > self._idle_timeout and not session.get_lock().locked()]
+        for session_id in idle_sessions:
+            self._close_session(self._sessions[session_id])
+        return len(idle_sessions)
+
+    def _close_session(self, session):
+        """
+        Closes a session and forgets it.
+        """
+        session.close()
+        del self._sessions[session.get_session_id()]
+
+    async def _evict_periodically(self):
+        """
+        Evicts idle sessions a few times per idle_timeout until cancelled.
+        """
+        while True:
+            await asyncio.sleep(max(self._idle_timeout / 4, 0.01))
+            self.evict_idle_sessions()
+
+    async def _handle_connection(self, reader, writer):
+        """
+        Reads the requests of one connection, applying up to max_pending of them at a time. When the server is closed
+        the requests still being applied are cancelled. The sessions the connection opened are closed when it ends.
+        """
+        connection_task = asyncio.current_task()
+        self._connection_tasks.add(connection_task)
+        pending = asyncio.Semaphore(self._max_pending)
+        write_lock = asyncio.Lock()
+        session_ids = set()  # the ids of the sessions opened by this connection and not yet closed
+        tasks = set()
+        try:
+            while True:
+                await pending.acquire()  # stop reading while the connection has max_pending requests in flight
+                try:
+                    line = await reader.readline()
+                except (ConnectionError, asyncio.LimitOverrunError, ValueError):
+                    break
+                if not line:
+                    break
+                task = asyncio.create_task(self._respond(line, session_ids, writer, write_lock, pending))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+            if tasks:
+                await asyncio.gather(*tasks, return_exceptions=True)
+        except asyncio.CancelledError:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+        finally:
+            self._connection_tasks.discard(connection_task)
+            for session_id in session_ids:
+                if session_id in self._sessions:
+                    self._close_session(self._sessions[session_id])
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except (ConnectionError, asyncio.CancelledError):
+                pass
+
+    async def _respond(self, line, session_ids, writer, write_lock, pending):
+        """
+        Applies one request on the connection with the given session ids and sends its response, releasing its place
+        among the connection's pending requests. A request that fails in an unexpected way is still answered, with an
+        error response.
+        """
+        try:
+            request_id = None
+            try:
+                request = json.loads(line)
+                if not isinstance(request, dict):
+                    raise ValueError('request is not an object')
+            except ValueError:
+                response = {'ok': False, 'error': 'invalid request'}
+            else:
+                request_id = request.get('id')
+                try:
+                    response = await self._handle_request(request, session_ids)
+                except Exception as error:
+                    response = {'ok': False, 'error': f'internal error: {type(error).__name__}'}
+            response['id'] = request_id
+            async with write_lock:
+                writer.write(json.dumps(response).encode() + b'\n')
+                await writer.drain()  # wait for a slow client to take the response before reading more requests
+        except ConnectionError:
+            pass
+        finally:
+            pending.release()
+
+    async def _handle_request(self, request, session_ids):
+        """
+        Applies a request from the connection that opened the sessions with the given ids, and returns its response,
+        without the id. The sessions of other connections are unknown to it.
+        """
+        op = request.get('op')
+        if op == 'new':
+            return self._new_session(request, session_ids)
+        session_id = request.get('session')
+        if not isinstance(session_id, int) or isinstance(session_id, bool):
+            return {'ok': False, 'error': 'invalid session'}
+        session = self._sessions.get(session_id) if session_id in session_ids else None
+        if session is None:
+            return {'ok': False, 'error': 'unknown session'}
+        async with session.get_lock():  # keeps the requests of a session in the order they arrived
+            if session.is_closed():  # closed while the request waited its turn
+                return {'ok': False, 'error': 'unknown session'}
+            session.touch()
+            game = session.get_game()
+            if op == 'move':
+                move = request.get('move')
+                if not (isinstance(move, list) and len(move) == 2 and all(isinstance(part, str) for part in move)):
+                    return {'ok': False, 'error': 'invalid move'}
+                if not game.play_move(move):
+                    return {'ok': False, 'error': 'illegal move'}
+                return {'ok': True, 'game_state': game.get_game_state(), 'turn': game.get_turn()}
+            if op == 'state':
+                return {'ok': True, 'game_state': game.get_game_state(), 'turn': game.get_turn(), 'fen': game.to_fen()}
+            if op == 'moves':
+                return {'ok': True, 'moves': game.get_legal_moves()}
+            if op == 'close':
+                self._close_session(session)
+                session_ids.discard(session_id)
+                return {'ok': True}
+        return {'ok': False, 'error': f'unknown op {op!r}'}
+
+    def _new_session(self, request, session_ids):
+        """
+        Opens a session at the start of the game, or at the position of the request's fen, adds its id to the given
+        session ids of the connection and returns the response.
+        """
+        if len(self._sessions) >= self._max_sessions:
+            self.evict_idle_sessions()
+            if len(self._sessions) >= self._max_sessions:
+                return {'ok': False, 'error': 'too many sessions'}
+        backend = request.get('backend', self._backend)
+        if backend not in ('dict', 'bitboard'):
+            return {'ok': False, 'error': 'unknown backend'}
+        try:
+            game = ChessVar.from_fen(request['fen'], backend) if 'fen' in request else ChessVar(backend=backend)
+        except (ValueError, AttributeError):
+            return {'ok': False, 'error': 'invalid fen'}
+        session_id = next(self._session_ids)
+        self._sessions[session_id] = GameSession(session_id, game)
+        session_ids.add(session_id)
+        return {'ok': True, 'session': session_id, 'turn': game.get_turn()}
+
+
+class GameClient:
+    """
+    Represents a connection to a GameServer. Requests can be sent concurrently; each is matched to its response by id.
+    """
+    def __init__(self, reader, writer):
+        self._reader = reader
+        self._writer = writer
+        self._request_ids = itertools.count(1)
+        self._responses = {}
+        self._read_task = asyncio.create_task(self._read_responses())
+
+    @classmethod
+    async def connect(cls, host='127.0.0.1', port=DEFAULT_PORT):
+        """
+        Returns a client connected to the server at host and port.
+        """
+        reader, writer = await asyncio.open_connection(host, port)
+        return cls(reader, writer)
+
+    async def request(self, op, **fields):
+        """
+        Sends a request with the given op and fields and returns the server's response as a dictionary. Raises
+        ConnectionError if the connection has closed.
+        """
+        if self._read_task.done():
+            raise ConnectionError('connection closed')
+        request_id = next(self._request_ids)
+        response = asyncio.get_running_loop().create_future()
+        self._responses[request_id] = response
+        self._writer.write(json.dumps({'id': request_id, 'op': op, **fields}).encode() + b'\n')
+        await self._writer.drain()
+        return await response
+
+    async def close(self):
+        """
+        Closes the connection.
+        """
+        self._writer.close()
+        try:
+            await self._writer.wait_closed()
+        except ConnectionError:
+            pass
+        await self._read_task
+
+    async def _read_responses(self):
+        """
+        Hands each response to the request waiting for it, until the connection closes.
+        """
+        try:
+            while True:
+                line = await self._reader.readline()
+                if not line:
+                    break
+                response = json.loads(line)
+                future = self._responses.pop(response.get('id'), None)
+                if future is not None and not future.done():
+                    future.set_result(response)
+        except ConnectionError:
+            pass
+        finally:
+            for future in self._responses.values():
+                if not future.done():
+                    future.set_exception(ConnectionError('connection closed'))
+            self._responses.clear()
+
+
+class LoadTestReport:
+    """
+    Represents the outcome of a load test: the latency of every move request and the total time taken.
+    """
+    def __init__(self, latencies, errors, seconds):
+        self._latencies = sorted(latencies)
+        self._errors = errors
+        self._seconds = seconds
+
+    def get_moves(self):
+        """
+        Returns the number of moves made.
+        """
+        return len(self._latencies)
+
+    def get_errors(self):
+        """
+        Returns the number of requests that failed.
+        """
+        return self._errors
+
+    def get_seconds(self):
+        """
+        Returns the time taken by the whole load test.
+        """
+        return self._seconds
+
+    def get_moves_per_second(self):
+        """
+        Returns the number of moves made per second across every client.
+        """
+        return len(self._latencies) / self._seconds if self._seconds > 0 else 0.0
+
+    def get_latency(self, percentile):
+        """
+        Returns the move latency in milliseconds at the given percentile, such as 50 or 99, or 0.0 with no moves.
+        """
+        if not self._latencies:
+            return 0.0
+        index = min(len(self._latencies) - 1, int(len(self._latencies) * percentile / 100))
+        return self._latencies[index] * 1000
+
+
+async def _load_test_client(host, port, moves, generator, latencies):
+    """
+    Plays random legal moves on a new session as one load test client, starting a new session when a game ends, and
+    returns the number of failed requests.
+    """
+    client = await GameClient.connect(host, port)
+    errors = 0
+    game = ChessVar()
+    session = (await client.request('new'))['session']
+    try:
+        for __ in range(moves):
+            if game.get_game_state() != 'UNFINISHED':
+                await client.request('close', session=session)
+                game.reset()
+                session = (await client.request('new'))['session']
+            move = generator.choice(game.get_legal_moves())
+            game.play_move(move)
+            start = time.perf_counter()
+            response = await client.request('move', session=session, move=list(move))
+            latencies.append(time.perf_counter() - start)
+            if not response['ok']:
+                errors += 1
+        await client.request('close', session=session)
+    finally:
+        await client.close()
+    return errors
+
+
+async def load_test(host='127.0.0.1', port=DEFAULT_PORT, clients=100, moves=50, seed=0):
+    """
+    Runs clients concurrent load test clients against the server, each on its own connection and session, making
+    moves random legal moves. Returns a LoadTestReport.
+    """
+    generator = random.Random(seed)
+    latencies = []
+    start = time.perf_counter()
+    errors = await asyncio.gather(*[_load_test_client(host, port, moves, random.Random(generator.random()), latencies)
+                                    for __ in range(clients)])
+    return LoadTestReport(latencies, sum(errors), time.perf_counter() - start)
+
+
+async def _run_load_test(args):
+    """
+    Runs the load test of the command line against the given server, or against a server in this process if no port
+    was given, and prints the report.
+    """
+    if args.port is None:
+        async with GameServer(args.host, 0) as server:
+            report = await load_test(args.host, server.get_port(), args.clients, args.moves, args.seed)
+    else:
+        report = await load_test(args.host, args.port, args.clients, args.moves, args.seed)
+    print(f'clients {args.clients}  moves {report.get_moves()}  errors {report.get_errors()}  '
+          f'{report.get_seconds():.3f}s  {report.get_moves_per_second():.0f} moves/s')
+    print(f'latency p50 {report.get_latency(50):.3f}ms  p99 {report.get_latency(99):.3f}ms')
+    return 0 if not report.get_errors() else 1
+
+
+def main(argv=None):
+    """
+    Runs the server or the load test from the command line.
+    """
+    parser = argparse.ArgumentParser(description='Falcon-Hunter Chess game server.')
+    commands = parser.add_subparsers(dest='command', required=True)
+    serve = commands.add_parser('serve', help='run the server')
+    serve.add_argument('--host', default='127.0.0.1')
+    serve.add_argument('--port', type=int, default=DEFAULT_PORT)
+    serve.add_argument('--max-sessions', type=int, default=10000)
+    serve.add_argument('--idle-timeout', type=float, default=300.0, help='seconds before an idle session is evicted')
+    serve.add_argument('--backend', choices=['dict', 'bitboard'], default='dict', help='chessboard backend')
+    load = commands.add_parser('load-test', help='measure move latency, against a local server if no port is given')
+    load.add_argument('--host', default='127.0.0.1')
+    load.add_argument('--port', type=int)
+    load.add_argument('--clients', type=int, default=100)
+    load.add_argument('--moves', type=int, default=50, help='moves made by each client')
+    load.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+
+    if args.command == 'serve':
+        server = GameServer(args.host, args.port, args.max_sessions, args.idle_timeout, backend=args.backend)
+        try:
+            asyncio.run(server.serve_forever())
+        except KeyboardInterrupt:
+            pass
+        return 0
+    return asyncio.run(_run_load_test(args))
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,117 @@
+from GameServer import *
+import asyncio
+import unittest
+
+
+class TestGameServer(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self._server = GameServer(port=0, max_sessions=3, idle_timeout=60.0, max_pending=2)
+        await self._server.start()
+        self._client = await GameClient.connect(port=self._server.get_port())
+
+    async def asyncTearDown(self):
+        await self._client.close()
+        await self._server.close()
+
+    async def test_session(self):
+        """Tests moves are applied to a session through make_move and enter_fairy_piece, and illegal moves and
+        unknown sessions are refused."""
+        session = (await self._client.request('new'))['session']
+        response = await self._client.request('move', session=session, move=['e2', 'e4'])
+        self.assertEqual(response, {'id': 2, 'ok': True, 'game_state': 'UNFINISHED', 'turn': 'black'})
+        response = await self._client.request('move', session=session, move=['f', 'd7'])
+        self.assertEqual(response['error'], 'illegal move')
+        response = await self._client.request('state', session=session)
+        self.assertEqual(response['fen'], 'rnbqkbnr/pppppppp/8/8/4P3/8/PPPP1PPP/RNBQKBNR b FHfh - 1')
+        self.assertIn(['e7', 'e5'], (await self._client.request('moves', session=session))['moves'])
+        self.assertTrue((await self._client.request('close', session=session))['ok'])
+        self.assertEqual((await self._client.request('state', session=session))['error'], 'unknown session')
+        self.assertEqual((await self._client.request('new', fen='bad'))['error'], 'invalid fen')
+
+    async def test_malformed_requests(self):
+        """Tests requests with fields of the wrong type, or that fail unexpectedly, are still answered with an
+        error."""
+        response = await asyncio.wait_for(self._client.request('state', session=[1]), 5)
+        self.assertEqual(response['error'], 'invalid session')
+        self.assertEqual((await self._client.request('new', fen=5))['error'], 'invalid fen')
+
+        async def failing_request(request, session_ids):
+            raise KeyError('session')
+        self._server._handle_request = failing_request
+        response = await asyncio.wait_for(self._client.request('state', session=1), 5)
+        self.assertEqual(response, {'id': 3, 'ok': False, 'error': 'internal error: KeyError'})
+
+    async def test_sessions_belong_to_their_connection(self):
+        """Tests another connection can neither play on nor close a session, and a session is closed when the
+        connection that opened it ends."""
+        session = (await self._client.request('new'))['session']
+        other_client = await GameClient.connect(port=self._server.get_port())
+        for op, fields in (('move', {'move': ['e2', 'e4']}), ('state', {}), ('close', {})):
+            response = await other_client.request(op, session=session, **fields)
+            self.assertEqual(response['error'], 'unknown session')
+        self.assertEqual((await self._client.request('state', session=session))['turn'], 'white')
+        other_session = (await other_client.request('new'))['session']
+        self.assertEqual(self._server.get_session_count(), 2)
+        await other_client.close()
+        for __ in range(100):
+            if self._server.get_session_count() == 1:
+                break
+            await asyncio.sleep(0.01)
+        self.assertEqual(self._server.get_session_count(), 1)
+        self.assertEqual((await self._client.request('state', session=other_session))['error'], 'unknown session')
+
+    async def test_close_refuses_queued_requests(self):
+        """Tests requests sent on a session after its close request are refused rather than applied."""
+        self._server._max_pending = 8
+        client = await GameClient.connect(port=self._server.get_port())
+        session = (await client.request('new'))['session']
+        responses = await asyncio.gather(client.request('move', session=session, move=['e2', 'e4']),
+                                         client.request('close', session=session),
+                                         client.request('move', session=session, move=['e7', 'e5']),
+                                         client.request('state', session=session))
+        await client.close()
+        self.assertTrue(responses[0]['ok'] and responses[1]['ok'])
+        self.assertEqual([response['error'] for response in responses[2:]], ['unknown session'] * 2)
+
+    async def test_close_with_open_connections(self):
+        """Tests closing the server ends the connections still open, without leaving their handlers running."""
+        session = (await self._client.request('new'))['session']
+        self.assertTrue((await self._client.request('state', session=session))['ok'])
+        await asyncio.wait_for(self._server.close(), 5)
+        self.assertEqual(self._server._connection_tasks, set())
+        with self.assertRaises(ConnectionError):
+            await asyncio.wait_for(self._client.request('state', session=session), 5)
+
+    async def test_ordering(self):
+        """Tests requests sent together on one session, more than max_pending of them, are applied in order."""
+        session = (await self._client.request('new'))['session']
+        moves = [['e2', 'e4'], ['e7', 'e5'], ['g1', 'f3'], ['b8', 'c6'], ['f1', 'b5'], ['g8', 'f6']]
+        responses = await asyncio.gather(*[self._client.request('move', session=session, move=move)
+                                           for move in moves])
+        self.assertTrue(all(response['ok'] for response in responses))
+        response = await self._client.request('state', session=session)
+        self.assertEqual(response['fen'], 'r1bqkb1r/pppp1ppp/2n2n2/1B2p3/4P3/5N2/PPPP1PPP/RNBQK2R w FHfh - 6')
+
+    async def test_session_limit_and_eviction(self):
+        """Tests new sessions are refused when the server is full, and idle sessions are evicted."""
+        for __ in range(3):
+            self.assertTrue((await self._client.request('new'))['ok'])
+        self.assertEqual((await self._client.request('new'))['error'], 'too many sessions')
+        self.assertEqual(self._server.evict_idle_sessions(), 0)
+        self._server._idle_timeout = 0.0
+        await asyncio.sleep(0.01)
+        self.assertEqual(self._server.evict_idle_sessions(), 3)
+        self.assertEqual(self._server.get_session_count(), 0)
+
+    async def test_load_test(self):
+        """Tests the load test client makes every move and reports latencies."""
+        self._server._max_sessions = 100
+        report = await load_test(port=self._server.get_port(), clients=5, moves=10)
+        self.assertEqual(report.get_moves(), 50)
+        self.assertEqual(report.get_errors(), 0)
+        self.assertGreater(report.get_latency(99), 0.0)
+        self.assertLessEqual(report.get_latency(50), report.get_latency(99))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,398 @@
+# Author: Ethan David Lee
+# GitHub username: ethandavidlee
+# Date: 2024/03/11
+# Description: Monte Carlo Tree Search computer player for Falcon-Hunter Chess, alongside the alpha-beta ChessEngine.
+#           Without an evaluator it is UCT: each new leaf is valued by a random playout, which takes a king whenever
+#           it can and otherwise plays uniformly random legal moves, including Falcon and Hunter entries, until a king
+#           is taken or playout_plies moves, when the static evaluation decides. With an evaluator, a callback giving
+#           move priors and a position value (for example a trained network), it is PUCT and plays no playouts. The
+#           search plays and undoes moves on one copy of the game, as packed moves, so a simulation allocates little
+#           beyond its new tree nodes, and the tree below the move played is kept for the next search.
+#           The benchmark compares both search styles with the same time on the perft positions, which include
+#           positions where many fairy piece entries make the branching factor high.
+#           Usage: python MCTS.py [--time-ms N] [--playout-plies N] [--seconds N]
+
+import argparse
+import math
+import random
+import sys
+import time
+
+from ChessEngine import ChessEngine, KING_CAPTURE_SCORE, PIECE_VALUES
+from ChessVar import ChessVar, unpack_move
+from Perft import PERFT_SUITE
+
+DEFAULT_EXPLORATION = 1.4
+DEFAULT_SIMULATIONS = 1000
+POLL_SIMULATIONS = 32  # the time limit is checked once every this many simulations
+VALUE_SCALE = 500.0  # centipawns of evaluation lead valued at tanh(1), about 0.76, at the end of a playout
+
+
+class MCTSNode:
+    """
+    Represents a node of the search tree: the packed move that reached it, its parent, its children (None until it is
+    expanded), its prior, and the visits and total value for the player who made the move.
+    """
+    __slots__ = ('_move', '_parent', '_children', '_prior', '_visits', '_value_sum', '_position_hash')
+
+    def __init__(self, move, parent, prior):
+        self._move = move
+        self._parent = parent
+        self._children = None
+        self._prior = prior
+        self._visits = 0
+        self._value_sum = 0.0
+        self._position_hash = None  # set when the node is first reached
+
+    def get_move(self):
+        """
+        Returns the move that reached the node, in the form generated by ChessVar.legal_moves, or None for the root.
+        """
+        return unpack_move(self._move)
+
+    def get_children(self):
+        """
+        Returns the list of child nodes, empty if the node has not been expanded or has no legal moves.
+        """
+        return self._children or []
+
+    def get_prior(self):
+        """
+        Returns the prior probability of the node's move.
+        """
+        return self._prior
+
+    def get_visits(self):
+        """
+        Returns the number of simulations that passed through the node.
+        """
+        return self._visits
+
+    def get_value(self):
+        """
+        Returns the mean value of the node, from -1 to 1, for the player who made its move.
+        """
+        return self._value_sum / self._visits if self._visits else 0.0
+
+
+class MCTSResult:
+    """
+    Represents the outcome of a search: the chosen move, its value, the visits of each root move, and the number of
+    simulations and time taken.
+    """
+    def __init__(self, move, value, visits, simulations, seconds, max_depth):
+        self._move = move
+        self._value = value
+        self._visits = visits
+        self._simulations = simulations
+        self._seconds = seconds
+        self._max_depth = max_depth
+
+    def get_move(self):
+        """
+        Returns the most visited move, or None if there is no legal move.
+        """
+        return self._move
+
+    def get_value(self):
+        """
+        Returns the mean value of the chosen move, from -1 to 1, for the player making it.
+        """
+        return self._value
+
+    def get_visits(self):
+        """
+        Returns a dictionary mapping each root move to its visit count, a policy target for training.
+        """
+        return self._visits
+
+    def get_simulations(self):
+        """
+        Returns the number of simulations run by the search.
+        """
+        return self._simulations
+
+    def get_seconds(self):
+        """
+        Returns the time taken by the search.
+        """
+        return self._seconds
+
+    def get_max_depth(self):
+        """
+        Returns the depth of the deepest node reached by the search.
+        """
+        return self._max_depth
+
+    def get_simulations_per_second(self):
+        """
+        Returns the number of simulations per second.
+        """
+        return self._simulations / self._seconds if self._seconds > 0 else 0.0
+
+
+def material_evaluator(game, moves):
+    """
+    Example evaluator for PUCT: priors over the packed moves weighted by the value of the piece each captures, with
+    taking the king outweighing everything, and the static evaluation of ChessVar.get_evaluation squashed into a value
+    from -1 to 1 for the player to move.
+    """
+    chessboard = game.get_chessboard()
+    weights = []
+    for move in moves:
+        target = chessboard.get_piece_at(move & 63) if move < 4096 else None
+        if target is None:
+            weights.append(1.0)
+        elif target.get_piece_type() == 'king':
+            weights.append(KING_CAPTURE_SCORE / 100)
+        else:
+            weights.append(1.0 + PIECE_VALUES[target.get_piece_type()] / 100)
+    total = sum(weights)
+    return [weight / total for weight in weights], math.tanh(game.get_evaluation() / VALUE_SCALE)
+
+
+class MCTS:
+    """
+    Represents a Monte Carlo Tree Search player for ChessVar games. Communicates with ChessVar to copy the game, list
+    its packed legal moves, play and undo them and value positions where a playout stops. The evaluator, if given, is
+    called with the game and its packed legal moves and returns a sequence of priors for the moves and the value of
+    the position, from -1 to 1, for the player to move.
+    """
+    def __init__(self, exploration=DEFAULT_EXPLORATION, evaluator=None, playout_plies=40, seed=None,
+                 reuse_tree=True):
+        self._exploration = exploration
+        self._evaluator = evaluator
+        self._playout_plies = playout_plies
+        self._random = random.Random(seed)
+        self._reuse_tree = reuse_tree
+        self._root = None
+        self._playouts = 0
+        self._playout_moves = 0
+
+    def get_root(self):
+        """
+        Returns the root node of the last search, or None before the first search.
+        """
+        return self._root
+
+    def get_playout_counts(self):
+        """
+        Returns a tuple of the number of playouts and of moves played in them since the MCTS was created.
+        """
+        return self._playouts, self._playout_moves
+
+    def clear(self):
+        """
+        Drops the search tree, so that the next search starts from scratch.
+        """
+        self._root = None
+
+    def best_move(self, game, simulations=None, time_ms=None):
+        """
+        Returns the best move for the player whose turn it is in game, in the form generated by ChessVar.legal_moves,
+        or None if there is no legal move. See search for the arguments.
+        """
+        return self.search(game, simulations, time_ms).get_move()
+
+    def search(self, game, simulations=None, time_ms=None):
+        """
+        Runs simulations from the game's position until the given number of simulations or time_ms milliseconds,
+        DEFAULT_SIMULATIONS if neither is given, and returns an MCTSResult. When the position is in the tree of the
+        previous search, up to two moves below its root, that subtree and its statistics are kept. The game is not
+        changed.
+        """
+        if simulations is None and time_ms is None:
+            simulations = DEFAULT_SIMULATIONS
+        start = time.perf_counter()
+        deadline = start + time_ms / 1000 if time_ms is not None else None
+        self._root = self._find_root(game.get_hash())
+        work = game.copy()
+        max_depth = 0
+        done = 0
+        while simulations is None or done < simulations:
+            if deadline is not None and done and done % POLL_SIMULATIONS == 0 and time.perf_counter() >= deadline:
+                break
+            max_depth = max(max_depth, self._simulate(work))
+            done += 1
+
+        children = self._root.get_children()
+        if not children:
+            return MCTSResult(None, 0.0, {}, done, time.perf_counter() - start, max_depth)
+        best = max(children, key=lambda child: (child._visits, child.get_value()))
+        visits = {child.get_move(): child._visits for child in children}
+        return MCTSResult(best.get_move(), best.get_value(), visits, done, time.perf_counter() - start, max_depth)
+
+    def _find_root(self, position_hash):
+        """
+        Returns the node of the previous tree for the position with the given hash, up to two moves below the old
+        root, detached from its parent, or a new root if there is none.
+        """
+        if self._reuse_tree and self._root is not None:
+            candidates = [self._root]
+            for child in self._root.get_children():
+                candidates.append(child)
+                candidates.extend(child.get_children())
+            for node in candidates:
+                if node._position_hash == position_hash:
+                    node._parent = None
+                    return node
+        root = MCTSNode(0, None, 1.0)
+        root._position_hash = position_hash
+        return root
+
+    def _simulate(self, work):
+        """
+        Runs one simulation on the working copy of the game: selects a path down the tree, expands and values the leaf,
+        backs the value up the path and takes the moves back. Returns the depth of the leaf.
+        """
+        node = self._root
+        depth = 0
+        while node._children:
+            node = self._select(node)
+            work.play_packed_move(node._move)
+            depth += 1
+            if node._position_hash is None:
+                node._position_hash = work.get_hash()
+
+        if work.get_game_state() != 'UNFINISHED':
+            value = -1.0  # the player to move has lost their king
+        else:
+            moves = work.legal_packed_moves()
+            if not moves:
+                value = 0.0
+                node._children = []
+            elif self._evaluator is not None:
+                priors, value = self._evaluator(work, moves)
+                node._children = [MCTSNode(move, node, prior) for move, prior in zip(moves, priors)]
+            else:
+                value = self._playout(work, moves)
+                self._random.shuffle(moves)  # unvisited children are tried in the order they are listed
+                prior = 1.0 / len(moves)
+                node._children = [MCTSNode(move, node, prior) for move in moves]
+
+        while node is not None:
+            node._visits += 1
+            node._value_sum -= value  # the value is for the player to move, the node's is for the player who moved
+            value = -value
+            node = node._parent
+        for __ in range(depth):
+            work.undo_move()
+        return depth
+
+    def _select(self, node):
+        """
+        Returns the child to follow from an expanded node: by PUCT with the priors when there is an evaluator, and by
+        UCT otherwise, trying every child once before any twice.
+        """
+        exploration = self._exploration
+        best_child = None
+        best_score = -math.inf
+        if self._evaluator is not None:
+            scale = exploration * math.sqrt(node._visits)
+            for child in node._children:
+                visits = child._visits
+                score = (child._value_sum / visits if visits else 0.0) + scale * child._prior / (1 + visits)
+                if score > best_score:
+                    best_score = score
+                    best_child = child
+            return best_child
+        log_visits = math.log(node._visits)
+        for child in node._children:
+            visits = child._visits
+            if not visits:
+                return child
+            score = child._value_sum / visits + exploration * math.sqrt(log_visits / visits)
+            if score > best_score:
+                best_score = score
+                best_child = child
+        return best_child
+
+    def _playout(self, work, moves):
+        """
+        Plays random moves from the game's position, whose packed legal moves are given, until a king is taken or
+        playout_plies moves are made, takes them back and returns the outcome, from -1 to 1, for the player to move
+        at the start.
+        """
+        generator = self._random
+        chessboard = work.get_chessboard()
+        plies = 0
+        while moves and plies < self._playout_plies:
+            move = moves[generator.randrange(len(moves))]
+            for candidate in moves:
+                if candidate < 4096:  # a board move, not a fairy piece entry
+                    target = chessboard.get_piece_at(candidate & 63)
+                    if target and target.get_piece_type() == 'king':
+                        move = candidate
+                        break
+            work.play_packed_move(move)
+            plies += 1
+            moves = work.legal_packed_moves()
+
+        if work.get_game_state() != 'UNFINISHED':
+            value = -1.0  # the player to move at the end has lost their king
+        elif moves:
+            value = math.tanh(work.get_evaluation() / VALUE_SCALE)
+        else:
+            value = 0.0
+        if plies % 2:
+            value = -value
+        for __ in range(plies):
+            work.undo_move()
+        self._playouts += 1
+        self._playout_moves += plies
+        return value
+
+
+def playout_benchmark(seconds=2.0, playout_plies=40, game=None):
+    """
+    Runs playouts from the position of game (the start of the game if None) for the given number of seconds and
+    returns a tuple of playouts per second and playout moves per second.
+    """
+    mcts = MCTS(playout_plies=playout_plies, seed=0)
+    work = game.copy() if game is not None else ChessVar()
+    moves = work.legal_packed_moves()
+    start = time.perf_counter()
+    while time.perf_counter() - start < seconds:
+        mcts._playout(work, moves)
+    elapsed = time.perf_counter() - start
+    playouts, playout_moves = mcts.get_playout_counts()
+    return playouts / elapsed, playout_moves / elapsed
+
+
+def compare(time_ms=1000, playout_plies=40):
+    """
+    Searches each perft position with alpha-beta and with MCTS for time_ms milliseconds each, and returns a list of
+    (position name, legal moves, alpha-beta SearchResult, MCTSResult) tuples.
+    """
+    rows = []
+    for position in PERFT_SUITE:
+        game = position.create_game()
+        alpha_beta = ChessEngine().iterative_deepening(game, time_ms=time_ms)
+        mcts = MCTS(playout_plies=playout_plies, seed=0).search(game, time_ms=time_ms)
+        rows.append((position.get_name(), len(game.get_legal_moves()), alpha_beta, mcts))
+    return rows
+
+
+def main(argv=None):
+    """
+    Runs the playout benchmark and the comparison with alpha-beta from the command line.
+    """
+    parser = argparse.ArgumentParser(description='Compare MCTS and alpha-beta search for Falcon-Hunter Chess.')
+    parser.add_argument('--time-ms', type=int, default=1000, help='search time for each engine and position')
+    parser.add_argument('--playout-plies', type=int, default=40, help='moves played in a playout at most')
+    parser.add_argument('--seconds', type=float, default=2.0, help='duration of the playout benchmark')
+    args = parser.parse_args(argv)
+
+    playouts, playout_moves = playout_benchmark(args.seconds, args.playout_plies)
+    print(f'playouts {playouts:.0f}/s  playout moves {playout_moves:.0f}/s')
+    print(f"{'position':<20} {'moves':>5}  {'alpha-beta':<12} {'depth':>5} {'nodes':>8}  {'mcts':<12} "
+          f"{'sims':>6} {'depth':>5} {'value':>6}")
+    for name, move_count, alpha_beta, mcts in compare(args.time_ms, args.playout_plies):
+        print(f'{name:<20} {move_count:>5}  {str(alpha_beta.get_move()):<12} {alpha_beta.get_depth():>5} '
+              f'{alpha_beta.get_nodes():>8}  {str(mcts.get_move()):<12} {mcts.get_simulations():>6} '
+              f'{mcts.get_max_depth():>5} {mcts.get_value():>6.2f}')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,61 @@
+from MCTS import *
+from ChessVar import ChessVar
+import unittest
+
+
+class TestMCTS(unittest.TestCase):
+    def play(self, moves):
+        """Returns a new game with the given moves played."""
+        game = ChessVar()
+        for move in moves:
+            self.assertTrue(game.play_move(move))
+        return game
+
+    def test_takes_king(self):
+        """Tests UCT with playouts and PUCT with an evaluator both take the king before theirs is taken, leaving
+        the game unchanged."""
+        game = self.play([('e2', 'e4'), ('f7', 'f5'), ('f2', 'f4'), ('e7', 'e6'), ('d1', 'h5'), ('d8', 'h4')])
+        fen = game.to_fen()
+        for mcts in (MCTS(seed=1), MCTS(evaluator=material_evaluator)):
+            result = mcts.search(game, simulations=300)
+            self.assertEqual(result.get_move(), ('h5', 'e8'))
+            self.assertGreater(result.get_value(), 0.9)
+            self.assertEqual(result.get_simulations(), 300)
+            self.assertEqual(sum(result.get_visits().values()), 299)  # the first simulation expands the root
+            self.assertEqual(game.to_fen(), fen)
+        game.play_move(('h5', 'e8'))
+        self.assertIsNone(MCTS().best_move(game, simulations=10))
+
+    def test_tree_reuse(self):
+        """Tests the subtree below the moves played is kept for the next search, and dropped without reuse."""
+        game = ChessVar()
+        mcts = MCTS(seed=2)
+        mcts.search(game, simulations=400)
+        child = max(mcts.get_root().get_children(), key=MCTSNode.get_visits)
+        grandchild = max(child.get_children(), key=MCTSNode.get_visits)
+        visits = grandchild.get_visits()
+        game.play_move(child.get_move())
+        game.play_move(grandchild.get_move())
+        mcts.search(game, simulations=50)
+        self.assertIs(mcts.get_root(), grandchild)
+        self.assertEqual(grandchild.get_visits(), visits + 50)
+        no_reuse = MCTS(seed=2, reuse_tree=False)
+        no_reuse.search(game, simulations=50)
+        no_reuse.search(game, simulations=50)
+        self.assertEqual(no_reuse.get_root().get_visits(), 50)
+
+    def test_benchmark(self):
+        """Tests the playout benchmark and the comparison with alpha-beta report every position."""
+        playouts, playout_moves = playout_benchmark(seconds=0.1)
+        self.assertGreater(playouts, 0)
+        self.assertGreater(playout_moves, playouts)
+        rows = compare(time_ms=50)
+        self.assertEqual([row[0] for row in rows], [position.get_name() for position in PERFT_SUITE])
+        for name, move_count, alpha_beta, mcts in rows:
+            self.assertIsNotNone(alpha_beta.get_move())
+            self.assertIsNotNone(mcts.get_move())
+            self.assertGreater(mcts.get_simulations(), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
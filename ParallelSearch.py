@@ -0,0 +1,239 @@
+# Author: Ethan David Lee
+# GitHub username: ethandavidlee
+# Date: 2024/03/11
+# Description: Parallel search for Falcon-Hunter Chess. Shares out the root moves of a ChessEngine search between a
+#           pool of worker processes, each with its own engine and transposition table, so that a search can use every
+#           CPU core. The first root move is searched on its own to set a bound, then the remaining moves are handed
+#           out one at a time with the best score found so far, so that workers prune as much as a single search
+#           would. Workers can share one SharedTranspositionTable so that each reuses what the others found. The bench
+#           command reports the time to reach a depth and the speedup at 1, 2, 4, ... workers.
+#           Usage: python ParallelSearch.py --bench [--depth N] [--workers 1 2 4 ...] [--backend dict|bitboard]
+#                  [--shared-table-mb MB]
+
+import argparse
+import multiprocessing
+import os
+import queue
+import sys
+import time
+
+from ChessEngine import ChessEngine, SearchResult, DEFAULT_DEPTH, KING_CAPTURE_SCORE, WIN_THRESHOLD, PIECE_VALUES
+from Perft import PERFT_SUITE
+
+_worker_engine = None  # the ChessEngine of a worker process, kept between tasks so its transposition table is reused
+
+
+def _start_worker(table_size, shared_table):
+    """
+    Creates the ChessEngine of a newly started worker process, using the shared transposition table if there is one.
+    """
+    global _worker_engine
+    _worker_engine = ChessEngine(table_size, shared_table)
+
+
+def _search_root_move(game, move, depth, alpha, time_ms):
+    """
+    Searches one root move in a worker process and returns a tuple of the move, its score (None if time ran out) and
+    the number of nodes searched.
+    """
+    score = _worker_engine.search_move(game, move, depth, alpha, KING_CAPTURE_SCORE + 1, time_ms)
+    return move, score, _worker_engine.get_nodes()
+
+
+class ParallelSearch:
+    """
+    Represents a pool of worker processes that search the root moves of a ChessVar game in parallel. Communicates with
+    ChessEngine in each worker to search single root moves, and returns the same SearchResult as
+    ChessEngine.iterative_deepening. Given shared_table_mb, the workers share one SharedTranspositionTable of that
+    many MB instead of keeping a table of table_size entries each.
+    """
+    def __init__(self, workers=None, table_size=1 << 16, shared_table_mb=None):
+        self._workers = workers or os.cpu_count() or 1
+        self._shared_table = None
+        if shared_table_mb is not None:
+            from SharedTranspositionTable import SharedTranspositionTable  # needs NumPy, so only imported when used
+            self._shared_table = SharedTranspositionTable(shared_table_mb)
+        self._pool = multiprocessing.Pool(self._workers, initializer=_start_worker,
+                                          initargs=(table_size, self._shared_table))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def get_workers(self):
+        """
+        Returns the number of worker processes.
+        """
+        return self._workers
+
+    def get_shared_table(self):
+        """
+        Returns the SharedTranspositionTable of the workers, or None if each keeps its own table.
+        """
+        return self._shared_table
+
+    def close(self):
+        """
+        Shuts down the worker processes and frees the shared transposition table.
+        """
+        self._pool.terminate()
+        self._pool.join()
+        if self._shared_table is not None:
+            self._shared_table.close()
+            self._shared_table.unlink()
+            self._shared_table = None
+
+    def search(self, game, max_depth=DEFAULT_DEPTH, time_ms=None):
+        """
+        Searches the game's position with iterative deepening up to max_depth, or until time_ms milliseconds have
+        passed, and returns a SearchResult with the best move of the last completed depth. Root moves are reordered by
+        their scores before each new depth.
+        """
+        start = time.perf_counter()
+        deadline = start + time_ms / 1000 if time_ms is not None else None
+        if self._shared_table is not None:
+            self._shared_table.new_search()
+        moves = self._order_moves(game, game.get_legal_moves())
+        if not moves:
+            return SearchResult(None, 0, 0, 0, time.perf_counter() - start)
+
+        best_move = moves[0]
+        best_score = 0
+        completed_depth = 0
+        nodes = 0
+        for depth in range(1, max_depth + 1):
+            scores, depth_nodes = self._search_root(game, moves, depth, deadline)
+            nodes += depth_nodes
+            if scores is None:
+                break  # out of time, keep the result of the last completed depth
+            moves.sort(key=lambda move: -scores[move])  # stable, so equal scores keep their order
+            best_move = moves[0]
+            best_score = scores[best_move]
+            completed_depth = depth
+            if abs(best_score) >= WIN_THRESHOLD:
+                break
+        return SearchResult(best_move, best_score, completed_depth, nodes, time.perf_counter() - start)
+
+    def _search_root(self, game, moves, depth, deadline):
+        """
+        Searches every root move to the given depth across the workers and returns a tuple of a dictionary of move
+        scores (None if time ran out) and the number of nodes searched. Scores of moves that could not beat the best
+        move are upper bounds.
+        """
+        results = queue.Queue()
+        scores = {}
+        nodes = 0
+
+        def submit(move, alpha):
+            time_ms = None
+            if deadline is not None:
+                time_ms = max(deadline - time.perf_counter(), 0) * 1000
+            self._pool.apply_async(_search_root_move, (game, move, depth, alpha, time_ms),
+                                   callback=results.put, error_callback=results.put)
+
+        def collect():
+            result = results.get()
+            if isinstance(result, BaseException):
+                raise result
+            return result
+
+        # the first move is searched alone with a full window so the others can be searched against its score
+        submit(moves[0], -KING_CAPTURE_SCORE - 1)
+        move, alpha, move_nodes = collect()
+        nodes += move_nodes
+        if alpha is None:
+            return None, nodes
+        scores[move] = alpha
+
+        pending = list(reversed(moves[1:]))
+        running = 0
+        timed_out = False
+        while pending or running:
+            while pending and running < self._workers and not timed_out and alpha < WIN_THRESHOLD:
+                submit(pending.pop(), alpha)
+                running += 1
+            if not running:
+                break
+            move, score, move_nodes = collect()
+            running -= 1
+            nodes += move_nodes
+            if score is None:
+                timed_out = True
+                continue
+            scores[move] = score
+            alpha = max(alpha, score)
+        if timed_out:
+            return None, nodes
+        for move in pending:
+            scores[move] = -KING_CAPTURE_SCORE  # left unsearched after a forced king capture was found
+        return scores, nodes
+
+    @staticmethod
+    def _order_moves(game, moves):
+        """
+        Returns the moves with captures of the most valuable pieces first, for the first depth of the search.
+        """
+        chessboard = game.get_chessboard()
+
+        def move_order(move):
+            if move[0] in ('F', 'H', 'f', 'h'):
+                return 0
+            target = chessboard.get_piece(move[1])
+            return -PIECE_VALUES[target.get_piece_type()] if target else 1
+
+        return sorted(moves, key=move_order)
+
+
+def bench(depth, worker_counts, backend='dict', shared_table_mb=None, output=sys.stdout):
+    """
+    Times a search to the given depth of each perft suite position with a single ChessEngine and with a
+    ParallelSearch of each of the worker_counts, printing the total time and the speedup over the first worker count,
+    which is normally one. Returns a dictionary mapping each worker count to its total time in seconds.
+    """
+    games = [position.create_game(backend) for position in PERFT_SUITE]
+    start = time.perf_counter()
+    for game in games:
+        ChessEngine().iterative_deepening(game, max_depth=depth)
+    print(f'single engine    {time.perf_counter() - start:8.3f}s', file=output)
+
+    times = {}
+    for workers in worker_counts:
+        with ParallelSearch(workers, shared_table_mb=shared_table_mb) as search:
+            start = time.perf_counter()
+            nodes = 0
+            for game in games:
+                nodes += search.search(game, depth).get_nodes()
+            times[workers] = time.perf_counter() - start
+        speedup = times[worker_counts[0]] / times[workers]
+        print(f'{workers:>3} workers      {times[workers]:8.3f}s  {nodes / times[workers]:>9.0f} nps  '
+              f'speedup {speedup:5.2f}x', file=output)
+    return times
+
+
+def main(argv=None):
+    """
+    Runs the parallel search benchmark from the command line.
+    """
+    parser = argparse.ArgumentParser(description='Parallel search for Falcon-Hunter Chess.')
+    parser.add_argument('--bench', action='store_true', help='report time to depth and speedup per worker count')
+    parser.add_argument('--depth', type=int, default=4, help='depth to search each position to')
+    parser.add_argument('--workers', type=int, nargs='+', help='worker counts to compare, default 1, 2, 4, ... cores')
+    parser.add_argument('--backend', choices=['dict', 'bitboard'], default='dict', help='chessboard backend')
+    parser.add_argument('--shared-table-mb', type=float, help='share one transposition table of this many MB')
+    args = parser.parse_args(argv)
+    if not args.bench:
+        parser.error('nothing to do, use --bench')
+
+    worker_counts = args.workers
+    if not worker_counts:
+        worker_counts = [1]
+        while worker_counts[-1] * 2 <= (os.cpu_count() or 1):
+            worker_counts.append(worker_counts[-1] * 2)
+    bench(args.depth, worker_counts, args.backend, args.shared_table_mb)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,52 @@
+from ParallelSearch import *
+from ChessVar import ChessVar
+import io
+import unittest
+
+
+class TestParallelSearch(unittest.TestCase):
+    def setUp(self):
+        # Start a pool of two workers before each test
+        self._search = ParallelSearch(workers=2)
+
+    def tearDown(self):
+        self._search.close()
+
+    def test_matches_single_engine(self):
+        """Tests the parallel search finds the same score as a single engine at the same depth."""
+        for position in PERFT_SUITE[1:3]:
+            game = position.create_game()
+            result = self._search.search(game, 3)
+            single_result = ChessEngine().iterative_deepening(game, max_depth=3)
+            self.assertEqual(result.get_depth(), 3)
+            self.assertEqual(result.get_score(), single_result.get_score())
+            self.assertIn(result.get_move(), game.get_legal_moves())
+            self.assertGreater(result.get_nodes(), 0)
+
+    def test_takes_king(self):
+        """Tests the parallel search captures an exposed king."""
+        game = ChessVar()
+        for move in [('e2', 'e4'), ('f7', 'f6'), ('d1', 'h5'), ('a7', 'a6')]:
+            game.play_move(move)
+        result = self._search.search(game, 3)
+        self.assertEqual(result.get_move(), ('h5', 'e8'))
+        self.assertEqual(result.get_score(), KING_CAPTURE_SCORE - 1)
+
+    def test_time_limit(self):
+        """Tests a timed parallel search returns a legal move from a completed depth."""
+        game = ChessVar()
+        result = self._search.search(game, 20, time_ms=500)
+        self.assertLess(result.get_seconds(), 1.5)
+        self.assertIn(result.get_move(), game.get_legal_moves())
+        self.assertGreaterEqual(result.get_depth(), 1)
+
+    def test_bench(self):
+        """Tests the benchmark reports a time for each worker count."""
+        output = io.StringIO()
+        times = bench(1, [1, 2], output=output)
+        self.assertEqual(sorted(times), [1, 2])
+        self.assertIn('speedup', output.getvalue())
+
+
+if __name__ == '__main__':
+    unittest.main()
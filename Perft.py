@@ -0,0 +1,179 @@
+# Author: Ethan David Lee
+# GitHub username: ethandavidlee
+# Date: 2024/03/11
+# Description: Perft (performance test) tool for Falcon-Hunter Chess. Counts every path of legal moves, including
+#           Falcon and Hunter entries, to a given depth from a position, and reports the node count and the number of
+#           nodes visited per second. A reference suite of positions with known node counts is used to catch move
+#           generation regressions and to compare the speed of the chessboard backends.
+#           Usage: python Perft.py [--depth N] [--backend dict|bitboard] [--position NAME] [--divide]
+
+import argparse
+import sys
+import time
+
+from ChessVar import ChessVar
+
+
+class PerftPosition:
+    """
+    Represents a reference position for perft, given as the sequence of moves played from the start of the game, with
+    the known node counts for depths 1, 2, 3, ... of the search.
+    """
+    def __init__(self, name, moves, node_counts):
+        self._name = name
+        self._moves = moves
+        self._node_counts = node_counts
+
+    def get_name(self):
+        """
+        Returns the name of the position.
+        """
+        return self._name
+
+    def get_moves(self):
+        """
+        Returns the moves played from the start of the game to reach the position.
+        """
+        return self._moves
+
+    def get_node_count(self, depth):
+        """
+        Returns the known node count at the given depth, or None if it has not been recorded.
+        """
+        if depth <= len(self._node_counts):
+            return self._node_counts[depth - 1]
+        return None
+
+    def create_game(self, backend='dict'):
+        """
+        Returns a new ChessVar on the given chessboard backend with the position's moves played.
+        """
+        game = ChessVar(backend=backend)
+        for move in self._moves:
+            if not game.play_move(move):
+                raise ValueError(f"illegal move {move} in perft position '{self._name}'")
+        return game
+
+
+PERFT_SUITE = [
+    PerftPosition('start', (), [20, 400, 8902, 197750]),
+    # both sides have lost a minor piece, so white and black may each enter one fairy piece
+    PerftPosition('bishop-knight-trade', (('e2', 'e3'), ('b8', 'a6'), ('f1', 'a6'), ('b7', 'a6')),
+                  [30, 629, 20334, 503023]),
+    # black has lost their queen and may enter a fairy piece, white has only lost pawns
+    PerftPosition('queen-lost', (('e2', 'e4'), ('d7', 'd5'), ('e4', 'd5'), ('d8', 'd5'), ('b1', 'c3'), ('d5', 'd2'),
+                                 ('c1', 'd2')),
+                  [30, 1135, 35487, 1398795]),
+    # both sides have lost at least two pieces and entered their falcon, so each may still enter their hunter
+    PerftPosition('fairies-in-play', (('e2', 'e4'), ('d7', 'd5'), ('e4', 'd5'), ('g8', 'f6'), ('f1', 'b5'),
+                                      ('c7', 'c6'), ('d5', 'c6'), ('b8', 'c6'), ('b5', 'c6'), ('b7', 'c6'),
+                                      ('g1', 'f3'), ('c8', 'g4'), ('f3', 'e5'), ('g4', 'd1'), ('e1', 'd1'),
+                                      ('f', 'd7'), ('e5', 'f7'), ('e8', 'f7'), ('F', 'e2')),
+                  [38, 1173, 45456, 1359972]),
+]
+
+
+class Perft:
+    """
+    Counts the paths of legal moves from the position of a ChessVar game to a given depth, driving the game's own move
+    generation so that the counts check legal_moves, the pieces' valid_moves and the fairy piece entry rules.
+    """
+    def __init__(self, game):
+        self._game = game
+
+    def perft(self, depth):
+        """
+        Returns the number of move paths of the given depth from the game's position.
+        """
+        return self._count(self._game, depth)
+
+    def divide(self, depth):
+        """
+        Returns a dictionary mapping each legal move in the game's position to the number of move paths of the given
+        depth that start with it, which helps to narrow down where two move generators disagree.
+        """
+        counts = {}
+        for move in self._game.get_legal_moves():
+            self._game.play_move(move)
+            counts[move] = self._count(self._game, depth - 1)
+            self._game.undo_move()
+        return counts
+
+    def _count(self, game, depth):
+        """
+        Counts the move paths of the given depth from the position of game, making and undoing each move in place. The
+        last ply is counted from the length of the move list rather than by playing each move.
+        """
+        if depth == 0:
+            return 1
+        moves = game.get_legal_moves()
+        if depth == 1:
+            return len(moves)
+        nodes = 0
+        for move in moves:
+            game.play_move(move)
+            nodes += self._count(game, depth - 1)
+            game.undo_move()
+        return nodes
+
+    def run(self, depth):
+        """
+        Runs perft to the given depth and returns a tuple of the node count, the time taken in seconds and the nodes
+        visited per second.
+        """
+        start = time.perf_counter()
+        nodes = self.perft(depth)
+        seconds = time.perf_counter() - start
+        nodes_per_second = nodes / seconds if seconds > 0 else float('inf')
+        return nodes, seconds, nodes_per_second
+
+
+def run_suite(max_depth, backend='dict', positions=None, output=sys.stdout):
+    """
+    Runs perft for each position of the suite at depths 1 to max_depth on the given chessboard backend, printing one
+    line per run with the node count, the expected count and the nodes per second. Returns True if every recorded
+    count matched.
+    """
+    all_matched = True
+    for position in positions or PERFT_SUITE:
+        for depth in range(1, max_depth + 1):
+            nodes, seconds, nodes_per_second = Perft(position.create_game(backend)).run(depth)
+            expected = position.get_node_count(depth)
+            if expected is None:
+                status = 'unrecorded'
+            elif expected == nodes:
+                status = 'ok'
+            else:
+                status = f'MISMATCH (expected {expected})'
+                all_matched = False
+            print(f'{position.get_name():<22} depth {depth}  nodes {nodes:>10}  {seconds:9.3f}s  '
+                  f'{nodes_per_second:>10.0f} nps  {status}', file=output)
+    return all_matched
+
+
+def main(argv=None):
+    """
+    Runs the perft suite from the command line.
+    """
+    parser = argparse.ArgumentParser(description='Perft suite for Falcon-Hunter Chess.')
+    parser.add_argument('--depth', type=int, default=3, help='deepest depth to search, from 1 to 6')
+    parser.add_argument('--backend', choices=['dict', 'bitboard'], default='dict', help='chessboard backend')
+    parser.add_argument('--position', help='only run the suite position with this name')
+    parser.add_argument('--divide', action='store_true', help='print the node count below each move of the position')
+    args = parser.parse_args(argv)
+
+    positions = [position for position in PERFT_SUITE if args.position in (None, position.get_name())]
+    if not positions:
+        parser.error(f"unknown position '{args.position}'")
+    if args.divide:
+        for position in positions:
+            counts = Perft(position.create_game(args.backend)).divide(args.depth)
+            for move, nodes in counts.items():
+                print(f'{move[0]}{move[1]}: {nodes}')
+            print(f'{position.get_name()}: {sum(counts.values())} nodes')
+        return 0
+    return 0 if run_suite(args.depth, args.backend, positions) else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,33 @@
+from Perft import *
+import io
+import unittest
+
+
+class TestPerft(unittest.TestCase):
+    def test_start_position(self):
+        """Tests the node counts from the start of the game, which match standard chess for the first three plies."""
+        self.assertEqual(Perft(ChessVar()).perft(1), 20)
+        self.assertEqual(Perft(ChessVar()).perft(2), 400)
+        self.assertEqual(Perft(ChessVar()).perft(3), 8902)
+
+    def test_suite_both_backends(self):
+        """Tests every suite position against its recorded node counts on both chessboard backends."""
+        for backend in ('dict', 'bitboard'):
+            self.assertTrue(run_suite(2, backend, output=io.StringIO()))
+
+    def test_divide(self):
+        """Tests the divided node counts add up to the perft node count, including fairy piece entries."""
+        game = PERFT_SUITE[1].create_game()
+        counts = Perft(game).divide(2)
+        self.assertIn(('F', 'f1'), counts)
+        self.assertEqual(sum(counts.values()), Perft(game).perft(2))
+
+    def test_run_reports_speed(self):
+        """Tests a perft run returns the node count with a time and nodes per second."""
+        nodes, seconds, nodes_per_second = Perft(ChessVar()).run(2)
+        self.assertEqual(nodes, 400)
+        self.assertGreater(nodes_per_second, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
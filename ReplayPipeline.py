@@ -0,0 +1,294 @@
+# Author: Ethan David Lee
+# GitHub username: ethandavidlee
+# Date: 2024/03/11
+# Description: Replay pipeline for archived Falcon-Hunter Chess games. Re-validates every game of a GameRecord file by
+#           playing its moves on a ChessVar, checking each move is legal and the final game state matches the recorded
+#           result. The games are split into chunks of game ids that a pool of worker processes read straight from the
+#           file through mmap, each reusing one ChessVar by resetting it between games. Reports the illegal moves and
+#           mismatched results found, the final game states, the wall time, and the moves replayed per second of CPU
+#           time, which is the throughput of a single core.
+#           Usage: python ReplayPipeline.py GAMES_FILE [--workers N] [--chunk-size N] [--backend dict|bitboard]
+#                  python ReplayPipeline.py GAMES_FILE --generate N [--seed N]
+
+import argparse
+import multiprocessing
+import os
+import random
+import sys
+import time
+
+from ChessVar import ChessVar
+from GameRecord import GameRecordReader, GameRecordWriter, replay_game
+
+MAX_REPORTED_PROBLEMS = 100  # illegal moves and mismatched results kept in a report, the rest are only counted
+
+_worker_games = {}  # the ChessVar of a worker process for each chessboard backend, reset for each game
+
+
+def _replay_chunk(path, first_game, game_count, backend):
+    """
+    Replays game_count games of the file from first_game in a worker process and returns a ReplayReport of them. The
+    file is opened for each chunk, so that games added to it since an earlier run are found in its index.
+    """
+    start_cpu = time.process_time()
+    if backend not in _worker_games:
+        _worker_games[backend] = ChessVar(backend=backend)
+
+    report = ReplayReport()
+    game = _worker_games[backend]
+    with GameRecordReader(path) as reader:
+        for game_id in range(first_game, first_game + game_count):
+            packed_moves = reader.get_packed_moves(game_id)
+            game.reset()
+            __, illegal_ply = replay_game(packed_moves, game)
+            report.add_game(game_id, reader.get_result(game_id), game.get_game_state(), illegal_ply,
+                            packed_moves[illegal_ply] if illegal_ply is not None else None,
+                            len(packed_moves) if illegal_ply is None else illegal_ply)
+    report.add_cpu_seconds(time.process_time() - start_cpu)
+    return report
+
+
+class ReplayReport:
+    """
+    Represents the outcome of replaying a set of games: how many games and moves were replayed, the count of each final
+    game state, the illegal moves and mismatched results found, and the CPU and wall time taken. Reports of chunks
+    replayed by different workers are combined with merge.
+    """
+    def __init__(self):
+        self._games = 0
+        self._moves = 0
+        self._game_states = {}
+        self._illegal_move_count = 0
+        self._illegal_moves = []  # (game id, move number, packed move) of the first few illegal moves
+        self._mismatch_count = 0
+        self._mismatches = []  # (game id, recorded result, replayed game state) of the first few mismatched results
+        self._cpu_seconds = 0.0
+        self._seconds = 0.0
+
+    def add_game(self, game_id, recorded_result, game_state, illegal_ply, illegal_move, moves):
+        """
+        Adds a replayed game to the report, given its recorded result, its game state after the replay, the number of
+        its first illegal move and that move (None if every move was legal) and the number of legal moves replayed.
+        """
+        self._games += 1
+        self._moves += moves
+        if illegal_ply is not None:
+            self._illegal_move_count += 1
+            if len(self._illegal_moves) < MAX_REPORTED_PROBLEMS:
+                self._illegal_moves.append((game_id, illegal_ply, illegal_move))
+        else:
+            self._game_states[game_state] = self._game_states.get(game_state, 0) + 1
+            if recorded_result is not None and recorded_result != game_state:
+                self._mismatch_count += 1
+                if len(self._mismatches) < MAX_REPORTED_PROBLEMS:
+                    self._mismatches.append((game_id, recorded_result, game_state))
+
+    def add_cpu_seconds(self, cpu_seconds):
+        """
+        Adds CPU time spent replaying games.
+        """
+        self._cpu_seconds += cpu_seconds
+
+    def set_seconds(self, seconds):
+        """
+        Sets the wall time taken to replay every game.
+        """
+        self._seconds = seconds
+
+    def merge(self, other):
+        """
+        Adds the games, moves, problems and CPU time of another report to this one.
+        """
+        self._games += other._games
+        self._moves += other._moves
+        for game_state, count in other._game_states.items():
+            self._game_states[game_state] = self._game_states.get(game_state, 0) + count
+        self._illegal_move_count += other._illegal_move_count
+        self._illegal_moves.extend(other._illegal_moves[:MAX_REPORTED_PROBLEMS - len(self._illegal_moves)])
+        self._mismatch_count += other._mismatch_count
+        self._mismatches.extend(other._mismatches[:MAX_REPORTED_PROBLEMS - len(self._mismatches)])
+        self._cpu_seconds += other._cpu_seconds
+
+    def get_games(self):
+        """
+        Returns the number of games replayed.
+        """
+        return self._games
+
+    def get_moves(self):
+        """
+        Returns the number of legal moves replayed.
+        """
+        return self._moves
+
+    def get_game_states(self):
+        """
+        Returns a dictionary mapping each final game state to the number of fully legal games that ended in it.
+        """
+        return self._game_states
+
+    def get_illegal_move_count(self):
+        """
+        Returns the number of games with an illegal move.
+        """
+        return self._illegal_move_count
+
+    def get_illegal_moves(self):
+        """
+        Returns a list of (game id, move number, packed move) tuples for the first illegal move of the first games
+        found to have one, sorted by game id.
+        """
+        return sorted(self._illegal_moves)
+
+    def get_mismatch_count(self):
+        """
+        Returns the number of fully legal games whose final game state differs from their recorded result.
+        """
+        return self._mismatch_count
+
+    def get_mismatches(self):
+        """
+        Returns a list of (game id, recorded result, replayed game state) tuples for the first games found with a
+        mismatched result, sorted by game id.
+        """
+        return sorted(self._mismatches)
+
+    def get_cpu_seconds(self):
+        """
+        Returns the CPU time spent replaying games, summed over every worker.
+        """
+        return self._cpu_seconds
+
+    def get_seconds(self):
+        """
+        Returns the wall time taken to replay every game.
+        """
+        return self._seconds
+
+    def get_moves_per_core_second(self):
+        """
+        Returns the number of moves replayed per second of CPU time, the throughput of one core.
+        """
+        return self._moves / self._cpu_seconds if self._cpu_seconds > 0 else 0.0
+
+    def get_games_per_second(self):
+        """
+        Returns the number of games replayed per second of wall time.
+        """
+        return self._games / self._seconds if self._seconds > 0 else 0.0
+
+
+class ReplayPipeline:
+    """
+    Represents a pool of worker processes that replay the games of GameRecord files. Communicates with GameRecord to
+    read the games and ChessVar to replay them, and combines the ReplayReport of each chunk of games as it finishes.
+    With one worker the games are replayed in this process.
+    """
+    def __init__(self, workers=None, chunk_size=1000, backend='dict'):
+        if backend not in ('dict', 'bitboard'):
+            raise ValueError(f"unknown chessboard backend '{backend}', expected 'dict' or 'bitboard'")
+        self._workers = workers or os.cpu_count() or 1
+        self._chunk_size = chunk_size
+        self._backend = backend
+        self._pool = multiprocessing.Pool(self._workers) if self._workers > 1 else None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def get_workers(self):
+        """
+        Returns the number of worker processes.
+        """
+        return self._workers
+
+    def close(self):
+        """
+        Shuts down the worker processes.
+        """
+        if self._pool is not None:
+            self._pool.close()
+            self._pool.join()
+            self._pool = None
+
+    def run(self, path):
+        """
+        Replays every game of the GameRecord file at path and returns a ReplayReport of them.
+        """
+        start = time.perf_counter()
+        with GameRecordReader(path) as reader:
+            game_count = reader.get_game_count()
+        chunks = [(path, first_game, min(self._chunk_size, game_count - first_game), self._backend)
+                  for first_game in range(0, game_count, self._chunk_size)]
+        report = ReplayReport()
+        if self._pool is None:
+            for chunk in chunks:
+                report.merge(_replay_chunk(*chunk))
+        else:
+            for chunk_report in self._pool.imap_unordered(_replay_chunk_args, chunks):
+                report.merge(chunk_report)
+        report.set_seconds(time.perf_counter() - start)
+        return report
+
+
+def _replay_chunk_args(chunk):
+    """
+    Calls _replay_chunk with a tuple of its arguments, for Pool.imap_unordered.
+    """
+    return _replay_chunk(*chunk)
+
+
+def generate_games(path, game_count, max_plies=200, seed=0):
+    """
+    Appends game_count games of random legal moves, each ending when a king is taken or after max_plies moves, to the
+    GameRecord file at path, for benchmarking the pipeline.
+    """
+    generator = random.Random(seed)
+    game = ChessVar()
+    with GameRecordWriter(path) as writer:
+        for __ in range(game_count):
+            game.reset()
+            moves = []
+            while game.get_game_state() == 'UNFINISHED' and len(moves) < max_plies:
+                move = generator.choice(game.get_legal_moves())
+                game.play_move(move)
+                moves.append(move)
+            writer.write_game(moves, game.get_game_state())
+
+
+def main(argv=None):
+    """
+    Replays a game record file from the command line and prints the report.
+    """
+    parser = argparse.ArgumentParser(description='Replay and validate archived Falcon-Hunter Chess games.')
+    parser.add_argument('path', help='game record file')
+    parser.add_argument('--workers', type=int, help='worker processes, default one per core')
+    parser.add_argument('--chunk-size', type=int, default=1000, help='games handed to a worker at a time')
+    parser.add_argument('--backend', choices=['dict', 'bitboard'], default='dict', help='chessboard backend')
+    parser.add_argument('--generate', type=int, metavar='N', help='append N random games to the file and exit')
+    parser.add_argument('--seed', type=int, default=0, help='random seed for --generate')
+    args = parser.parse_args(argv)
+
+    if args.generate:
+        generate_games(args.path, args.generate, seed=args.seed)
+        return 0
+
+    with ReplayPipeline(args.workers, args.chunk_size, args.backend) as pipeline:
+        report = pipeline.run(args.path)
+    print(f'games {report.get_games()}  moves {report.get_moves()}  workers {pipeline.get_workers()}')
+    for game_state, count in sorted(report.get_game_states().items()):
+        print(f'  {game_state:<11} {count}')
+    print(f'illegal moves {report.get_illegal_move_count()}  mismatched results {report.get_mismatch_count()}')
+    for game_id, ply, packed_move in report.get_illegal_moves():
+        print(f'  game {game_id} move {ply}: illegal packed move {packed_move:#06x}')
+    for game_id, recorded_result, game_state in report.get_mismatches():
+        print(f'  game {game_id}: recorded {recorded_result}, replayed {game_state}')
+    print(f'wall time {report.get_seconds():.3f}s  {report.get_games_per_second():.0f} games/s  '
+          f'{report.get_moves_per_core_second():.0f} moves per core second')
+    return 0 if not report.get_illegal_move_count() and not report.get_mismatch_count() else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
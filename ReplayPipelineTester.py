@@ -0,0 +1,52 @@
+from ReplayPipeline import *
+from GameRecord import GameRecordWriter
+from ChessVar import pack_move
+import os
+import tempfile
+import unittest
+
+
+class TestReplayPipeline(unittest.TestCase):
+    def setUp(self):
+        self._directory = tempfile.TemporaryDirectory()
+        self._path = os.path.join(self._directory.name, 'games.fhgr')
+        generate_games(self._path, 40, max_plies=60, seed=5)
+        with GameRecordWriter(self._path) as writer:
+            writer.write_game([('e2', 'e4'), ('e7', 'e5'), ('e4', 'e5')], 'UNFINISHED')  # game 40, pawns can't take
+            writer.write_game([('e2', 'e4')], 'WHITE_WON')  # game 41, wrong result
+            writer.write_packed_game([pack_move(('F', 'e2'))])  # game 42, no piece lost yet
+
+    def tearDown(self):
+        self._directory.cleanup()
+
+    def test_report(self):
+        """Tests the pipeline reports every game, the illegal moves and the mismatched results, with one worker and
+        with a pool."""
+        reports = []
+        for workers in (1, 2):
+            with ReplayPipeline(workers, chunk_size=7) as pipeline:
+                reports.append(pipeline.run(self._path))
+        for report in reports:
+            self.assertEqual(report.get_games(), 43)
+            self.assertEqual(report.get_illegal_moves(),
+                             [(40, 2, pack_move(('e4', 'e5'))), (42, 0, pack_move(('F', 'e2')))])
+            self.assertEqual(report.get_mismatches(), [(41, 'WHITE_WON', 'UNFINISHED')])
+            self.assertEqual(sum(report.get_game_states().values()), 41)
+            self.assertGreater(report.get_moves_per_core_second(), 0)
+        self.assertEqual(reports[0].get_game_states(), reports[1].get_game_states())
+        self.assertEqual(reports[0].get_moves(), reports[1].get_moves())
+
+    def test_file_grows_between_runs(self):
+        """Tests a second run of the same pipeline replays the games added to the file since the first run."""
+        with ReplayPipeline(1, chunk_size=50) as pipeline:
+            self.assertEqual(pipeline.run(self._path).get_games(), 43)
+            with GameRecordWriter(self._path) as writer:
+                for __ in range(10):
+                    writer.write_game([('e2', 'e4')], 'UNFINISHED')
+            report = pipeline.run(self._path)
+        self.assertEqual(report.get_games(), 53)
+        self.assertEqual(report.get_mismatch_count(), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
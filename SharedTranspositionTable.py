@@ -0,0 +1,167 @@
+# Author: Ethan David Lee
+# GitHub username: ethandavidlee
+# Date: 2024/03/11
+# Description: Transposition table for Falcon-Hunter Chess searches kept in shared memory, so that every process of a
+#           parallel search reads and writes the same table. Entries are 16 bytes in a NumPy structured array: the
+#           position hash XOR the entry's data word, then the data word holding depth, bound, generation, best move
+#           and score. Writes are not locked; a reader that sees half of a write finds the XOR check fails and treats
+#           the slot as empty. The table size is fixed by a memory budget in MB however many processes attach to it.
+#           Requires NumPy.
+
+from multiprocessing import resource_tracker, shared_memory
+
+import numpy
+
+from ChessVar import pack_move, unpack_move
+
+HEADER_BYTES = 16  # the first 8 bytes hold the search generation, the rest keep the entries 16-byte aligned
+ENTRY_DTYPE = numpy.dtype({
+    'names': ['key', 'data', 'depth', 'flags', 'move', 'score'],
+    'formats': ['<u8', '<u8', '<i1', '<u1', '<u2', '<i4'],
+    'offsets': [0, 8, 8, 9, 10, 12],  # depth, flags, move and score are the bytes of data
+    'itemsize': 16,
+})
+GENERATION_MASK = 63  # generations use the upper six bits of flags, the lower two bits are the bound
+
+
+class SharedTranspositionTable:
+    """
+    Represents a fixed size, lockless transposition table in a multiprocessing.shared_memory block, with the same
+    probe, store, new_search, clear and get_size methods as ChessEngine.TranspositionTable so that a ChessEngine can use
+    either. The process that creates the table owns the block and unlinks it; other processes attach by name, and a
+    pickled table attaches to the same block when unpickled.
+    """
+    def __init__(self, size_mb=16, name=None):
+        if name is None:
+            size_bytes = max(int(size_mb * (1 << 20)), HEADER_BYTES + ENTRY_DTYPE.itemsize)
+            self._shared_memory = shared_memory.SharedMemory(create=True, size=size_bytes)
+            self._owner = True
+        else:
+            self._shared_memory = shared_memory.SharedMemory(name=name)
+            self._owner = False
+            try:
+                # the creating process owns the block, so stop this process's exit from unlinking it
+                resource_tracker.unregister(self._shared_memory._name, 'shared_memory')
+            except (AttributeError, KeyError):
+                pass
+        self._size = (self._shared_memory.size - HEADER_BYTES) // ENTRY_DTYPE.itemsize
+        self._header = self._shared_memory.buf[:8].cast('Q')
+        self._entries = numpy.ndarray((self._size,), dtype=ENTRY_DTYPE, buffer=self._shared_memory.buf,
+                                      offset=HEADER_BYTES)
+        # the hot path reads and writes the key and data words through a memoryview of the same bytes, which is much
+        # faster than indexing NumPy scalars one at a time (entries are little-endian, as on x86 and ARM)
+        self._words = self._shared_memory.buf[HEADER_BYTES:HEADER_BYTES + self._size * ENTRY_DTYPE.itemsize].cast('Q')
+        if self._owner:
+            self.clear()
+
+    @classmethod
+    def attach(cls, name):
+        """
+        Returns a table attached to the shared memory block of an existing table with the given name.
+        """
+        return cls(name=name)
+
+    def __reduce__(self):
+        return SharedTranspositionTable.attach, (self._shared_memory.name,)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+        if self._owner:
+            self.unlink()
+
+    def get_name(self):
+        """
+        Returns the name of the shared memory block, used by other processes to attach.
+        """
+        return self._shared_memory.name
+
+    def get_size(self):
+        """
+        Returns the number of entries in the table.
+        """
+        return self._size
+
+    def get_entries(self):
+        """
+        Returns the NumPy structured array of entries, with fields key, data, depth, flags, move and score.
+        """
+        return self._entries
+
+    def close(self):
+        """
+        Detaches this process from the shared memory block.
+        """
+        self._words.release()
+        self._header.release()
+        self._header = self._entries = self._words = None
+        self._shared_memory.close()
+
+    def unlink(self):
+        """
+        Destroys the shared memory block once every process has closed it. Only called by the owner.
+        """
+        self._shared_memory.unlink()
+
+    def new_search(self):
+        """
+        Marks the start of a new search in every attached process, so that entries from earlier searches are replaced
+        first.
+        """
+        self._header[0] = (self._header[0] + 1) & GENERATION_MASK
+
+    def clear(self):
+        """
+        Empties every entry of the table and restarts the search generation.
+        """
+        self._entries.fill(0)
+        self._header[0] = 0
+
+    def probe(self, position_hash):
+        """
+        Returns the (hash, depth, score, bound, best move, generation) entry stored for the position hash, or None if
+        there is none or the slot is in the middle of being written.
+        """
+        index = position_hash % self._size * 2
+        data = self._words[index + 1]
+        if data == 0 or self._words[index] ^ data != position_hash:
+            return None
+        depth, flags, packed_move, score = self._unpack(data)
+        return position_hash, depth, score, flags & 3, unpack_move(packed_move), flags >> 2
+
+    def store(self, position_hash, depth, score, bound, best_move):
+        """
+        Stores a search result for the position hash. As in TranspositionTable, it replaces the entry in its slot if
+        the slot is empty or holds the same position, if the old entry is from an earlier search, or if the new entry
+        was searched at least as deep.
+        """
+        index = position_hash % self._size * 2
+        generation = self._header[0]
+        old_data = self._words[index + 1]
+        packed_move = pack_move(best_move)
+        if old_data:
+            old_depth, old_flags, old_packed_move, __ = self._unpack(old_data)
+            same_position = self._words[index] ^ old_data == position_hash
+            if not same_position and old_flags >> 2 == generation and old_depth > depth:
+                return
+            if same_position and not packed_move:
+                packed_move = old_packed_move  # keep the best move of an earlier search of the same position
+        data = ((depth & 0xFF) | (bound | generation << 2) << 8 | packed_move << 16 |
+                (score & 0xFFFFFFFF) << 32)
+        self._words[index + 1] = data
+        self._words[index] = position_hash ^ data
+
+    @staticmethod
+    def _unpack(data):
+        """
+        Splits a data word into its signed depth, flags, packed move and signed score.
+        """
+        depth = data & 0xFF
+        score = data >> 32
+        if depth >= 0x80:
+            depth -= 0x100
+        if score >= 0x80000000:
+            score -= 0x100000000
+        return depth, data >> 8 & 0xFF, data >> 16 & 0xFFFF, score
@@ -0,0 +1,88 @@
+from ChessEngine import ChessEngine, EXACT, LOWER_BOUND, UPPER_BOUND, KING_CAPTURE_SCORE
+from ChessVar import ChessVar
+import multiprocessing
+import unittest
+
+try:
+    from SharedTranspositionTable import *
+except ImportError:  # NumPy is not installed
+    SharedTranspositionTable = None
+
+
+def store_in_child(table):
+    """Stores an entry from another process, attaching to the table when it is unpickled."""
+    table.store(12345, 7, -250, LOWER_BOUND, ('h', 'c8'))
+    table.close()
+
+
+@unittest.skipIf(SharedTranspositionTable is None, 'NumPy is not installed')
+class TestSharedTranspositionTable(unittest.TestCase):
+    def setUp(self):
+        # Create a small table before each test
+        self._table = SharedTranspositionTable(size_mb=0.01)
+
+    def tearDown(self):
+        self._table.close()
+        self._table.unlink()
+
+    def test_store_and_probe(self):
+        """Tests entries come back with their depth, score, bound and move, including fairy entries and negative
+        scores, in a 16-byte structured array sized by the memory budget."""
+        self.assertEqual(self._table.get_size(), (int(0.01 * (1 << 20)) - 16) // 16)
+        self._table.store(99, 3, -KING_CAPTURE_SCORE + 5, UPPER_BOUND, ('F', 'e2'))
+        self.assertEqual(self._table.probe(99)[:5], (99, 3, -KING_CAPTURE_SCORE + 5, UPPER_BOUND, ('F', 'e2')))
+        self._table.store(100, 2, 40, EXACT, ('e2', 'e4'))
+        self.assertEqual(self._table.probe(100)[1:5], (2, 40, EXACT, ('e2', 'e4')))
+        self.assertIsNone(self._table.probe(101))
+        entry = self._table.get_entries()[100 % self._table.get_size()]
+        self.assertEqual((entry['depth'], entry['score'], entry['flags'] & 3), (2, 40, EXACT))
+
+    def test_replacement_policy(self):
+        """Tests the same replacement policy as TranspositionTable."""
+        size = self._table.get_size()
+        self._table.store(1, 5, 10, EXACT, ('e2', 'e4'))
+        self._table.store(1 + size, 2, 20, EXACT, ('d2', 'd4'))
+        self.assertIsNotNone(self._table.probe(1))
+        self.assertIsNone(self._table.probe(1 + size))
+        self._table.new_search()
+        self._table.store(1 + size, 1, 30, EXACT, None)
+        self.assertIsNone(self._table.probe(1))
+        self.assertEqual(self._table.probe(1 + size)[1:5], (1, 30, EXACT, None))
+
+    def test_torn_entry_is_ignored(self):
+        """Tests an entry whose key and data words disagree, as when a write is half done, reads as empty."""
+        self._table.store(77, 4, 15, EXACT, ('g1', 'f3'))
+        entries = self._table.get_entries()
+        entries['score'][77 % self._table.get_size()] = 16  # data changed without the key
+        self.assertIsNone(self._table.probe(77))
+
+    def test_other_process_attaches(self):
+        """Tests an entry stored by another process is seen by this one."""
+        process = multiprocessing.get_context('spawn').Process(target=store_in_child, args=(self._table,))
+        process.start()
+        process.join()
+        self.assertEqual(process.exitcode, 0)
+        self.assertEqual(self._table.probe(12345)[1:5], (7, -250, LOWER_BOUND, ('h', 'c8')))
+
+    def test_engine_uses_shared_table(self):
+        """Tests the engine searches with the shared table and finds the same move as with its own table."""
+        game = ChessVar()
+        for move in [('e2', 'e4'), ('f7', 'f6'), ('d2', 'd4'), ('g7', 'g5')]:
+            game.play_move(move)
+        engine = ChessEngine(transposition_table=self._table)
+        self.assertEqual(engine.search(game, 3), ChessEngine().search(game, 3))
+        self.assertIsNotNone(self._table.probe(game.get_hash()))
+
+    def test_parallel_search_shares_table(self):
+        """Tests the workers of a parallel search fill one shared table and match a single engine."""
+        from ParallelSearch import ParallelSearch
+        from Perft import PERFT_SUITE
+        game = PERFT_SUITE[2].create_game()
+        with ParallelSearch(workers=2, shared_table_mb=1) as search:
+            result = search.search(game, 3)
+            self.assertGreater((search.get_shared_table().get_entries()['data'] != 0).sum(), 0)
+        self.assertEqual(result.get_score(), ChessEngine().iterative_deepening(game, max_depth=3).get_score())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,134 @@
+# Author: Ethan David Lee
+# GitHub username: ethandavidlee
+# Date: 2024/03/11
+# Description: Tactics suite for the Falcon-Hunter Chess engine. Each position has a winning move that a search
+#           stopping in the middle of an exchange misses: captures that lose the capturing piece, pieces defended or
+#           not by Falcons and Hunters, which capture differently forward and backward, pieces lined up behind one
+#           another, a fork of the king and a rook, and a king capture two moves ahead. The engine searches each
+#           position one depth at a time until it plays a winning move, and the depth reached and the nodes searched
+#           are reported with and without the quiescence search, to show how many nodes it takes to find the same
+#           moves.
+#           Usage: python Tactics.py [--depth N] [--backend dict|bitboard] [--position NAME]
+
+import argparse
+import sys
+import time
+
+from ChessEngine import ChessEngine
+from ChessVar import ChessVar
+
+
+class TacticsPosition:
+    """
+    Represents a position of the tactics suite, given in the format of ChessVar.to_fen, with the moves that solve it.
+    """
+    def __init__(self, name, fen, best_moves):
+        self._name = name
+        self._fen = fen
+        self._best_moves = best_moves
+
+    def get_name(self):
+        """
+        Returns the name of the position.
+        """
+        return self._name
+
+    def get_fen(self):
+        """
+        Returns the position in the format of ChessVar.to_fen.
+        """
+        return self._fen
+
+    def get_best_moves(self):
+        """
+        Returns the moves that solve the position, in the form generated by ChessVar.legal_moves.
+        """
+        return self._best_moves
+
+    def create_game(self, backend='dict'):
+        """
+        Returns a new ChessVar on the given chessboard backend in the position.
+        """
+        return ChessVar.from_fen(self._fen, backend)
+
+
+TACTICS_SUITE = [
+    # the rook on d5 is defended by a pawn, the knight on a4 is free
+    TacticsPosition('poisoned-rook', '6k1/8/2p5/3r4/n7/8/8/3Q2K1 w FHfh - 0', (('d1', 'a4'),)),
+    # the black falcon on b6 takes back on a5, but the black hunter on e6 cannot take back on d5, a forward diagonal
+    TacticsPosition('hunter-cannot-recapture', '7k/6pp/1f2h3/r2n4/8/1B6/3Q4/7K w FH nb 0', (('b3', 'd5'),)),
+    # the black falcon on e6 takes back on d5, a forward diagonal, so the queen should take the free pawn instead
+    TacticsPosition('falcon-recaptures', '1k6/pp5p/4f3/3n4/8/8/Q7/K6R w FHh n 0', (('h1', 'h7'),)),
+    # the second white rook wins the exchange on d5, while the knight on c5 is defended by a pawn
+    TacticsPosition('doubled-rooks', '4k3/3r4/1p6/2np4/8/B7/3R4/3R2K1 w FHfh - 0', (('d2', 'd5'),)),
+    # the white falcon on a2 backs up the rook along its forward diagonal
+    TacticsPosition('falcon-supports-rook', '4k3/3r4/1p6/2np4/8/B7/F2R4/6K1 w Hfh N 0', (('d2', 'd5'),)),
+    # the white hunter on d1 backs up the rook along its forward file
+    TacticsPosition('hunter-supports-rook', '4k3/3r4/1p6/2np4/8/B7/3R4/3H2K1 w Ffh N 0', (('d2', 'd5'),)),
+    # the knight attacks the king and the rook on a8 at once, and black must save the king before the rook
+    TacticsPosition('knight-forks-king', 'r3k3/p4ppp/8/1N6/8/8/5PPP/6K1 w FHfh - 0', (('b5', 'c7'),)),
+    # after 1. e4 f6 2. d4 g5 the queen attacks the king and black cannot stop it being taken
+    TacticsPosition('king-capture-in-two', 'rnbqkbnr/ppppp2p/5p2/6p1/3PP3/8/PPP2PPP/RNBQKBNR w FHfh - 4',
+                    (('d1', 'h5'),)),
+]
+
+
+def solve(position, max_depth, quiescence=True, backend='dict'):
+    """
+    Searches the position at depth 1, 2, ... up to max_depth with one engine, as iterative deepening does, until the
+    best move found solves it. Returns a tuple of the depth that solved it (None if none did), the nodes searched over
+    every depth and the time taken in seconds.
+    """
+    game = position.create_game(backend)
+    engine = ChessEngine(quiescence=quiescence)
+    nodes = 0
+    start = time.perf_counter()
+    for depth in range(1, max_depth + 1):
+        move, __ = engine.search(game, depth)
+        nodes += engine.get_nodes()
+        if move in position.get_best_moves():
+            return depth, nodes, time.perf_counter() - start
+    return None, nodes, time.perf_counter() - start
+
+
+def run_suite(max_depth, backend='dict', positions=None, output=sys.stdout):
+    """
+    Solves each position of the suite up to max_depth without and with the quiescence search, printing one line per
+    position with the depth that solved it and the nodes searched for each. Returns a dictionary mapping False and True,
+    for without and with the quiescence search, to a tuple of the positions solved and the total nodes searched.
+    """
+    totals = {False: (0, 0), True: (0, 0)}
+    for position in positions or TACTICS_SUITE:
+        line = f'{position.get_name():<24}'
+        for quiescence in (False, True):
+            depth, nodes, seconds = solve(position, max_depth, quiescence, backend)
+            solved, total_nodes = totals[quiescence]
+            totals[quiescence] = (solved + (depth is not None), total_nodes + nodes)
+            label = 'quiescence' if quiescence else 'plain'
+            line += f'  {label} depth {depth if depth is not None else "-":>2} nodes {nodes:>8} {seconds:7.3f}s'
+        print(line, file=output)
+    for quiescence, (solved, total_nodes) in totals.items():
+        label = 'quiescence' if quiescence else 'plain'
+        print(f'{label:<10} solved {solved}/{len(positions or TACTICS_SUITE)}  nodes {total_nodes}', file=output)
+    return totals
+
+
+def main(argv=None):
+    """
+    Runs the tactics suite from the command line.
+    """
+    parser = argparse.ArgumentParser(description='Tactics suite for the Falcon-Hunter Chess engine.')
+    parser.add_argument('--depth', type=int, default=4, help='deepest depth to search')
+    parser.add_argument('--backend', choices=['dict', 'bitboard'], default='dict', help='chessboard backend')
+    parser.add_argument('--position', help='only run the suite position with this name')
+    args = parser.parse_args(argv)
+
+    positions = [position for position in TACTICS_SUITE if args.position in (None, position.get_name())]
+    if not positions:
+        parser.error(f"unknown position '{args.position}'")
+    totals = run_suite(args.depth, args.backend, positions)
+    return 0 if totals[True][0] == len(positions) else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,40 @@
+from Tactics import *
+import io
+import unittest
+
+
+class TestTactics(unittest.TestCase):
+    def test_suite_positions(self):
+        """Tests every suite position can be set up, with its solving moves legal."""
+        for position in TACTICS_SUITE:
+            for backend in ('dict', 'bitboard'):
+                game = position.create_game(backend)
+                for move in position.get_best_moves():
+                    self.assertIn(move, game.get_legal_moves())
+
+    def test_quiescence_solves_with_fewer_nodes(self):
+        """Tests the quiescence search solves every position by depth 3 in fewer nodes than the plain search, which
+        misses some of them."""
+        totals = run_suite(3, output=io.StringIO())
+        self.assertEqual(totals[True][0], len(TACTICS_SUITE))
+        self.assertLess(totals[False][0], len(TACTICS_SUITE))
+        self.assertLess(totals[True][1], totals[False][1])
+
+    def test_solve(self):
+        """Tests solve reports the depth that found the move, and None when the depth limit is too shallow."""
+        position = TACTICS_SUITE[-1]  # the king capture needs two plies without the quiescence search
+        depth, nodes, seconds = solve(position, 3, quiescence=False)
+        self.assertEqual(depth, 2)
+        self.assertGreater(nodes, 0)
+        self.assertIsNone(solve(position, 1, quiescence=False)[0])
+        self.assertEqual(solve(position, 1)[0], 1)  # the quiescence search finds the black king cannot be saved
+
+    def test_king_attacked_at_depth_limit(self):
+        """Tests the quiescence search does not stand pat with the king attacked, so the fork is found at depth 1."""
+        position = next(position for position in TACTICS_SUITE if position.get_name() == 'knight-forks-king')
+        self.assertEqual(solve(position, 1)[0], 1)
+        self.assertIsNone(solve(position, 1, quiescence=False)[0])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,298 @@
+# Author: Ethan David Lee
+# GitHub username: ethandavidlee
+# Date: 2024/03/11
+# Description: Exporter of training data for Falcon-Hunter Chess value and policy networks. Streams the games of a
+#           GameRecord file through ChessVar and encodes the position before every move as tensors, which a pool of
+#           worker processes does a chunk of games at a time. The positions are gathered into shards of shard_size
+#           positions (the last shard may be smaller), each written as four NumPy .npy files, so memory stays bounded
+#           by a shard plus the chunks in flight however many games there are.
+#           Shard files, for n positions:
+#               PREFIX-NNNNN-planes.npy  uint8 (n, 21, 8, 8): a plane per piece code, in PIECE_NAMES order, then a
+#                                        plane per off board fairy piece (F, H, f, h) filled with its count, then a
+#                                        plane filled with the side to move, 0 for white and 1 for black
+#               PREFIX-NNNNN-masks.npy   uint8 (n, 544): the legal action mask of BatchEngine, packed 8 actions a byte
+#                                        with numpy.packbits
+#               PREFIX-NNNNN-actions.npy int16 (n,): the action played from the position
+#               PREFIX-NNNNN-values.npy  int8 (n,): the recorded result of the game for the side to move, 1 if it
+#                                        went on to win, -1 if it lost and 0 if the game was unfinished
+#           Requires NumPy.
+#           Usage: python TrainingExporter.py GAMES_FILE OUTPUT_DIRECTORY [--shard-size N] [--workers N] [--prefix P]
+
+import argparse
+import collections
+import multiprocessing
+import os
+import sys
+import time
+
+import numpy
+
+from BatchEngine import ACTIONS, FAIRY_KIND_CODES, packed_move_to_action
+from ChessVar import ChessVar, EMPTY_CODE, PIECES
+from GameRecord import read_games
+
+PLANES = len(PIECES) + len(FAIRY_KIND_CODES) + 1
+SIDE_PLANE = PLANES - 1
+FAIRY_PLANES = {int(code): len(PIECES) + kind for kind, code in enumerate(FAIRY_KIND_CODES)}
+OUTCOMES = {'UNFINISHED': (0, 0), 'WHITE_WON': (1, -1), 'BLACK_WON': (-1, 1)}  # value for white and black to move
+
+_worker_game = None  # the ChessVar of a worker process, reset for each game
+
+
+def encode_planes(game):
+    """
+    Returns the planes of a game's position as a uint8 array of shape (PLANES, 8, 8), indexed by row then column from
+    a1 like BatchEngine.get_boards.
+    """
+    snapshot = game.snapshot()
+    squares = numpy.frombuffer(snapshot.get_square_codes(), numpy.uint8)
+    planes = numpy.zeros((PLANES, 64), numpy.uint8)
+    occupied = numpy.flatnonzero(squares != EMPTY_CODE)
+    planes[squares[occupied], occupied] = 1
+    for code in snapshot.get_off_board_codes():
+        planes[FAIRY_PLANES[code]] += 1
+    planes[SIDE_PLANE] = snapshot.get_turn_count() % 2
+    return planes.reshape(PLANES, 8, 8)
+
+
+def legal_action_mask(game, legal_actions=None):
+    """
+    Returns a boolean array of the ACTIONS actions marking the legal moves of a game, or the given array of legal
+    actions made from the game's legal packed moves.
+    """
+    if legal_actions is None:
+        legal_actions = packed_move_to_action(game.legal_packed_moves())
+    mask = numpy.zeros(ACTIONS, bool)
+    mask[legal_actions] = True
+    return mask
+
+
+def _encode_games(games):
+    """
+    Replays a chunk of games, each a (packed moves, result) tuple as yielded by GameRecord.read_games, in a worker
+    process and returns the encoded positions as (planes, masks, actions, values) arrays with the number of games and
+    of games stopped by an illegal move. Positions are valued by the recorded result, as a game stopped by an illegal
+    move has not reached it on the board, or by the replayed result if none was recorded.
+    """
+    global _worker_game
+    if _worker_game is None:
+        _worker_game = ChessVar()
+    game = _worker_game
+    planes = []
+    masks = []
+    actions = []
+    values = []
+    illegal_games = 0
+    for packed_moves, result in games:
+        game.reset()
+        first = len(planes)
+        stopped = False
+        for packed_move in packed_moves:
+            legal_moves = numpy.array(game.legal_packed_moves(), numpy.int64)
+            legal_index = numpy.flatnonzero(legal_moves == packed_move)
+            if not legal_index.size:
+                illegal_games += 1
+                stopped = True
+                break
+            legal_actions = packed_move_to_action(legal_moves)
+            planes.append(encode_planes(game))
+            masks.append(numpy.packbits(legal_action_mask(game, legal_actions)))
+            actions.append(legal_actions[legal_index[0]])
+            game.play_packed_move(int(packed_move))
+        if result is None:
+            result = 'UNFINISHED' if stopped else game.get_game_state()
+        white_value, black_value = OUTCOMES[result]
+        values.extend(white_value if ply % 2 == 0 else black_value for ply in range(len(planes) - first))
+
+    if not planes:
+        return (numpy.zeros((0, PLANES, 8, 8), numpy.uint8), numpy.zeros((0, (ACTIONS + 7) // 8), numpy.uint8),
+                numpy.zeros(0, numpy.int16), numpy.zeros(0, numpy.int8), len(games), illegal_games)
+    return (numpy.stack(planes), numpy.stack(masks), numpy.array(actions, numpy.int16), numpy.array(values, numpy.int8),
+            len(games), illegal_games)
+
+
+class ExportReport:
+    """
+    Represents the outcome of an export: the games, positions and shards written, the games stopped by an illegal
+    move, and the wall time taken.
+    """
+    def __init__(self, games, illegal_games, positions, shard_paths, seconds):
+        self._games = games
+        self._illegal_games = illegal_games
+        self._positions = positions
+        self._shard_paths = shard_paths
+        self._seconds = seconds
+
+    def get_games(self):
+        """
+        Returns the number of games read.
+        """
+        return self._games
+
+    def get_illegal_games(self):
+        """
+        Returns the number of games with an illegal move, whose positions from that move on were left out.
+        """
+        return self._illegal_games
+
+    def get_positions(self):
+        """
+        Returns the number of positions written.
+        """
+        return self._positions
+
+    def get_shard_paths(self):
+        """
+        Returns a list of the path prefix of each shard written, to which '-planes.npy', '-masks.npy', '-actions.npy'
+        and '-values.npy' are added.
+        """
+        return self._shard_paths
+
+    def get_seconds(self):
+        """
+        Returns the wall time taken.
+        """
+        return self._seconds
+
+    def get_positions_per_second(self):
+        """
+        Returns the number of positions written per second of wall time.
+        """
+        return self._positions / self._seconds if self._seconds > 0 else 0.0
+
+
+class TrainingExporter:
+    """
+    Represents a pool of worker processes that encode games into shards of training positions in a directory.
+    Communicates with GameRecord to stream the games, and with ChessVar and BatchEngine through the workers to replay
+    and encode them. With one worker the games are encoded in this process.
+    """
+    def __init__(self, directory, shard_size=65536, workers=None, chunk_games=64, prefix='shard'):
+        if shard_size < 1:
+            raise ValueError('shard_size must be at least 1')
+        self._directory = directory
+        self._shard_size = shard_size
+        self._workers = workers or os.cpu_count() or 1
+        self._chunk_games = chunk_games
+        self._prefix = prefix
+        self._pool = multiprocessing.Pool(self._workers) if self._workers > 1 else None
+        self._buffers = []  # (planes, masks, actions, values) arrays of the positions not yet written
+        self._buffered = 0
+        self._shard_paths = []
+        self._positions = 0
+        self._games = 0
+        self._illegal_games = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        """
+        Shuts down the worker processes.
+        """
+        if self._pool is not None:
+            self._pool.close()
+            self._pool.join()
+            self._pool = None
+
+    def export(self, path):
+        """
+        Encodes every game of the GameRecord file at path and writes the shards, returning an ExportReport.
+        """
+        return self.export_games(read_games(path, packed=True))
+
+    def export_games(self, games):
+        """
+        Encodes an iterable of games, each a (packed moves, result) tuple as yielded by GameRecord.read_games, and
+        writes the shards, returning an ExportReport. At most two chunks of games per worker are encoded or waiting to
+        be written at a time.
+        """
+        start = time.perf_counter()
+        os.makedirs(self._directory, exist_ok=True)
+        self._buffers = []
+        self._buffered = 0
+        self._shard_paths = []
+        self._positions = 0
+        self._games = 0
+        self._illegal_games = 0
+
+        pending = collections.deque()
+        chunk = []
+        for game in games:
+            chunk.append(game)
+            if len(chunk) == self._chunk_games:
+                self._submit(chunk, pending)
+                chunk = []
+        if chunk:
+            self._submit(chunk, pending)
+        while pending:
+            self._add_chunk(pending.popleft().get())
+        if self._buffered:
+            self._write_shard(self._buffered)
+        return ExportReport(self._games, self._illegal_games, self._positions, self._shard_paths,
+                            time.perf_counter() - start)
+
+    def _submit(self, chunk, pending):
+        """
+        Encodes a chunk of games in this process, or hands it to the pool, first waiting for the oldest chunk when
+        too many are in flight.
+        """
+        if self._pool is None:
+            self._add_chunk(_encode_games(chunk))
+            return
+        while len(pending) >= 2 * self._workers:
+            self._add_chunk(pending.popleft().get())
+        pending.append(self._pool.apply_async(_encode_games, (chunk,)))
+
+    def _add_chunk(self, result):
+        """
+        Adds the encoded positions of a chunk to the shard being filled, writing every shard that fills up.
+        """
+        planes, masks, actions, values, games, illegal_games = result
+        self._games += games
+        self._illegal_games += illegal_games
+        self._buffers.append((planes, masks, actions, values))
+        self._buffered += len(values)
+        while self._buffered >= self._shard_size:
+            self._write_shard(self._shard_size)
+
+    def _write_shard(self, positions):
+        """
+        Writes the first positions buffered as the next shard and keeps the rest for the one after.
+        """
+        arrays = [numpy.concatenate([buffer[field] for buffer in self._buffers]) for field in range(4)]
+        shard_path = os.path.join(self._directory, f'{self._prefix}-{len(self._shard_paths):05d}')
+        for name, array in zip(('planes', 'masks', 'actions', 'values'), arrays):
+            numpy.save(f'{shard_path}-{name}.npy', array[:positions])
+        self._shard_paths.append(shard_path)
+        self._positions += positions
+        self._buffers = [tuple(array[positions:] for array in arrays)]
+        self._buffered -= positions
+
+
+def main(argv=None):
+    """
+    Exports the games of a game record file from the command line and prints the report.
+    """
+    parser = argparse.ArgumentParser(description='Export Falcon-Hunter Chess games as sharded training tensors.')
+    parser.add_argument('path', help='game record file')
+    parser.add_argument('directory', help='directory for the shard files')
+    parser.add_argument('--shard-size', type=int, default=65536, help='positions per shard')
+    parser.add_argument('--workers', type=int, help='worker processes, default one per core')
+    parser.add_argument('--chunk-games', type=int, default=64, help='games handed to a worker at a time')
+    parser.add_argument('--prefix', default='shard', help='shard file name prefix')
+    args = parser.parse_args(argv)
+
+    with TrainingExporter(args.directory, args.shard_size, args.workers, args.chunk_games, args.prefix) as exporter:
+        report = exporter.export(args.path)
+    print(f'games {report.get_games()}  positions {report.get_positions()}  shards {len(report.get_shard_paths())}'
+          f'  illegal games {report.get_illegal_games()}')
+    print(f'wall time {report.get_seconds():.3f}s  {report.get_positions_per_second():.0f} positions/s')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,86 @@
+from ChessVar import ChessVar, PIECE_CODES, pack_move
+from GameRecord import GameRecordWriter
+import os
+import random
+import tempfile
+import unittest
+
+try:
+    from TrainingExporter import *
+    from BatchEngine import move_to_action
+except ImportError:  # NumPy is not installed
+    TrainingExporter = None
+
+
+@unittest.skipIf(TrainingExporter is None, 'NumPy is not installed')
+class TestTrainingExporter(unittest.TestCase):
+    def setUp(self):
+        self._directory = tempfile.TemporaryDirectory()
+        self._path = os.path.join(self._directory.name, 'games.fhgr')
+        generator = random.Random(8)
+        self._games = []
+        with GameRecordWriter(self._path) as writer:
+            for __ in range(12):
+                game = ChessVar()
+                moves = []
+                while game.get_game_state() == 'UNFINISHED' and len(moves) < 120:
+                    moves.append(generator.choice(game.get_legal_moves()))
+                    game.play_move(moves[-1])
+                writer.write_game(moves, game.get_game_state())
+                self._games.append((moves, game.get_game_state()))
+            writer.write_game([('e2', 'e4'), ('e7', 'e5'), ('e4', 'e5')], 'UNFINISHED')  # pawns can't take ahead
+
+    def tearDown(self):
+        self._directory.cleanup()
+
+    def test_export(self):
+        """Tests every position is written once in fixed size shards, the same with one worker and with a pool, and
+        matches the position replayed on ChessVar."""
+        positions = sum(len(moves) for moves, __ in self._games) + 2
+        shards = []
+        for workers in (1, 2):
+            directory = os.path.join(self._directory.name, f'workers{workers}')
+            with TrainingExporter(directory, shard_size=100, workers=workers, chunk_games=5) as exporter:
+                report = exporter.export(self._path)
+            self.assertEqual((report.get_games(), report.get_illegal_games()), (13, 1))
+            self.assertEqual(report.get_positions(), positions)
+            self.assertEqual(len(report.get_shard_paths()), (positions + 99) // 100)
+            shards.append([[numpy.load(f'{shard_path}-{name}.npy') for name in ('planes', 'masks', 'actions', 'values')]
+                           for shard_path in report.get_shard_paths()])
+        for shard, other_shard in zip(*shards):
+            for array, other_array in zip(shard, other_shard):
+                self.assertTrue(numpy.array_equal(array, other_array))
+        planes, masks, actions, values = shards[0][0]
+        self.assertEqual(planes.shape, (100, PLANES, 8, 8))
+        self.assertEqual(masks.shape, (100, 544))
+
+        moves, game_state = self._games[0]
+        game = ChessVar()
+        for ply in range(5):
+            self.assertTrue(numpy.array_equal(planes[ply], encode_planes(game)))
+            self.assertTrue(numpy.array_equal(numpy.unpackbits(masks[ply])[:ACTIONS], legal_action_mask(game)))
+            self.assertEqual(actions[ply], move_to_action(moves[ply]))
+            self.assertEqual(values[ply], OUTCOMES[game_state][ply % 2])
+            game.play_move(moves[ply])
+        self.assertEqual(planes[1, SIDE_PLANE].tolist(), [[1] * 8] * 8)
+        self.assertEqual(planes[0, PIECE_CODES['K'], 0, 4], 1)
+        self.assertEqual(planes[0, FAIRY_PLANES[PIECE_CODES['F']]].sum(), 64)
+
+    def test_recorded_result(self):
+        """Tests positions are valued by the recorded result, also for a game stopped by an illegal move, and by the
+        replayed result when none was recorded."""
+        illegal_moves = [pack_move(move) for move in (('e2', 'e4'), ('e7', 'e5'), ('e4', 'e5'))]
+        king_capture = [pack_move(move) for move in (('e2', 'e4'), ('f7', 'f6'), ('d1', 'h5'), ('a7', 'a6'),
+                                                     ('h5', 'e8'))]
+        directory = os.path.join(self._directory.name, 'results')
+        with TrainingExporter(directory, workers=1) as exporter:
+            report = exporter.export_games([(illegal_moves, 'WHITE_WON'), (king_capture, None)])
+        self.assertEqual((report.get_games(), report.get_illegal_games(), report.get_positions()), (2, 1, 7))
+        values = numpy.load(f'{report.get_shard_paths()[0]}-values.npy')
+        self.assertEqual(values.tolist(), [1, -1, 1, -1, 1, -1, 1])
+        actions = numpy.load(f'{report.get_shard_paths()[0]}-actions.npy')
+        self.assertEqual(actions[:2].tolist(), [move_to_action(('e2', 'e4')), move_to_action(('e7', 'e5'))])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,232 @@
+# Author: Ethan David Lee
+# GitHub username: ethandavidlee
+# Date: 2024/03/11
+# Description: Gym-style vectorised environment of Falcon-Hunter Chess games for self-play training. reset and step
+#           work on every game at once, taking one action per game from the fixed action space of BatchEngine (board
+#           moves and fairy piece entries) and returning observation arrays ready for a network: the planes of
+#           TrainingExporter.encode_planes and the legal action mask. A game that is won, or reaches max_plies moves, is
+#           reset straight away and its first observation returned, with how it ended in the step's infos. The games
+#           can be split between subprocess workers, each stepping its share of the games in parallel.
+#           Rewards are for the player who made the move: 1.0 for taking the king, illegal_reward for an illegal
+#           action, which leaves the game unchanged, and 0.0 otherwise.
+#           Requires NumPy.
+
+import multiprocessing
+
+import numpy
+
+from BatchEngine import ACTIONS, action_to_move
+from ChessVar import ChessVar
+from TrainingExporter import PLANES, encode_planes, legal_action_mask
+
+OBSERVATION_SHAPE = (PLANES, 8, 8)
+
+
+class _GameGroup:
+    """
+    Represents the games stepped by one process, either the VectorEnv itself or one of its workers.
+    """
+    def __init__(self, num_envs, backend, max_plies, illegal_reward):
+        self._games = [ChessVar(backend=backend) for __ in range(num_envs)]
+        self._plies = [0] * num_envs
+        self._max_plies = max_plies
+        self._illegal_reward = illegal_reward
+
+    def get_games(self):
+        """
+        Returns the list of ChessVar games.
+        """
+        return self._games
+
+    def _observe(self):
+        """
+        Returns the planes and legal action masks of every game.
+        """
+        planes = numpy.stack([encode_planes(game) for game in self._games])
+        masks = numpy.stack([legal_action_mask(game) for game in self._games])
+        return planes, masks
+
+    def reset(self):
+        """
+        Puts every game back to the start and returns the planes and legal action masks.
+        """
+        for game in self._games:
+            game.reset()
+        self._plies = [0] * len(self._games)
+        return self._observe()
+
+    def step(self, actions):
+        """
+        Makes one action in each game, resetting the games that end, and returns the planes, legal action masks,
+        rewards, terminated and truncated flags, illegal action flags and final game states (None for games that did
+        not end).
+        """
+        count = len(self._games)
+        rewards = numpy.zeros(count, numpy.float32)
+        terminated = numpy.zeros(count, bool)
+        truncated = numpy.zeros(count, bool)
+        illegal = numpy.zeros(count, bool)
+        final_game_states = [None] * count
+        for game_index, (game, action) in enumerate(zip(self._games, actions)):
+            if not (0 <= action < ACTIONS and game.play_move(action_to_move(action))):
+                illegal[game_index] = True
+                rewards[game_index] = self._illegal_reward
+                continue
+            self._plies[game_index] += 1
+            game_state = game.get_game_state()
+            if game_state != 'UNFINISHED':
+                terminated[game_index] = True
+                rewards[game_index] = 1.0  # only the player moving can take a king
+            elif self._max_plies is not None and self._plies[game_index] >= self._max_plies:
+                truncated[game_index] = True
+            if terminated[game_index] or truncated[game_index]:
+                final_game_states[game_index] = game_state
+                game.reset()
+                self._plies[game_index] = 0
+        planes, masks = self._observe()
+        return planes, masks, rewards, terminated, truncated, illegal, final_game_states
+
+
+def _worker_loop(connection, num_envs, backend, max_plies, illegal_reward):
+    """
+    Runs a worker process, stepping a group of games on the commands received from the VectorEnv until told to
+    close.
+    """
+    group = _GameGroup(num_envs, backend, max_plies, illegal_reward)
+    try:
+        while True:
+            command, actions = connection.recv()
+            if command == 'reset':
+                connection.send(group.reset())
+            elif command == 'step':
+                connection.send(group.step(actions))
+            elif command == 'close':
+                break
+    except (EOFError, KeyboardInterrupt):
+        pass
+    finally:
+        connection.close()
+
+
+class VectorEnv:
+    """
+    Represents num_envs games stepped together with reset and step. Communicates with ChessVar to play the games and
+    with TrainingExporter to encode the observations. With workers, the games are split as evenly as possible between
+    that many subprocesses, and each step sends every worker its actions before waiting for any of them.
+    """
+    def __init__(self, num_envs, workers=0, backend='dict', max_plies=512, illegal_reward=-1.0):
+        if num_envs < 1:
+            raise ValueError('num_envs must be at least 1')
+        if backend not in ('dict', 'bitboard'):
+            raise ValueError(f"unknown chessboard backend '{backend}', expected 'dict' or 'bitboard'")
+        self._num_envs = num_envs
+        self._workers = min(workers, num_envs)
+        self._group = None
+        self._connections = []
+        self._processes = []
+        self._bounds = [0]
+        if self._workers:
+            for worker in range(self._workers):
+                self._bounds.append(num_envs * (worker + 1) // self._workers)
+                connection, worker_connection = multiprocessing.Pipe()
+                process = multiprocessing.Process(target=_worker_loop, daemon=True,
+                                                  args=(worker_connection, self._bounds[-1] - self._bounds[-2],
+                                                        backend, max_plies, illegal_reward))
+                process.start()
+                worker_connection.close()
+                self._connections.append(connection)
+                self._processes.append(process)
+        else:
+            self._group = _GameGroup(num_envs, backend, max_plies, illegal_reward)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def get_num_envs(self):
+        """
+        Returns the number of games.
+        """
+        return self._num_envs
+
+    def get_action_count(self):
+        """
+        Returns the size of the discrete action space, the same for every game.
+        """
+        return ACTIONS
+
+    def get_observation_shape(self):
+        """
+        Returns the shape of the observation planes of one game.
+        """
+        return OBSERVATION_SHAPE
+
+    def get_games(self):
+        """
+        Returns the list of ChessVar games, only available without workers.
+        """
+        if self._group is None:
+            raise ValueError('the games are held by the worker processes')
+        return self._group.get_games()
+
+    def _gather(self, command, actions=None):
+        """
+        Sends a command to every worker, with its share of the actions, and returns their replies in order.
+        """
+        for worker, connection in enumerate(self._connections):
+            share = None if actions is None else actions[self._bounds[worker]:self._bounds[worker + 1]]
+            connection.send((command, share))
+        return [connection.recv() for connection in self._connections]
+
+    def reset(self):
+        """
+        Puts every game back to the start and returns (observations, infos), where observations is a dictionary of
+        the 'planes', a uint8 array of shape (num_envs, 21, 8, 8), and the 'action_mask', a boolean array of shape
+        (num_envs, ACTIONS).
+        """
+        if self._group is not None:
+            planes, masks = self._group.reset()
+        else:
+            replies = self._gather('reset')
+            planes = numpy.concatenate([reply[0] for reply in replies])
+            masks = numpy.concatenate([reply[1] for reply in replies])
+        return {'planes': planes, 'action_mask': masks}, {}
+
+    def step(self, actions):
+        """
+        Makes one action in each game and returns (observations, rewards, terminated, truncated, infos). terminated
+        is set for games won by the move and truncated for games that reached max_plies; both are reset and their
+        observation is the start of the next game. infos holds 'illegal', marking the actions that were not made, and
+        'final_game_states', the game state each game ended in, or None if it did not end.
+        """
+        actions = [int(action) for action in actions]
+        if len(actions) != self._num_envs:
+            raise ValueError(f'expected {self._num_envs} actions, got {len(actions)}')
+        if self._group is not None:
+            planes, masks, rewards, terminated, truncated, illegal, final_game_states = self._group.step(actions)
+        else:
+            replies = self._gather('step', actions)
+            fields = [numpy.concatenate([reply[field] for reply in replies]) for field in range(6)]
+            planes, masks, rewards, terminated, truncated, illegal = fields
+            final_game_states = [game_state for reply in replies for game_state in reply[6]]
+        infos = {'illegal': illegal, 'final_game_states': final_game_states}
+        return {'planes': planes, 'action_mask': masks}, rewards, terminated, truncated, infos
+
+    def close(self):
+        """
+        Stops the worker processes.
+        """
+        for connection in self._connections:
+            try:
+                connection.send(('close', None))
+            except (BrokenPipeError, OSError):
+                pass
+            connection.close()
+        for process in self._processes:
+            process.join(timeout=5)
+            if process.is_alive():
+                process.terminate()
+        self._connections = []
+        self._processes = []
@@ -0,0 +1,55 @@
+import random
+import unittest
+
+try:
+    from VectorEnv import *
+    from BatchEngine import move_to_action
+except ImportError:  # NumPy is not installed
+    VectorEnv = None
+
+
+@unittest.skipIf(VectorEnv is None, 'NumPy is not installed')
+class TestVectorEnv(unittest.TestCase):
+    def test_auto_reset(self):
+        """Tests a won game is rewarded and reset, a long game is truncated and an illegal action is refused."""
+        with VectorEnv(3, max_plies=5) as env:
+            observations, __ = env.reset()
+            self.assertEqual(observations['planes'].shape, (3,) + env.get_observation_shape())
+            self.assertEqual(observations['action_mask'].shape, (3, env.get_action_count()))
+            start_planes = observations['planes'][0].copy()
+            moves = [('e2', 'e3'), ('f7', 'f6'), ('d1', 'h5'), ('a7', 'a6'), ('h5', 'e8')]
+            knight_moves = [('g1', 'f3'), ('g8', 'f6'), ('f3', 'g1'), ('f6', 'g8'), ('g1', 'f3')]
+            for move, knight_move in zip(moves, knight_moves):
+                actions = [move_to_action(move), move_to_action(move), move_to_action(knight_move)]
+                observations, rewards, terminated, truncated, infos = env.step(actions)
+            self.assertEqual(rewards.tolist(), [1.0, 1.0, 0.0])
+            self.assertEqual(terminated.tolist(), [True, True, False])
+            self.assertEqual(truncated.tolist(), [False, False, True])
+            self.assertEqual(infos['final_game_states'], ['WHITE_WON', 'WHITE_WON', 'UNFINISHED'])
+            self.assertTrue((observations['planes'] == start_planes).all())
+            self.assertEqual(env.get_games()[2].get_turn(), 'white')
+            observations, rewards, terminated, truncated, infos = env.step([move_to_action(('e7', 'e5'))] * 3)
+            self.assertEqual(infos['illegal'].tolist(), [True] * 3)
+            self.assertEqual(rewards.tolist(), [-1.0] * 3)
+
+    def test_workers(self):
+        """Tests subprocess workers step the games the same as one process."""
+        results = []
+        for workers in (0, 2):
+            generator = random.Random(4)
+            with VectorEnv(5, workers=workers, max_plies=30) as env:
+                observations, __ = env.reset()
+                steps = []
+                for __ in range(40):
+                    actions = [generator.choice(numpy.flatnonzero(mask).tolist())
+                               for mask in observations['action_mask']]
+                    observations, rewards, terminated, truncated, infos = env.step(actions)
+                    steps.append((observations['planes'].tolist(), rewards.tolist(), terminated.tolist(),
+                                  truncated.tolist(), infos['final_game_states']))
+                results.append(steps)
+        self.assertEqual(results[0], results[1])
+        self.assertTrue(any(any(truncated) for __, __, __, truncated, __ in results[0]))
+
+
+if __name__ == '__main__':
+    unittest.main()